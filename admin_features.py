@@ -1,1271 +1,1757 @@
-﻿import json
-import pytz  
-import asyncio
-import string
-import random
-from datetime import datetime, timedelta 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes
-from telegram.error import BadRequest as TelegramBadRequest
-
-class AdminFeatures:
-    STATES = {
-        'CHOOSING': 'CHOOSING',
-        'WAITING_CODE_NUMBER': 'WAITING_CODE_NUMBER'
-    }
-
-    def __init__(self, users_file: str = 'data/users.json', access_codes_file: str = 'data/access_codes.json', broadcasts_file: str = 'data/broadcasts.json', config_file: str = 'config/config.json'):  # Ajout du paramètre config_file
-        self.users_file = users_file
-        self.access_codes_file = access_codes_file
-        self.broadcasts_file = broadcasts_file
-        self.config_file = config_file  
-        self._users = self._load_users()
-        self._access_codes = self._load_access_codes()
-        self.broadcasts = self._load_broadcasts()
-        self.admin_ids = self._load_admin_ids()
-        self.cleanup_expired_codes() 
-
-    def _load_admin_ids(self) -> list:
-        """Charge les IDs admin depuis le fichier de configuration"""
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return config.get('admin_ids', [])
-        except Exception as e:
-            print(f"Erreur lors du chargement des admin IDs : {e}")
-            return []
-
-    def _load_access_codes(self):
-        """Charge les codes d'accès depuis le fichier"""
-        try:
-            with open(self.access_codes_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data
-        except FileNotFoundError:
-            print(f"Access codes file not found: {self.access_codes_file}")
-            return {"authorized_users": []}
-        except json.JSONDecodeError as e:
-            print(f"Error decoding access codes file: {e}")
-            return {"authorized_users": []}
-        except Exception as e:
-            print(f"Unexpected error loading access codes: {e}")
-            return {"authorized_users": []}
-
-    def is_user_authorized(self, user_id: int) -> bool:
-        """Vérifie si l'utilisateur est autorisé"""
-        # Recharger les codes d'accès à chaque vérification
-        self._access_codes = self._load_access_codes()
-        
-        # Convertir l'ID en nombre et vérifier sa présence
-        return int(user_id) in self._access_codes.get("authorized_users", [])
-
-    def is_user_banned(self, user_id: int) -> bool:
-        """Vérifie si l'utilisateur est banni"""
-        self._access_codes = self._load_access_codes()
-        return int(user_id) in self._access_codes.get("banned_users", [])
-
-    def reload_access_codes(self):
-        """Recharge les codes d'accès depuis le fichier"""
-        self._access_codes = self._load_access_codes()
-        return self._access_codes.get("authorized_users", [])
-
-    def _load_users(self):
-        """Charge les utilisateurs depuis le fichier"""
-        try:
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-
-    def _save_users(self):
-        """Sauvegarde les utilisateurs"""
-        try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(self._users, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des utilisateurs : {e}")
-
-    def _create_message_keyboard(self):
-        """Crée le clavier standard pour les messages"""
-        return InlineKeyboardMarkup([[
-            InlineKeyboardButton("🔄 Menu Principal", callback_data="start_cmd")
-        ]])
-
-    def _load_broadcasts(self):
-        """Charge les broadcasts depuis le fichier"""
-        try:
-            with open(self.broadcasts_file, 'r', encoding='utf-8') as f:
-                broadcasts = json.load(f)
-                # Vérifier et corriger la structure de chaque broadcast
-                for broadcast_id, broadcast in broadcasts.items():
-                    if 'message_ids' not in broadcast:
-                        broadcast['message_ids'] = {}
-                    # Assurer que les user_ids sont des strings
-                    if 'message_ids' in broadcast:
-                        broadcast['message_ids'] = {
-                            str(user_id): msg_id 
-                            for user_id, msg_id in broadcast['message_ids'].items()
-                        }
-                return broadcasts
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError:
-            print("Erreur de décodage JSON, création d'un nouveau fichier broadcasts")
-            return {}
-
-    def _save_broadcasts(self):
-        """Sauvegarde les broadcasts"""
-        try:
-            with open(self.broadcasts_file, 'w', encoding='utf-8') as f:
-                json.dump(self.broadcasts, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des broadcasts : {e}")
-
-    def _save_access_codes(self):
-        """Sauvegarde les codes d'accès"""
-        try:
-            with open(self.access_codes_file, 'w', encoding='utf-8') as f:
-                json.dump(self._access_codes, f, indent=4)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des codes d'accès : {e}")
-
-    def authorize_user(self, user_id: int) -> bool:
-        """Ajoute un utilisateur à la liste des utilisateurs autorisés"""
-        try:
-            if "authorized_users" not in self._access_codes:
-                self._access_codes["authorized_users"] = []
-        
-            user_id = int(user_id)
-            if user_id not in self._access_codes["authorized_users"]:
-                self._access_codes["authorized_users"].append(user_id)
-                self._save_access_codes()
-                return True
-            return False
-        except Exception as e:
-            print(f"Erreur lors de l'autorisation de l'utilisateur : {e}")
-            return False
-
-    def mark_code_as_used(self, code: str, user_id: int) -> bool:
-        """Marque un code comme utilisé et autorise l'utilisateur"""
-        try:
-            if "codes" not in self._access_codes:
-                return False
-        
-            for code_entry in self._access_codes["codes"]:
-                if code_entry["code"] == code and not code_entry["used"]:
-                    code_entry["used"] = True
-                    code_entry["used_by"] = user_id
-                    self.authorize_user(user_id)
-                    self._save_access_codes()
-                    return True
-            return False
-        except Exception as e:
-            print(f"Erreur lors du marquage du code comme utilisé : {e}")
-            return False
-
-    def generate_temp_code(self, generator_id: int, generator_username: str = None) -> tuple:
-        """Génère un code d'accès temporaire"""
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        expiration = (datetime.utcnow() + timedelta(days=2)).isoformat()  # 48h
-
-        if "codes" not in self._access_codes:
-            self._access_codes["codes"] = []
-
-        # Ajouter le code dans la section "codes"
-        self._access_codes["codes"].append({
-            'code': code,
-            'expiration': expiration,
-            'created_by': generator_id,  # Utiliser le même format que les autres codes
-            'used': False
-        })
-
-        self._save_access_codes()
-        return code, expiration
-
-    def list_temp_codes(self, show_used: bool = False) -> list:
-        """Liste les codes temporaires"""
-        current_time = datetime.utcnow().isoformat()
-        codes = self._access_codes.get("codes", [])
-
-        if show_used:
-            # Retourner uniquement les codes marqués comme utilisés
-            return [code for code in codes if code.get("used") is True]
-        else:
-            # Retourner les codes non utilisés et non expirés
-            return [code for code in codes 
-                    if not code.get("used") and code.get("expiration", "") > current_time]
-
-    def cleanup_expired_codes(self):
-        """Supprime complètement les codes expirés"""
-        current_time = datetime.utcnow().isoformat()
-    
-        if "codes" not in self._access_codes:
-            return
-    
-        # Garder uniquement les codes non expirés
-        self._access_codes["codes"] = [
-            code for code in self._access_codes["codes"]
-            if code["expiration"] > current_time
-        ]
-    
-        # Sauvegarder les modifications
-        self._save_access_codes()
-
-    def mark_code_as_used(self, code: str, user_id: int, username: str = None) -> bool:
-        """Marque un code comme utilisé et autorise l'utilisateur"""
-        try:
-            if "codes" not in self._access_codes:
-                return False
-        
-            for code_entry in self._access_codes["codes"]:
-                if code_entry["code"] == code and not code_entry["used"]:
-                    code_entry["used"] = True
-                    code_entry["used_by"] = {
-                        "id": user_id,
-                        "username": username
-                    }
-                    # Ajouter l'utilisateur à la liste des autorisés
-                    if "authorized_users" not in self._access_codes:
-                        self._access_codes["authorized_users"] = []
-                    if user_id not in self._access_codes["authorized_users"]:
-                        self._access_codes["authorized_users"].append(user_id)
-                    self._save_access_codes()
-                    return True
-            return False
-        except Exception as e:
-            print(f"Erreur lors du marquage du code comme utilisé : {e}")
-            return False
-
-    async def handle_generate_multiple_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère la génération de plusieurs codes d'accès"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-
-        keyboard = [
-            [InlineKeyboardButton("1️⃣ Un code", callback_data="gen_code_1")],
-            [InlineKeyboardButton("5️⃣ Cinq codes", callback_data="gen_code_5")],
-            [InlineKeyboardButton("🔢 Nombre personnalisé", callback_data="gen_code_custom")],
-            [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
-        ]
-    
-        await update.callback_query.edit_message_text(
-            "🎫 Génération de codes d'accès\n\n"
-            "Choisissez le nombre de codes à générer :",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-        return self.STATES['CHOOSING']
-
-    async def handle_custom_code_number(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère la demande de nombre personnalisé de codes"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-    
-        keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
-    
-        await update.callback_query.edit_message_text(
-            "🔢 Génération personnalisée\n\n"
-            "Envoyez le nombre de codes que vous souhaitez générer (maximum 20) :",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-        return self.STATES['WAITING_CODE_NUMBER']
-
-    async def handle_code_number_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Traite le nombre de codes demandé"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.message.reply_text("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-
-        try:
-            num = int(update.message.text)
-            if num <= 0 or num > 20:
-                raise ValueError()
-            
-            # Supprimer le message de l'utilisateur
-            await update.message.delete()
-        
-            codes_text = "🎫 *Codes générés :*\n\n"
-            for _ in range(num):
-                code, expiration = self.generate_temp_code(
-                    update.effective_user.id,
-                    update.effective_user.username
-                )
-                exp_date = datetime.fromisoformat(expiration)
-                exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
-                codes_text += f"📎 *Code:* `{code}`\n"
-                codes_text += f"⚠️ _Code à usage unique, expire le {exp_str}_\n"
-                codes_text += f"👤 _Généré par:_ @{update.effective_user.username or 'Unknown'}\n\n"
-        
-            keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
-        
-            await update.message.reply_text(
-                codes_text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='Markdown'
-            )
-            return self.STATES['CHOOSING']
-        
-        except ValueError:
-            keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
-            await update.message.reply_text(
-                "❌ Erreur : Veuillez entrer un nombre valide entre 1 et 20.",
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-            return self.STATES['WAITING_CODE_NUMBER']
-
-    async def generate_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE, num_codes: int = 1):
-        """Génère un nombre spécifié de codes"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-
-        codes_text = "🎫 *Codes générés :*\n\n"
-        for _ in range(num_codes):
-            code, expiration = self.generate_temp_code(
-                update.effective_user.id,
-                update.effective_user.username
-            )
-            exp_date = datetime.fromisoformat(expiration)
-            exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
-        
-            # Format amélioré avec titre en gras non copiable et contenu copiable
-            codes_text += "*Code d'accès temporaire :*\n"
-            codes_text += f"`{code}\n"
-            codes_text += "⚠️ Code à usage unique\n"
-            codes_text += f"⏰ Expire le {exp_str}`\n\n"
-    
-        keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
-    
-        await update.callback_query.edit_message_text(
-            codes_text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='Markdown'
-        )
-        return self.STATES['CHOOSING']
-
-    async def back_to_generate_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE):  # Ajout de self
-        """Retourne au menu de génération de codes"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-
-        query = update.callback_query
-        await query.answer()
-    
-        keyboard = [
-            [InlineKeyboardButton("1️⃣ Un code", callback_data="gen_code_1")],
-            [InlineKeyboardButton("5️⃣ Cinq codes", callback_data="gen_code_5")],
-            [InlineKeyboardButton("🔢 Nombre personnalisé (20 maximum)", callback_data="gen_code_custom")],
-            [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
-        ]
-    
-        await query.edit_message_text(
-            "🎫 Génération de codes d'accès\n\n"
-            "Choisissez le nombre de codes à générer :",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-        return self.STATES['CHOOSING']
-
-    async def show_codes_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Affiche l'historique des codes"""
-        try:
-            if str(update.effective_user.id) not in self.admin_ids:
-                await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-                return self.STATES['CHOOSING']
-
-            showing_used = context.user_data.get('showing_used_codes', False)
-            all_codes = self.list_temp_codes(showing_used)
-
-            # Paginer les résultats
-            if len(all_codes) > 10:
-                current_page = context.user_data.get('codes_page', 0)
-                total_pages = (len(all_codes) + 9) // 10
-                start_idx = current_page * 10
-                end_idx = min(start_idx + 10, len(all_codes))
-                codes = all_codes[start_idx:end_idx]
-            else:
-                codes = all_codes
-                current_page = 0
-                total_pages = 1
-
-            if not codes:
-                text = "📜 *Aucun code à afficher*"
-            else:
-                text = "📜 *Codes " + ("utilisés" if showing_used else "actifs") + " :*\n\n"
-                for code in codes:
-                    text += "*Code d'accès temporaire :*\n"
-                    if showing_used and "used_by" in code:
-                        used_by = code["used_by"]
-                        user_id = used_by.get("id", "N/A")
-
-                        # Récupérer les informations de l'utilisateur
-                        user_data = self._users.get(str(user_id), {})
-                        username = user_data.get('username', '')
-                        first_name = user_data.get('first_name', '')
-                        last_name = user_data.get('last_name', '')
-
-                        # Échapper les caractères spéciaux
-                        if username:
-                            username = username.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
-                        if first_name:
-                            first_name = first_name.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
-                        if last_name:
-                            last_name = last_name.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
-
-                        # Construire le nom d'affichage
-                        display_parts = []
-                        if first_name:
-                            display_parts.append(first_name)
-                        if last_name:
-                            display_parts.append(last_name)
-
-                        if username:
-                            display_name = f"@{username}"
-                        elif display_parts:
-                            display_name = " ".join(display_parts)
-                        else:
-                            display_name = str(user_id)
-
-                        text += f"`{code['code']}`\n"
-                        text += f"✅ Utilisé par : {display_name} (`{user_id}`)\n\n"
-                    else:
-                        exp_date = datetime.fromisoformat(code["expiration"])
-                        exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
-                        text += f"`{code['code']}\n"
-                        text += f"⚠️ Code à usage unique\n"
-                        text += f"⏰ Expire le {exp_str}`\n\n"
-
-            active_btn_text = "📍 Codes actifs" if not showing_used else "Codes actifs"
-            used_btn_text = "📍 Codes utilisés" if showing_used else "Codes utilisés"
-
-            keyboard = [
-                [
-                    InlineKeyboardButton(active_btn_text, callback_data="show_active_codes"),
-                    InlineKeyboardButton(used_btn_text, callback_data="show_used_codes")
-                ],
-                [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
-            ]
-
-            # Ajouter les boutons de pagination si nécessaire
-            if len(all_codes) > 10:
-                nav_buttons = []
-                if current_page > 0:
-                    nav_buttons.append(InlineKeyboardButton("◀️", callback_data="prev_codes_page"))
-                nav_buttons.append(InlineKeyboardButton(f"{current_page + 1}/{total_pages}", callback_data="current_page"))
-                if current_page < total_pages - 1:
-                    nav_buttons.append(InlineKeyboardButton("▶️", callback_data="next_codes_page"))
-            
-                if nav_buttons:
-                    keyboard.insert(-2, nav_buttons)
-
-            await update.callback_query.edit_message_text(
-                text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='Markdown'
-            )
-            return self.STATES['CHOOSING']
-    
-        except TelegramBadRequest as e:
-            if str(e) == "Message is not modified":
-                await update.callback_query.answer("Liste déjà à jour!")
-            else:
-                raise
-            return self.STATES['CHOOSING']
-
-    async def toggle_codes_view(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Bascule entre codes actifs et utilisés"""
-        if str(update.effective_user.id) not in self.admin_ids:
-            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
-            return self.STATES['CHOOSING']
-    
-        context.user_data['showing_used_codes'] = update.callback_query.data == "show_used_codes"
-        return await self.show_codes_history(update, context)
-
-    async def handle_codes_pagination(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère la pagination des codes"""
-        query = update.callback_query.data
-        current_page = context.user_data.get('codes_page', 0)
-    
-        codes = self.list_temp_codes(context.user_data.get('showing_used_codes', False))
-        total_pages = (len(codes) + 9) // 10
-
-        if query == "prev_codes_page" and current_page > 0:
-            context.user_data['codes_page'] = current_page - 1
-        elif query == "next_codes_page" and current_page < total_pages - 1:
-            context.user_data['codes_page'] = current_page + 1
-    
-        return await self.show_codes_history(update, context)
-
-    async def ban_user(self, user_id: int) -> bool:
-        """Banni un utilisateur"""
-        try:
-            # Convertir en int si c'est un string
-            user_id = int(user_id)
-        
-            # Retirer l'utilisateur des codes d'accès s'il y est
-            if user_id in self._access_codes.get("authorized_users", []):
-                self._access_codes["authorized_users"].remove(user_id)
-                self._save_access_codes()
-
-            # Ajouter l'utilisateur à la liste des bannis si elle existe, sinon la créer
-            if "banned_users" not in self._access_codes:
-                self._access_codes["banned_users"] = []
-        
-            if user_id not in self._access_codes["banned_users"]:
-                self._access_codes["banned_users"].append(user_id)
-                self._save_access_codes()
-        
-            return True
-        except Exception as e:
-            print(f"Erreur lors du bannissement de l'utilisateur : {e}")
-            return False
-
-    async def unban_user(self, user_id: int) -> bool:
-        """Débanni un utilisateur"""
-        try:
-            user_id = int(user_id)
-            if "banned_users" in self._access_codes and user_id in self._access_codes["banned_users"]:
-                self._access_codes["banned_users"].remove(user_id)
-                self._save_access_codes()
-            return True
-        except Exception as e:
-            print(f"Erreur lors du débannissement de l'utilisateur : {e}")
-            return False
-
-    async def show_banned_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Affiche la liste des utilisateurs bannis"""
-        try:
-            banned_users = self._access_codes.get("banned_users", [])
-        
-            text = "🚫 *Utilisateurs bannis*\n\n"
-        
-            if not banned_users:
-                text += "Aucun utilisateur banni."
-                keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="manage_users")]]
-            else:
-                text += "Sélectionnez un utilisateur pour le débannir :\n\n"
-                keyboard = []
-            
-                for user_id in banned_users:
-                    user_data = self._users.get(str(user_id), {})
-                    username = user_data.get('username')
-                    first_name = user_data.get('first_name')
-                    last_name = user_data.get('last_name')
-                
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name and last_name:
-                        display_name = f"{first_name} {last_name}"
-                    elif first_name:
-                        display_name = first_name
-                    elif last_name:
-                        display_name = last_name
-                    else:
-                        display_name = f"Utilisateur {user_id}"
-                
-                    text += f"• {display_name} (`{user_id}`)\n"
-                    keyboard.append([InlineKeyboardButton(
-                        f"🔓 Débannir {display_name}",
-                        callback_data=f"unban_{user_id}"
-                    )])
-            
-                keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="manage_users")])
-        
-            await update.callback_query.edit_message_text(
-                text=text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='Markdown'
-            )
-        
-            return "CHOOSING"
-        
-        except Exception as e:
-            print(f"Erreur dans show_banned_users : {e}")
-            return "CHOOSING"
-
-    async def handle_ban_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère la commande /ban"""
-        try:
-            # Supprimer la commande /ban
-            try:
-                await update.message.delete()
-            except Exception as e:
-                print(f"Erreur lors de la suppression de la commande ban: {e}")
-
-            # Vérifier si l'utilisateur est admin
-            if not self.is_user_authorized(update.effective_user.id):
-                return
-
-            # Vérifier les arguments
-            if not context.args:
-                message = await update.message.reply_text(
-                    "❌ Usage : /ban <user_id> ou /ban @username"
-                )
-                # Supprimer le message après 3 secondes
-                async def delete_message():
-                    await asyncio.sleep(3)
-                    try:
-                        await message.delete()
-                    except Exception as e:
-                        print(f"Error deleting message: {e}")
-                asyncio.create_task(delete_message())
-                return
-
-            target = context.args[0]
-        
-            # Si c'est un username
-            if target.startswith('@'):
-                username = target[1:]
-                user_found = False
-                for user_id, user_data in self._users.items():
-                    if user_data.get('username') == username:
-                        target = user_id
-                        user_found = True
-                        break
-                if not user_found:
-                    message = await update.message.reply_text("❌ Utilisateur non trouvé.")
-                    # Supprimer le message après 3 secondes
-                    async def delete_message():
-                        await asyncio.sleep(3)
-                        try:
-                            await message.delete()
-                        except Exception as e:
-                            print(f"Error deleting message: {e}")
-                    asyncio.create_task(delete_message())
-                    return
-
-            # Bannir l'utilisateur
-            if await self.ban_user(target):
-                message = await update.message.reply_text(f"✅ Utilisateur {target} banni avec succès.")
-            else:
-                message = await update.message.reply_text("❌ Erreur lors du bannissement.")
-
-            # Supprimer le message de confirmation après 3 secondes
-            async def delete_message():
-                await asyncio.sleep(3)
-                try:
-                    await message.delete()
-                except Exception as e:
-                    print(f"Error deleting message: {e}")
-        
-            asyncio.create_task(delete_message())
-
-        except Exception as e:
-            print(f"Erreur dans handle_ban_command : {e}")
-            message = await update.message.reply_text("❌ Une erreur est survenue.")
-        
-            # Supprimer le message d'erreur après 3 secondes
-            async def delete_message():
-                await asyncio.sleep(3)
-                try:
-                    await message.delete()
-                except Exception as e:
-                    print(f"Error deleting message: {e}")
-        
-            asyncio.create_task(delete_message())
-
-    async def handle_unban_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère le débannissement depuis le callback"""
-        try:
-            query = update.callback_query
-            user_id = int(query.data.replace("unban_", ""))
-        
-            if await self.unban_user(user_id):
-                # Message temporaire
-                confirmation = await query.edit_message_text(
-                    f"✅ Utilisateur {user_id} débanni avec succès.",
-                    parse_mode='Markdown'
-                )
-            
-                # Attendre 2 secondes
-                await asyncio.sleep(2)
-            
-                # Retourner à la liste des bannis
-                await self.show_banned_users(update, context)
-            else:
-                await query.answer("❌ Erreur lors du débannissement.")
-            
-        except Exception as e:
-            print(f"Erreur dans handle_unban_callback : {e}")
-            await query.answer("❌ Une erreur est survenue.")
-
-    async def register_user(self, user):
-        """Enregistre ou met à jour un utilisateur"""
-        user_id = str(user.id)
-        paris_tz = pytz.timezone('Europe/Paris')
-        paris_time = datetime.utcnow().replace(tzinfo=pytz.UTC).astimezone(paris_tz)
-        
-        self._users[user_id] = {
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'last_seen': paris_time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        self._save_users()
-
-    async def handle_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Démarre le processus de diffusion"""
-        try:
-            context.user_data.clear()
-            context.user_data['broadcast_chat_id'] = update.effective_chat.id
-            
-            keyboard = [
-                [InlineKeyboardButton("❌ Annuler", callback_data="admin")]
-            ]
-            
-            message = await update.callback_query.edit_message_text(
-                "📢 *Nouveau message de diffusion*\n\n"
-                "Envoyez le message que vous souhaitez diffuser aux utilisateurs autorisés.\n"
-                "Vous pouvez envoyer du texte, des photos ou des vidéos.",
-                parse_mode='Markdown',
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-            
-            context.user_data['instruction_message_id'] = message.message_id
-            return "WAITING_BROADCAST_MESSAGE"
-        except Exception as e:
-            print(f"Erreur dans handle_broadcast : {e}")
-            return "CHOOSING"
-
-    async def manage_broadcasts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère les annonces existantes"""
-        keyboard = []
-        if self.broadcasts:
-            for broadcast_id, broadcast in self.broadcasts.items():
-                keyboard.append([InlineKeyboardButton(
-                    f"📢 {broadcast['content'][:30]}...",
-                    callback_data=f"edit_broadcast_{broadcast_id}"
-                )])
-        
-        keyboard.append([InlineKeyboardButton("➕ Nouvelle annonce", callback_data="start_broadcast")])
-        keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="admin")])
-        
-        await update.callback_query.edit_message_text(
-            "📢 *Gestion des annonces*\n\n"
-            "Sélectionnez une annonce à modifier ou créez-en une nouvelle.",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-        
-        return "CHOOSING"
-
-    async def edit_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Permet de modifier une annonce existante"""
-        query = update.callback_query
-        broadcast_id = query.data.replace("edit_broadcast_", "")
-    
-        if broadcast_id in self.broadcasts:
-            broadcast = self.broadcasts[broadcast_id]
-            keyboard = [
-                [InlineKeyboardButton("✏️ Modifier l'annonce", callback_data=f"edit_broadcast_content_{broadcast_id}")],
-                [InlineKeyboardButton("❌ Supprimer", callback_data=f"delete_broadcast_{broadcast_id}")],
-                [InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")]
-            ]
-        
-            await query.edit_message_text(
-                f"📢 *Gestion de l'annonce*\n\n"
-                f"Message actuel :\n{broadcast['content'][:200]}...",
-                parse_mode='Markdown',
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-        else:
-            await query.edit_message_text(
-                "❌ Cette annonce n'existe plus.",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")
-                ]])
-            )
-    
-        return "CHOOSING"
-
-    async def edit_broadcast_content(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Démarre l'édition d'une annonce"""
-        query = update.callback_query
-        broadcast_id = query.data.replace("edit_broadcast_content_", "")
-
-        context.user_data['editing_broadcast_id'] = broadcast_id
-
-        # Envoyer le message d'instruction et stocker son ID
-        message = await query.edit_message_text(
-            "✏️ *Modification de l'annonce*\n\n"
-            "Envoyez un nouveau message (texte et/ou média) pour remplacer cette annonce.",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔙 Annuler", callback_data=f"edit_broadcast_{broadcast_id}")
-            ]])
-        )
-    
-        # Stocker l'ID du message d'instruction
-        context.user_data['instruction_message_id'] = message.message_id
-
-        return "WAITING_BROADCAST_EDIT"
-
-    async def handle_broadcast_edit(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Traite la modification d'une annonce"""
-        try:
-            broadcast_id = context.user_data.get('editing_broadcast_id')
-            if not broadcast_id or broadcast_id not in self.broadcasts:
-                return "CHOOSING"
-
-            # Supprimer les messages intermédiaires
-            try:
-                await update.message.delete()
-                if 'instruction_message_id' in context.user_data:
-                    await context.bot.delete_message(
-                        chat_id=update.effective_chat.id,
-                        message_id=context.user_data['instruction_message_id']
-                    )
-            except Exception as e:
-                print(f"Error deleting messages: {e}")
-
-            admin_id = update.effective_user.id
-            new_content = update.message.text if update.message.text else update.message.caption if update.message.caption else "Media sans texte"
-        
-            # Convertir les nouvelles entités
-            new_entities = None
-            if update.message.entities:
-                new_entities = [{'type': entity.type, 
-                               'offset': entity.offset,
-                               'length': entity.length} 
-                              for entity in update.message.entities]
-            elif update.message.caption_entities:
-                new_entities = [{'type': entity.type, 
-                               'offset': entity.offset,
-                               'length': entity.length} 
-                              for entity in update.message.caption_entities]
-
-            broadcast = self.broadcasts[broadcast_id]
-            broadcast['content'] = new_content
-            broadcast['entities'] = new_entities
-
-            success = 0
-            failed = 0
-            messages_updated = []
-        
-            # Tenter de modifier les messages existants
-            for user_id, msg_id in broadcast['message_ids'].items():
-                if int(user_id) == admin_id:  # Skip l'admin
-                    continue
-                try:
-                    await context.bot.edit_message_text(
-                        chat_id=user_id,
-                        message_id=msg_id,
-                        text=new_content,
-                        entities=update.message.entities,
-                        reply_markup=self._create_message_keyboard()
-                    )
-                    success += 1
-                    messages_updated.append(user_id)
-                except Exception as e:
-                    print(f"Error updating message for user {user_id}: {e}")
-                    failed += 1
-
-            # Pour les utilisateurs qui n'ont pas reçu le message
-            for user_id in self._users.keys():
-                if (str(user_id) not in messages_updated and 
-                    self.is_user_authorized(int(user_id)) and 
-                    int(user_id) != admin_id):  # Skip l'admin
-                    try:
-                        sent_msg = await context.bot.send_message(
-                            chat_id=user_id,
-                            text=new_content,
-                            entities=update.message.entities,
-                            reply_markup=self._create_message_keyboard()
-                        )
-                        broadcast['message_ids'][str(user_id)] = sent_msg.message_id
-                        success += 1
-                    except Exception as e:
-                        print(f"Error sending new message to user {user_id}: {e}")
-                        failed += 1
-
-            self._save_broadcasts()
-
-            # Créer la bannière de gestion des annonces
-            keyboard = []
-            if self.broadcasts:
-                for b_id, broadcast in self.broadcasts.items():
-                    keyboard.append([InlineKeyboardButton(
-                        f"📢 {broadcast['content'][:30]}...",
-                        callback_data=f"edit_broadcast_{b_id}"
-                    )])
-        
-            keyboard.append([InlineKeyboardButton("➕ Nouvelle annonce", callback_data="start_broadcast")])
-            keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="admin")])
-        
-            # Envoyer la nouvelle bannière avec le contenu de l'annonce
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text="📢 *Gestion des annonces*\n\n"
-                     "Sélectionnez une annonce à modifier ou créez-en une nouvelle.",
-                parse_mode='Markdown',
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-
-            # Message de confirmation avec le contenu
-            confirmation_message = await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=f"✅ Message modifié ({success} succès, {failed} échecs)\n\n"
-                     f"📝 *Contenu de l'annonce :*\n{new_content}",
-                parse_mode='Markdown'
-            )
-
-            # Programmer la suppression du message après 3 secondes
-            async def delete_message():
-                await asyncio.sleep(3)
-                try:
-                    await confirmation_message.delete()
-                except Exception as e:
-                    print(f"Error deleting confirmation message: {e}")
-
-            asyncio.create_task(delete_message())
-
-            return "CHOOSING"
-
-        except Exception as e:
-            print(f"Error in handle_broadcast_edit: {e}")
-            return "CHOOSING"
-
-    async def resend_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Renvoie une annonce existante"""
-        query = update.callback_query
-        broadcast_id = query.data.replace("resend_broadcast_", "")
-
-        if broadcast_id not in self.broadcasts:
-            await query.edit_message_text(
-                "❌ Cette annonce n'existe plus.",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")
-                ]])
-            )
-            return "CHOOSING"
-
-        broadcast = self.broadcasts[broadcast_id]
-        success = 0
-        failed = 0
-
-        progress_message = await query.edit_message_text(
-            "📤 *Renvoi de l'annonce en cours...*",
-            parse_mode='Markdown'
-        )
-
-        for user_id in self._users.keys():
-            user_id_int = int(user_id)
-            if not self.is_user_authorized(user_id_int):
-                print(f"User {user_id_int} not authorized")
-                continue
-        
-            try:
-                if broadcast['type'] == 'photo' and broadcast['file_id']:
-                    await context.bot.send_photo(
-                        chat_id=user_id,
-                        photo=broadcast['file_id'],
-                        caption=broadcast['caption'] if broadcast['caption'] else '',
-                        parse_mode='Markdown',  # Ajout du parse_mode
-                        reply_markup=self._create_message_keyboard()
-                    )
-                else:
-                    message_text = broadcast.get('content', '')
-                    if not message_text:
-                        print(f"No content found for broadcast {broadcast_id}")
-                        continue
-        
-                    await context.bot.send_message(
-                        chat_id=user_id,
-                        text=message_text,
-                        parse_mode='Markdown',  # Ajout du parse_mode
-                        reply_markup=self._create_message_keyboard()
-                    )
-                success += 1
-                print(f"Successfully sent to user {user_id}")
-            except Exception as e:
-                print(f"Error sending to user {user_id}: {e}")
-                failed += 1
-
-        keyboard = [
-            [InlineKeyboardButton("📢 Retour aux annonces", callback_data="manage_broadcasts")],
-            [InlineKeyboardButton("🔙 Menu admin", callback_data="admin")]
-        ]
-
-        await progress_message.edit_text(
-            f"✅ *Annonce renvoyée !*\n\n"
-            f"📊 *Rapport d'envoi :*\n"
-            f"• Envois réussis : {success}\n"
-            f"• Échecs : {failed}\n"
-            f"• Total : {success + failed}",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-
-        return "CHOOSING"
-
-    async def delete_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Supprime une annonce"""
-        query = update.callback_query
-        broadcast_id = query.data.replace("delete_broadcast_", "")
-        
-        if broadcast_id in self.broadcasts:
-            del self.broadcasts[broadcast_id]
-            self._save_broadcasts()  # Sauvegarder après suppression
-        await query.edit_message_text(
-            "✅ *L'annonce a été supprimée avec succès !*",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔙 Retour aux annonces", callback_data="manage_broadcasts")
-            ]])
-        )
-        
-        return "CHOOSING"
-
-    async def send_broadcast_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Envoie le message aux utilisateurs autorisés"""
-        success = 0
-        failed = 0
-        chat_id = update.effective_chat.id
-        message_ids = {}  # Pour stocker les IDs des messages envoyés
-
-        try:
-            # Supprimer les messages précédents
-            try:
-                await update.message.delete()
-                if 'instruction_message_id' in context.user_data:
-                    await context.bot.delete_message(
-                        chat_id=chat_id,
-                        message_id=context.user_data['instruction_message_id']
-                    )
-            except Exception as e:
-                print(f"Erreur lors de la suppression du message: {e}")
-
-            # Enregistrer le broadcast
-            broadcast_id = str(datetime.now().timestamp())
-            message_content = update.message.text if update.message.text else update.message.caption if update.message.caption else "Media sans texte"
-        
-            # Convertir les entités en format sérialisable
-            entities = None
-            if update.message.entities:
-                entities = [{'type': entity.type, 
-                            'offset': entity.offset,
-                            'length': entity.length} 
-                           for entity in update.message.entities]
-            elif update.message.caption_entities:
-                entities = [{'type': entity.type, 
-                            'offset': entity.offset,
-                            'length': entity.length} 
-                           for entity in update.message.caption_entities]
-    
-            self.broadcasts[broadcast_id] = {
-                'content': message_content,
-                'type': 'photo' if update.message.photo else 'text',
-                'file_id': update.message.photo[-1].file_id if update.message.photo else None,
-                'caption': update.message.caption if update.message.photo else None,
-                'entities': entities,  # Stocker les entités converties
-                'message_ids': {},
-                'parse_mode': None  # On n'utilise plus parse_mode car on utilise les entités
-            }
-
-            # Message de progression
-            progress_message = await context.bot.send_message(
-                chat_id=chat_id,
-                text="📤 <b>Envoi du message en cours...</b>",
-                parse_mode='HTML'
-            )
-
-            # Envoi aux utilisateurs autorisés
-            for user_id in self._users.keys():
-                user_id_int = int(user_id)
-                if not self.is_user_authorized(user_id_int) or user_id_int == update.effective_user.id:  # Skip non-autorisés et admin
-                    print(f"User {user_id_int} skipped")
-                    continue
-            
-                try:
-                    if update.message.photo:
-                        sent_msg = await context.bot.send_photo(
-                            chat_id=user_id,
-                            photo=update.message.photo[-1].file_id,
-                            caption=update.message.caption if update.message.caption else '',
-                            caption_entities=update.message.caption_entities,
-                            reply_markup=self._create_message_keyboard()
-                        )
-                    else:
-                        sent_msg = await context.bot.send_message(
-                            chat_id=user_id,
-                            text=message_content,
-                            entities=update.message.entities,
-                            reply_markup=self._create_message_keyboard()
-                        )
-                    self.broadcasts[broadcast_id]['message_ids'][str(user_id)] = sent_msg.message_id  # Assurer que user_id est un string
-                    success += 1
-                except Exception as e:
-                    print(f"Error sending to user {user_id}: {e}")
-                    failed += 1
-
-            # Sauvegarder les broadcasts
-            self._save_broadcasts()
-
-            # Rapport final
-            keyboard = [
-                [InlineKeyboardButton("📢 Gérer les annonces", callback_data="manage_broadcasts")],
-                [InlineKeyboardButton("🔙 Menu admin", callback_data="admin")]
-            ]
-
-            await progress_message.edit_text(
-                f"✅ *Message envoyé avec succès !*\n\n"
-                f"📊 *Rapport d'envoi :*\n"
-                f"• Envois réussis : {success}\n"
-                f"• Échecs : {failed}\n"
-                f"• Total : {success + failed}",
-                parse_mode='Markdown',
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-
-            return "CHOOSING"
-
-        except Exception as e:
-            print(f"Erreur lors de l'envoi du broadcast : {e}")
-            return "CHOOSING"
-
-    async def handle_user_management(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Gère l'affichage des statistiques utilisateurs"""
-        try:
-            # Récupérer la page actuelle depuis le callback_data ou initialiser à 0
-            query = update.callback_query
-            current_page = 0
-            if query and query.data.startswith("user_page_"):
-                current_page = int(query.data.replace("user_page_", ""))
-
-            # Nombre d'utilisateurs par page
-            users_per_page = 10
-        
-            # Récupérer les listes d'utilisateurs autorisés et bannis
-            authorized_users = set(self._access_codes.get("authorized_users", []))
-            banned_users = set(self._access_codes.get("banned_users", []))
-        
-            # Créer des listes séparées pour chaque catégorie
-            authorized_list = []
-            banned_list = []
-            pending_list = []
-
-            for user_id, user_data in self._users.items():
-                user_id_int = int(user_id)
-                if user_id_int in authorized_users:
-                    authorized_list.append((user_id, user_data))
-                elif user_id_int in banned_users:
-                    banned_list.append((user_id, user_data))
-                else:
-                    pending_list.append((user_id, user_data))
-
-            # Combiner les listes dans l'ordre : autorisés, en attente, bannis
-            relevant_users = authorized_list + pending_list + banned_list
-
-            total_pages = (len(relevant_users) + users_per_page - 1) // users_per_page
-
-            # Calculer les indices de début et de fin pour la page actuelle
-            start_idx = current_page * users_per_page
-            end_idx = min(start_idx + users_per_page, len(relevant_users))
-
-            # Construire le texte
-            text = "👥 *Gestion des utilisateurs*\n\n"
-            text += f"✅ Utilisateurs autorisés : {len(authorized_users)}\n"
-            text += f"⏳ Utilisateurs en attente : {len(pending_list)}\n"
-            text += f"🚫 Utilisateurs bannis : {len(banned_users)}\n"
-            if total_pages > 1:
-                text += f"Page {current_page + 1}/{total_pages}\n"
-            text += "\n"
-
-            if relevant_users:
-                for user_id, user_data in relevant_users[start_idx:end_idx]:
-                    user_id_int = int(user_id)
-                    # Format de la date
-                    last_seen = user_data.get('last_seen', 'Jamais')
-                    try:
-                        dt = datetime.strptime(last_seen, "%Y-%m-%d %H:%M:%S")
-                        last_seen = dt.strftime("%d/%m/%Y %H:%M")
-                    except:
-                        pass
-
-                    # Construire le nom d'affichage
-                    username = user_data.get('username')
-                    first_name = user_data.get('first_name')
-                    last_name = user_data.get('last_name')
-                
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name and last_name:
-                        display_name = f"{first_name} {last_name}"
-                    elif first_name:
-                        display_name = first_name
-                    elif last_name:
-                        display_name = last_name
-                    else:
-                        display_name = "Sans nom"
-
-                    # Échapper les caractères spéciaux Markdown
-                    display_name = display_name.replace('_', '\\_').replace('*', '\\*')
-                
-                    # Déterminer le statut
-                    if user_id_int in banned_users:
-                        status = "🚫"
-                    elif user_id_int in authorized_users:
-                        status = "✅"
-                    else:
-                        status = "⏳"
-                
-                    text += f"{status} {display_name} (`{user_id}`)\n"
-                    text += f"  └ Dernière activité : {last_seen}\n"
-            else:
-                text += "Aucun utilisateur enregistré."
-
-            # Construire le clavier avec la pagination
-            keyboard = []
-        
-            # Boutons de pagination
-            if total_pages > 1:
-                nav_buttons = []
-            
-                # Bouton page précédente
-                if current_page > 0:
-                    nav_buttons.append(InlineKeyboardButton(
-                        "◀️", callback_data=f"user_page_{current_page - 1}"))
-            
-                # Bouton page actuelle
-                nav_buttons.append(InlineKeyboardButton(
-                    f"{current_page + 1}/{total_pages}", callback_data="current_page"))
-            
-                # Bouton page suivante
-                if current_page < total_pages - 1:
-                    nav_buttons.append(InlineKeyboardButton(
-                        "▶️", callback_data=f"user_page_{current_page + 1}"))
-            
-                keyboard.append(nav_buttons)
-
-            # Autres boutons
-            keyboard.extend([
-                [InlineKeyboardButton("🚫 Utilisateurs bannis", callback_data="show_banned")],
-                [InlineKeyboardButton("🔙 Retour", callback_data="admin")]
-            ])
-
-            await update.callback_query.edit_message_text(
-                text=text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='Markdown'
-            )
-
-            return "CHOOSING"
-
-        except Exception as e:
-            print(f"Erreur dans handle_user_management : {e}")
-            await update.callback_query.edit_message_text(
-                "Erreur lors de l'affichage des utilisateurs.",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🔙 Retour", callback_data="admin")
-                ]])
-            )
-            return "CHOOSING"
-
-    async def add_user_buttons(self, keyboard: list) -> list:
-        """Ajoute les boutons de gestion utilisateurs au clavier admin existant"""
-        try:
-            keyboard.insert(-1, [InlineKeyboardButton("👥 Gérer utilisateurs", callback_data="manage_users")])
-        except Exception as e:
-            print(f"Erreur lors de l'ajout des boutons admin : {e}")
+﻿import json
+import pytz  
+import asyncio
+import html
+import string
+import random
+from datetime import datetime, timedelta 
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity
+from telegram.ext import ContextTypes
+from telegram.error import BadRequest as TelegramBadRequest
+from modules.access_state import AccessState
+from modules.broadcast import BroadcastEngine
+from modules.broadcast_jobs import BroadcastJobQueue
+from modules.broadcast_schedule import BroadcastScheduler
+from modules.deliveries import DeliveryStore
+from modules.delivery_health import DeliveryHealth
+from modules.persistence import WriteBehindStore
+from modules.segments import SegmentIndex
+from modules.storage import JsonStorage
+
+# Répétitions possibles d'une annonce programmée (mot-clé -> intervalle en secondes)
+SCHEDULE_REPEATS = {'quotidien': 86400, 'hebdo': 7 * 86400}
+
+
+class AdminFeatures:
+    STATES = {
+        'CHOOSING': 'CHOOSING',
+        'WAITING_CODE_NUMBER': 'WAITING_CODE_NUMBER'
+    }
+
+    def __init__(self, users_file: str = 'data/users.json', access_codes_file: str = 'data/access_codes.json', broadcasts_file: str = 'data/broadcasts.json', config_file: str = 'config/config.json', storage=None,
+                 users_flush_interval: float = 5.0, last_seen_granularity: int = 300,
+                 broadcast_rate: float = 25.0, broadcast_concurrency: int = 20,
+                 broadcast_checkpoint_interval: float = 2.0, broadcast_progress_interval: float = 5.0,
+                 delivery_retention_days: float = 30.0, category_names=None):  # Ajout du paramètre config_file
+        self.users_file = users_file
+        self.access_codes_file = access_codes_file
+        self.broadcasts_file = broadcasts_file
+        self.config_file = config_file  
+        # Moteur de stockage (fichiers JSON par défaut)
+        self.storage = storage or JsonStorage(
+            users_file=users_file,
+            access_codes_file=access_codes_file,
+            broadcasts_file=broadcasts_file
+        )
+        self._users = self._load_users()
+        # Utilisateurs modifiés en attente d'écriture, vidés par lots par users_writer
+        self._dirty_users = set()
+        self.last_seen_granularity = last_seen_granularity
+        self.users_writer = WriteBehindStore('users', self._flush_users, users_flush_interval)
+        self.access = AccessState(self.storage)
+        # Segments des annonces ciblées ; category_names() -> {identifiant: nom} des catégories
+        self.category_names = category_names or (lambda: {})
+        self.segments = SegmentIndex(
+            self.storage,
+            lambda: self._access_codes.get("groups", {}),
+            lambda: self.access.version,
+            flush_interval=users_flush_interval
+        )
+        self.segments.load_last_seen(self._users)
+        self.broadcasts = self._load_broadcasts()
+        # Messages envoyés par annonce, chargés seulement pour modifier, renvoyer ou retirer
+        self.deliveries = DeliveryStore(self.storage, retention_days=delivery_retention_days)
+        pruned = self.deliveries.prune(self.broadcasts)
+        if pruned:
+            self._save_broadcasts(pruned)
+        if self.segments.needs_reached:
+            self._import_reached()
+        # Utilisateurs injoignables (bot bloqué, compte supprimé), exclus des envois groupés
+        self.delivery_health = DeliveryHealth(self.storage, flush_interval=users_flush_interval)
+        # Envois groupés : parallèles, limités au débit autorisé par Telegram
+        self.broadcaster = BroadcastEngine(rate=broadcast_rate, concurrency=broadcast_concurrency)
+        self._broadcast_keyboard = self._create_message_keyboard()
+        # Dernier texte de suivi affiché par diffusion (évite les modifications identiques)
+        self._progress_texts = {}
+        # Diffusions persistantes, exécutées en tâche de fond et reprises au redémarrage
+        self.broadcast_jobs = BroadcastJobQueue(
+            self.broadcaster,
+            self._deliver_broadcast,
+            self.storage,
+            checkpoint_interval=broadcast_checkpoint_interval,
+            on_checkpoint=self.deliveries.flush,
+            on_finish=self._report_broadcast,
+            on_progress=self._report_broadcast_progress,
+            progress_interval=broadcast_progress_interval,
+            on_delivery=self._record_delivery
+        )
+        # Annonces programmées, déclenchées à leur heure et conservées au redémarrage
+        self.broadcast_schedule = BroadcastScheduler(self._fire_scheduled_broadcast, self.storage)
+        self.admin_ids = self._load_admin_ids()
+        self.cleanup_expired_codes() 
+
+    async def track_reachability(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler appelé pour chaque update : l'utilisateur qui écrit au bot est de nouveau joignable"""
+        user = update.effective_user
+        if user is not None:
+            self.delivery_health.seen(user.id)
+
+    def _load_admin_ids(self) -> list:
+        """Charge les IDs admin depuis le fichier de configuration"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                return config.get('admin_ids', [])
+        except Exception as e:
+            print(f"Erreur lors du chargement des admin IDs : {e}")
+            return []
+
+    @property
+    def _access_codes(self) -> dict:
+        """Contenu des codes d'accès, tenu à jour par self.access"""
+        return self.access.data
+
+    def is_user_authorized(self, user_id: int) -> bool:
+        """Vérifie si l'utilisateur est autorisé"""
+        # Ne recharge que si le fichier a été modifié depuis la dernière lecture
+        self.access.refresh()
+        return self.access.is_authorized(user_id)
+
+    def is_user_banned(self, user_id: int) -> bool:
+        """Vérifie si l'utilisateur est banni"""
+        self.access.refresh()
+        return self.access.is_banned(user_id)
+
+    def reload_access_codes(self):
+        """Recharge les codes d'accès depuis le fichier"""
+        self.access.reload()
+        return self._access_codes.get("authorized_users", [])
+
+    def _load_users(self):
+        """Charge les utilisateurs depuis le stockage"""
+        try:
+            return self.storage.load_users()
+        except Exception as e:
+            print(f"Erreur lors du chargement des utilisateurs : {e}")
+            return {}
+
+    def _save_users(self, user_ids=None):
+        """Sauvegarde les utilisateurs (uniquement user_ids si précisé)"""
+        try:
+            self.storage.save_users(self._users, user_ids)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde des utilisateurs : {e}")
+
+    def _flush_users(self):
+        """Écrit les utilisateurs modifiés depuis la dernière écriture (appelé par users_writer)"""
+        user_ids, self._dirty_users = self._dirty_users, set()
+        try:
+            self.storage.save_users(self._users, list(user_ids))
+        except Exception:
+            self._dirty_users |= user_ids
+            raise
+
+    def _create_message_keyboard(self):
+        """Crée le clavier standard pour les messages"""
+        return InlineKeyboardMarkup([[
+            InlineKeyboardButton("🔄 Menu Principal", callback_data="start_cmd")
+        ]])
+
+    def _load_broadcasts(self):
+        """Charge les broadcasts depuis le stockage"""
+        try:
+            return self.storage.load_broadcasts()
+        except Exception as e:
+            print(f"Erreur lors du chargement des broadcasts : {e}")
+            return {}
+
+    def _save_broadcasts(self, broadcast_ids=None):
+        """Sauvegarde les broadcasts (uniquement broadcast_ids si précisé)"""
+        try:
+            self.storage.save_broadcasts(self.broadcasts, broadcast_ids)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde des broadcasts : {e}")
+
+    async def _send_payload(self, bot, chat_id, payload: dict):
+        """Envoie le contenu d'une diffusion (texte ou photo) à un utilisateur"""
+        entities = MessageEntity.de_list(payload['entities'], bot) if payload.get('entities') else None
+        kwargs = {'chat_id': chat_id, 'reply_markup': self._broadcast_keyboard}
+        if payload.get('parse_mode'):
+            kwargs['parse_mode'] = payload['parse_mode']
+        if payload.get('photo'):
+            return await bot.send_photo(
+                photo=payload['photo'],
+                caption=payload.get('caption') or '',
+                caption_entities=entities,
+                **kwargs
+            )
+        return await bot.send_message(text=payload['text'], entities=entities, **kwargs)
+
+    async def _edit_payload(self, bot, chat_id, message_id: int, payload: dict):
+        """Remplace le contenu d'un message déjà envoyé (légende pour une photo)"""
+        entities = MessageEntity.de_list(payload['entities'], bot) if payload.get('entities') else None
+        try:
+            if payload.get('photo'):
+                await bot.edit_message_caption(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    caption=payload.get('caption') or '',
+                    caption_entities=entities,
+                    reply_markup=self._broadcast_keyboard
+                )
+            else:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    text=payload['text'],
+                    entities=entities,
+                    reply_markup=self._broadcast_keyboard
+                )
+        except TelegramBadRequest as e:
+            # Déjà à jour (nouvelle tentative après une erreur sur une autre copie)
+            if "not modified" not in str(e):
+                raise
+
+    async def _edit_everywhere(self, bot, job, chat_id) -> bool:
+        """Modifie toutes les copies reçues par chat_id. Retourne False si aucune n'a pu l'être."""
+        error = None
+        edited = False
+        for index, message_id in enumerate(self.deliveries.get(job['broadcast_id']).messages_for(chat_id)):
+            if index:
+                # Chaque appel supplémentaire compte dans le débit autorisé
+                await self.broadcaster.throttle()
+            try:
+                await self._edit_payload(bot, chat_id, message_id, job['payload'])
+                edited = True
+            except TelegramBadRequest as e:
+                error = e
+        if not edited and error is not None and not self.access.is_authorized(int(chat_id)):
+            raise error
+        return edited
+
+    async def _retract_everywhere(self, bot, job, chat_id):
+        """Supprime toutes les copies reçues par chat_id, par lots de 100 (delete_messages)"""
+        message_ids = self.deliveries.get(job['broadcast_id']).messages_for(chat_id)
+        if len(message_ids) == 1:
+            await bot.delete_message(chat_id=chat_id, message_id=message_ids[0])
+            return
+        for start in range(0, len(message_ids), 100):
+            if start:
+                await self.broadcaster.throttle()
+            await bot.delete_messages(chat_id=chat_id, message_ids=message_ids[start:start + 100])
+
+    async def _deliver_broadcast(self, bot, job, chat_id):
+        """Traite un destinataire d'une diffusion (appelé par broadcast_jobs)"""
+        broadcast = self.broadcasts.get(job['broadcast_id'])
+        if job['kind'] == 'retract':
+            await self._retract_everywhere(bot, job, chat_id)
+            return
+        if job['kind'] == 'edit' and broadcast is not None and chat_id in self.deliveries.get(job['broadcast_id']):
+            if await self._edit_everywhere(bot, job, chat_id):
+                return
+            # Messages introuvables : un nouveau message pour les utilisateurs encore autorisés
+
+        sent_msg = await self._send_payload(bot, chat_id, job['payload'])
+        if broadcast is not None:
+            self.deliveries.record(job['broadcast_id'], chat_id, sent_msg.message_id)
+
+    def _record_delivery(self, kind, chat_id, state, error=None):
+        """Résultat d'un envoi groupé (appelé par broadcast_jobs pour chaque destinataire)"""
+        # Seuls les envois disent si un chat est joignable : une modification ou un
+        # retrait échoue aussi quand le message a déjà été supprimé
+        if kind not in ('send', 'resend'):
+            return
+        self.delivery_health.record(chat_id, state, error)
+        if state == 'sent':
+            self.segments.record_reached(chat_id)
+
+    def _import_reached(self):
+        """Remplit une fois l'index des utilisateurs atteints depuis les annonces existantes"""
+        user_ids = set()
+        for broadcast_id, broadcast in self.broadcasts.items():
+            if broadcast.get('delivered_at') is None:
+                continue
+            user_ids.update(self.deliveries.get(broadcast_id).user_ids())
+            self.deliveries.release(broadcast_id)
+        self.segments.init_reached(user_ids)
+
+    def _segment_label(self, segment: str) -> str:
+        kind, _, value = segment.partition(':')
+        if kind == 'active':
+            return f"actifs ces {value} derniers jours"
+        if kind == 'inactive':
+            return f"inactifs depuis {value} jours"
+        if kind == 'never':
+            return "jamais atteints par une annonce"
+        if kind == 'group':
+            return f"groupe {value}"
+        if kind == 'category':
+            return f"ayant consulté {self.category_names().get(value, 'une catégorie supprimée')}"
+        return "tous les utilisateurs autorisés"
+
+    def _segment_users(self, segment: str):
+        """Utilisateurs d'un segment, tirés des index (sans filtre d'autorisation)"""
+        kind, _, value = segment.partition(':')
+        if kind in ('active', 'inactive'):
+            paris_time = datetime.utcnow().replace(tzinfo=pytz.UTC).astimezone(pytz.timezone('Europe/Paris'))
+            cutoff = (paris_time - timedelta(days=int(value))).strftime("%Y-%m-%d %H:%M:%S")
+            return self.segments.seen_since(cutoff) if kind == 'active' else self.segments.seen_before(cutoff)
+        if kind == 'never':
+            return self.segments.never_reached(self.access.authorized)
+        if kind == 'group':
+            return self.segments.group(value)
+        if kind == 'category':
+            return self.segments.viewers(value)
+        return self.access.authorized
+
+    def _broadcast_recipients(self, segment: str = 'all', admin_id: int = None) -> list:
+        """Destinataires d'une annonce : utilisateurs autorisés et joignables du segment, hors admin"""
+        self.access.refresh()
+        return [user_id for user_id in self._segment_users(segment or 'all')
+                if self.access.is_authorized(user_id) and user_id != admin_id
+                and str(user_id) in self._users  # Seuls les utilisateurs enregistrés
+                and self.delivery_health.is_reachable(user_id)]
+
+    async def _start_broadcast(self, bot, chat_id, broadcast: dict, payload: dict, admin_id: int = None) -> str:
+        """Enregistre une annonce et lance sa diffusion ; chat_id reçoit le suivi. Retourne l'id de la diffusion."""
+        broadcast_id = str(datetime.now().timestamp())
+        # Les messages envoyés sont dans self.deliveries
+        self.broadcasts[broadcast_id] = dict(broadcast, delivered_at=float(broadcast_id))
+        # L'annonce est enregistrée avant l'envoi : la diffusion peut reprendre après un arrêt
+        self._save_broadcasts([broadcast_id])
+
+        # Envoi aux utilisateurs autorisés du segment (hors admin et injoignables)
+        recipients = self._broadcast_recipients(broadcast.get('segment'), admin_id)
+
+        # Message de progression, remplacé par le rapport en fin de diffusion
+        job_id = self.broadcast_jobs.reserve_id()
+        progress_message = await bot.send_message(
+            chat_id=chat_id,
+            text=f"📤 <b>Envoi du message en cours...</b> (diffusion n°{job_id})",
+            parse_mode='HTML',
+            reply_markup=self._broadcast_controls(job_id)
+        )
+        self.broadcast_jobs.submit(
+            'send', broadcast_id, recipients, payload,
+            notify=[chat_id, progress_message.message_id],
+            job_id=job_id
+        )
+        return job_id
+
+    async def _fire_scheduled_broadcast(self, bot, entry):
+        """Lance une annonce programmée (appelé par broadcast_schedule)"""
+        await self._start_broadcast(bot, entry['chat_id'], entry['broadcast'], entry['payload'], entry.get('admin_id'))
+
+    def _broadcast_controls(self, job_id: str, status: str = 'running'):
+        """Boutons pause/reprise et annulation du message de suivi d'une diffusion"""
+        if status == 'paused':
+            toggle = InlineKeyboardButton("▶️ Reprendre", callback_data=f"bcjob_resume_{job_id}")
+        else:
+            toggle = InlineKeyboardButton("⏸ Pause", callback_data=f"bcjob_pause_{job_id}")
+        return InlineKeyboardMarkup([[
+            toggle,
+            InlineKeyboardButton("⏹ Annuler", callback_data=f"bcjob_cancel_{job_id}")
+        ]])
+
+    async def _report_broadcast_progress(self, bot, job, result):
+        """Met à jour le message de suivi de l'admin (appelé à intervalle régulier par broadcast_jobs)"""
+        if not job['notify']:
+            return
+        headers = {
+            'queued': "⏳ *Diffusion n°{} en attente*",
+            'running': "📤 *Diffusion n°{} en cours*",
+            'paused': "⏸ *Diffusion n°{} en pause*"
+        }
+        text = (f"{headers.get(job['status'], headers['running']).format(job['id'])}\n\n"
+                f"{self.broadcast_jobs.progress(job, result)}")
+        if self._progress_texts.get(job['id']) == text:
+            return
+        # La modification consomme un jeton : le suivi reste dans le débit autorisé
+        await self.broadcaster.throttle()
+        chat_id, message_id = job['notify']
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text,
+            parse_mode='Markdown',
+            reply_markup=self._broadcast_controls(job['id'], job['status'])
+        )
+        self._progress_texts[job['id']] = text
+
+    async def _report_broadcast(self, bot, job, result):
+        """Remplace le message de suivi de l'admin par le rapport d'envoi"""
+        self._progress_texts.pop(job['id'], None)
+        if job['kind'] == 'retract':
+            # Les messages retirés ne sont plus à modifier ni à retirer
+            retracted = [chat_id for chat_id, state in job['recipients'].items() if state == 'sent']
+            self.deliveries.forget(job['broadcast_id'], retracted)
+        self.deliveries.release(job['broadcast_id'])
+        if not job['notify']:
+            return
+        chat_id, message_id = job['notify']
+        titles = {
+            'send': "✅ *Message envoyé avec succès !*",
+            'resend': "✅ *Annonce renvoyée !*",
+            'edit': "✅ *Annonce modifiée !*",
+            'retract': "🧹 *Annonce retirée des conversations !*"
+        }
+        title = "⏹ *Diffusion annulée*" if job['status'] == 'cancelled' else titles.get(job['kind'], titles['send'])
+        keyboard = [
+            [InlineKeyboardButton("📢 Gérer les annonces", callback_data="manage_broadcasts")],
+            [InlineKeyboardButton("🔙 Menu admin", callback_data="admin")]
+        ]
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=f"{title}\n\n"
+                 f"📊 *Rapport d'envoi (diffusion n°{job['id']}) :*\n"
+                 f"{self.broadcast_jobs.summary(job, result)}",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+
+    def _save_access_codes(self, user_ids=None, codes=None, groups=None):
+        """Sauvegarde les codes d'accès (uniquement les lignes indiquées si précisé)"""
+        try:
+            self.storage.save_access_codes(self._access_codes, user_ids=user_ids, codes=codes, groups=groups)
+            self.access.mark_written()
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde des codes d'accès : {e}")
+
+    def authorize_user(self, user_id: int) -> bool:
+        """Ajoute un utilisateur à la liste des utilisateurs autorisés"""
+        try:
+            self.access.refresh()
+            user_id = int(user_id)
+            if self.access.authorize(user_id):
+                self._save_access_codes(user_ids=[user_id])
+                return True
+            return False
+        except Exception as e:
+            print(f"Erreur lors de l'autorisation de l'utilisateur : {e}")
+            return False
+
+    def mark_code_as_used(self, code: str, user_id: int) -> bool:
+        """Marque un code comme utilisé et autorise l'utilisateur"""
+        try:
+            if "codes" not in self._access_codes:
+                return False
+        
+            for code_entry in self._access_codes["codes"]:
+                if code_entry["code"] == code and not code_entry["used"]:
+                    code_entry["used"] = True
+                    code_entry["used_by"] = user_id
+                    self.authorize_user(user_id)
+                    self._save_access_codes(codes=[code])
+                    return True
+            return False
+        except Exception as e:
+            print(f"Erreur lors du marquage du code comme utilisé : {e}")
+            return False
+
+    def generate_temp_code(self, generator_id: int, generator_username: str = None) -> tuple:
+        """Génère un code d'accès temporaire"""
+        self.access.refresh()
+        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        expiration = (datetime.utcnow() + timedelta(days=2)).isoformat()  # 48h
+
+        if "codes" not in self._access_codes:
+            self._access_codes["codes"] = []
+
+        # Ajouter le code dans la section "codes"
+        self._access_codes["codes"].append({
+            'code': code,
+            'expiration': expiration,
+            'created_by': generator_id,  # Utiliser le même format que les autres codes
+            'used': False
+        })
+
+        self._save_access_codes(codes=[code])
+        return code, expiration
+
+    def list_temp_codes(self, show_used: bool = False) -> list:
+        """Liste les codes temporaires"""
+        current_time = datetime.utcnow().isoformat()
+        codes = self._access_codes.get("codes", [])
+
+        if show_used:
+            # Retourner uniquement les codes marqués comme utilisés
+            return [code for code in codes if code.get("used") is True]
+        else:
+            # Retourner les codes non utilisés et non expirés
+            return [code for code in codes 
+                    if not code.get("used") and code.get("expiration", "") > current_time]
+
+    def cleanup_expired_codes(self):
+        """Supprime complètement les codes expirés"""
+        current_time = datetime.utcnow().isoformat()
+    
+        if "codes" not in self._access_codes:
+            return
+    
+        # Garder uniquement les codes non expirés
+        expired = [code["code"] for code in self._access_codes["codes"] if code["expiration"] <= current_time]
+        if not expired:
+            return
+        self._access_codes["codes"] = [
+            code for code in self._access_codes["codes"]
+            if code["expiration"] > current_time
+        ]
+    
+        # Sauvegarder les modifications
+        self._save_access_codes(codes=expired)
+
+    def mark_code_as_used(self, code: str, user_id: int, username: str = None) -> bool:
+        """Marque un code comme utilisé et autorise l'utilisateur"""
+        try:
+            self.access.refresh()
+            if "codes" not in self._access_codes:
+                return False
+        
+            for code_entry in self._access_codes["codes"]:
+                if code_entry["code"] == code and not code_entry["used"]:
+                    code_entry["used"] = True
+                    code_entry["used_by"] = {
+                        "id": user_id,
+                        "username": username
+                    }
+                    # Ajouter l'utilisateur à la liste des autorisés
+                    self.access.authorize(int(user_id))
+                    self._save_access_codes(user_ids=[int(user_id)], codes=[code])
+                    return True
+            return False
+        except Exception as e:
+            print(f"Erreur lors du marquage du code comme utilisé : {e}")
+            return False
+
+    async def handle_generate_multiple_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère la génération de plusieurs codes d'accès"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+
+        keyboard = [
+            [InlineKeyboardButton("1️⃣ Un code", callback_data="gen_code_1")],
+            [InlineKeyboardButton("5️⃣ Cinq codes", callback_data="gen_code_5")],
+            [InlineKeyboardButton("🔢 Nombre personnalisé", callback_data="gen_code_custom")],
+            [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
+        ]
+    
+        await update.callback_query.edit_message_text(
+            "🎫 Génération de codes d'accès\n\n"
+            "Choisissez le nombre de codes à générer :",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return self.STATES['CHOOSING']
+
+    async def handle_custom_code_number(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère la demande de nombre personnalisé de codes"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+    
+        keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
+    
+        await update.callback_query.edit_message_text(
+            "🔢 Génération personnalisée\n\n"
+            "Envoyez le nombre de codes que vous souhaitez générer (maximum 20) :",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return self.STATES['WAITING_CODE_NUMBER']
+
+    async def handle_code_number_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Traite le nombre de codes demandé"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.message.reply_text("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+
+        try:
+            num = int(update.message.text)
+            if num <= 0 or num > 20:
+                raise ValueError()
+            
+            # Supprimer le message de l'utilisateur
+            await update.message.delete()
+        
+            codes_text = "🎫 *Codes générés :*\n\n"
+            for _ in range(num):
+                code, expiration = self.generate_temp_code(
+                    update.effective_user.id,
+                    update.effective_user.username
+                )
+                exp_date = datetime.fromisoformat(expiration)
+                exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
+                codes_text += f"📎 *Code:* `{code}`\n"
+                codes_text += f"⚠️ _Code à usage unique, expire le {exp_str}_\n"
+                codes_text += f"👤 _Généré par:_ @{update.effective_user.username or 'Unknown'}\n\n"
+        
+            keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
+        
+            await update.message.reply_text(
+                codes_text,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='Markdown'
+            )
+            return self.STATES['CHOOSING']
+        
+        except ValueError:
+            keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
+            await update.message.reply_text(
+                "❌ Erreur : Veuillez entrer un nombre valide entre 1 et 20.",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return self.STATES['WAITING_CODE_NUMBER']
+
+    async def generate_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE, num_codes: int = 1):
+        """Génère un nombre spécifié de codes"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+
+        codes_text = "🎫 *Codes générés :*\n\n"
+        for _ in range(num_codes):
+            code, expiration = self.generate_temp_code(
+                update.effective_user.id,
+                update.effective_user.username
+            )
+            exp_date = datetime.fromisoformat(expiration)
+            exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
+        
+            # Format amélioré avec titre en gras non copiable et contenu copiable
+            codes_text += "*Code d'accès temporaire :*\n"
+            codes_text += f"`{code}\n"
+            codes_text += "⚠️ Code à usage unique\n"
+            codes_text += f"⏰ Expire le {exp_str}`\n\n"
+    
+        keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="generate_multiple_codes")]]
+    
+        await update.callback_query.edit_message_text(
+            codes_text,
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+        return self.STATES['CHOOSING']
+
+    async def back_to_generate_codes(self, update: Update, context: ContextTypes.DEFAULT_TYPE):  # Ajout de self
+        """Retourne au menu de génération de codes"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+
+        query = update.callback_query
+        await query.answer()
+    
+        keyboard = [
+            [InlineKeyboardButton("1️⃣ Un code", callback_data="gen_code_1")],
+            [InlineKeyboardButton("5️⃣ Cinq codes", callback_data="gen_code_5")],
+            [InlineKeyboardButton("🔢 Nombre personnalisé (20 maximum)", callback_data="gen_code_custom")],
+            [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
+        ]
+    
+        await query.edit_message_text(
+            "🎫 Génération de codes d'accès\n\n"
+            "Choisissez le nombre de codes à générer :",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return self.STATES['CHOOSING']
+
+    async def show_codes_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Affiche l'historique des codes"""
+        try:
+            if str(update.effective_user.id) not in self.admin_ids:
+                await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+                return self.STATES['CHOOSING']
+
+            showing_used = context.user_data.get('showing_used_codes', False)
+            all_codes = self.list_temp_codes(showing_used)
+
+            # Paginer les résultats
+            if len(all_codes) > 10:
+                current_page = context.user_data.get('codes_page', 0)
+                total_pages = (len(all_codes) + 9) // 10
+                start_idx = current_page * 10
+                end_idx = min(start_idx + 10, len(all_codes))
+                codes = all_codes[start_idx:end_idx]
+            else:
+                codes = all_codes
+                current_page = 0
+                total_pages = 1
+
+            if not codes:
+                text = "📜 *Aucun code à afficher*"
+            else:
+                text = "📜 *Codes " + ("utilisés" if showing_used else "actifs") + " :*\n\n"
+                for code in codes:
+                    text += "*Code d'accès temporaire :*\n"
+                    if showing_used and "used_by" in code:
+                        used_by = code["used_by"]
+                        user_id = used_by.get("id", "N/A")
+
+                        # Récupérer les informations de l'utilisateur
+                        user_data = self._users.get(str(user_id), {})
+                        username = user_data.get('username', '')
+                        first_name = user_data.get('first_name', '')
+                        last_name = user_data.get('last_name', '')
+
+                        # Échapper les caractères spéciaux
+                        if username:
+                            username = username.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
+                        if first_name:
+                            first_name = first_name.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
+                        if last_name:
+                            last_name = last_name.replace('_', r'\_').replace('*', r'\*').replace('`', r'\`')
+
+                        # Construire le nom d'affichage
+                        display_parts = []
+                        if first_name:
+                            display_parts.append(first_name)
+                        if last_name:
+                            display_parts.append(last_name)
+
+                        if username:
+                            display_name = f"@{username}"
+                        elif display_parts:
+                            display_name = " ".join(display_parts)
+                        else:
+                            display_name = str(user_id)
+
+                        text += f"`{code['code']}`\n"
+                        text += f"✅ Utilisé par : {display_name} (`{user_id}`)\n\n"
+                    else:
+                        exp_date = datetime.fromisoformat(code["expiration"])
+                        exp_str = exp_date.strftime("%d/%m/%Y à %H:%M")
+                        text += f"`{code['code']}\n"
+                        text += f"⚠️ Code à usage unique\n"
+                        text += f"⏰ Expire le {exp_str}`\n\n"
+
+            active_btn_text = "📍 Codes actifs" if not showing_used else "Codes actifs"
+            used_btn_text = "📍 Codes utilisés" if showing_used else "Codes utilisés"
+
+            keyboard = [
+                [
+                    InlineKeyboardButton(active_btn_text, callback_data="show_active_codes"),
+                    InlineKeyboardButton(used_btn_text, callback_data="show_used_codes")
+                ],
+                [InlineKeyboardButton("🔙 Retour", callback_data="back_to_home")]
+            ]
+
+            # Ajouter les boutons de pagination si nécessaire
+            if len(all_codes) > 10:
+                nav_buttons = []
+                if current_page > 0:
+                    nav_buttons.append(InlineKeyboardButton("◀️", callback_data="prev_codes_page"))
+                nav_buttons.append(InlineKeyboardButton(f"{current_page + 1}/{total_pages}", callback_data="current_page"))
+                if current_page < total_pages - 1:
+                    nav_buttons.append(InlineKeyboardButton("▶️", callback_data="next_codes_page"))
+            
+                if nav_buttons:
+                    keyboard.insert(-2, nav_buttons)
+
+            await update.callback_query.edit_message_text(
+                text,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='Markdown'
+            )
+            return self.STATES['CHOOSING']
+    
+        except TelegramBadRequest as e:
+            if str(e) == "Message is not modified":
+                await update.callback_query.answer("Liste déjà à jour!")
+            else:
+                raise
+            return self.STATES['CHOOSING']
+
+    async def toggle_codes_view(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Bascule entre codes actifs et utilisés"""
+        if str(update.effective_user.id) not in self.admin_ids:
+            await update.callback_query.answer("❌ Vous n'êtes pas autorisé à utiliser cette fonction.")
+            return self.STATES['CHOOSING']
+    
+        context.user_data['showing_used_codes'] = update.callback_query.data == "show_used_codes"
+        return await self.show_codes_history(update, context)
+
+    async def handle_codes_pagination(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère la pagination des codes"""
+        query = update.callback_query.data
+        current_page = context.user_data.get('codes_page', 0)
+    
+        codes = self.list_temp_codes(context.user_data.get('showing_used_codes', False))
+        total_pages = (len(codes) + 9) // 10
+
+        if query == "prev_codes_page" and current_page > 0:
+            context.user_data['codes_page'] = current_page - 1
+        elif query == "next_codes_page" and current_page < total_pages - 1:
+            context.user_data['codes_page'] = current_page + 1
+    
+        return await self.show_codes_history(update, context)
+
+    async def ban_user(self, user_id: int) -> bool:
+        """Banni un utilisateur"""
+        try:
+            # Convertir en int si c'est un string
+            user_id = int(user_id)
+        
+            self.access.refresh()
+
+            # Retirer l'utilisateur des autorisés et l'ajouter aux bannis
+            deauthorized = self.access.deauthorize(user_id)
+            banned = self.access.ban(user_id)
+            if deauthorized or banned:
+                self._save_access_codes(user_ids=[user_id])
+        
+            return True
+        except Exception as e:
+            print(f"Erreur lors du bannissement de l'utilisateur : {e}")
+            return False
+
+    async def unban_user(self, user_id: int) -> bool:
+        """Débanni un utilisateur"""
+        try:
+            user_id = int(user_id)
+            self.access.refresh()
+            if self.access.unban(user_id):
+                self._save_access_codes(user_ids=[user_id])
+            return True
+        except Exception as e:
+            print(f"Erreur lors du débannissement de l'utilisateur : {e}")
+            return False
+
+    async def show_banned_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Affiche la liste des utilisateurs bannis"""
+        try:
+            banned_users = self._access_codes.get("banned_users", [])
+        
+            text = "🚫 *Utilisateurs bannis*\n\n"
+        
+            if not banned_users:
+                text += "Aucun utilisateur banni."
+                keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data="manage_users")]]
+            else:
+                text += "Sélectionnez un utilisateur pour le débannir :\n\n"
+                keyboard = []
+            
+                for user_id in banned_users:
+                    user_data = self._users.get(str(user_id), {})
+                    username = user_data.get('username')
+                    first_name = user_data.get('first_name')
+                    last_name = user_data.get('last_name')
+                
+                    if username:
+                        display_name = f"@{username}"
+                    elif first_name and last_name:
+                        display_name = f"{first_name} {last_name}"
+                    elif first_name:
+                        display_name = first_name
+                    elif last_name:
+                        display_name = last_name
+                    else:
+                        display_name = f"Utilisateur {user_id}"
+                
+                    text += f"• {display_name} (`{user_id}`)\n"
+                    keyboard.append([InlineKeyboardButton(
+                        f"🔓 Débannir {display_name}",
+                        callback_data=f"unban_{user_id}"
+                    )])
+            
+                keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="manage_users")])
+        
+            await update.callback_query.edit_message_text(
+                text=text,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='Markdown'
+            )
+        
+            return "CHOOSING"
+        
+        except Exception as e:
+            print(f"Erreur dans show_banned_users : {e}")
+            return "CHOOSING"
+
+    async def handle_ban_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère la commande /ban"""
+        try:
+            # Supprimer la commande /ban
+            try:
+                await update.message.delete()
+            except Exception as e:
+                print(f"Erreur lors de la suppression de la commande ban: {e}")
+
+            # Vérifier si l'utilisateur est admin
+            if not self.is_user_authorized(update.effective_user.id):
+                return
+
+            # Vérifier les arguments
+            if not context.args:
+                message = await update.message.reply_text(
+                    "❌ Usage : /ban <user_id> ou /ban @username"
+                )
+                # Supprimer le message après 3 secondes
+                async def delete_message():
+                    await asyncio.sleep(3)
+                    try:
+                        await message.delete()
+                    except Exception as e:
+                        print(f"Error deleting message: {e}")
+                asyncio.create_task(delete_message())
+                return
+
+            target = context.args[0]
+        
+            # Si c'est un username
+            if target.startswith('@'):
+                username = target[1:]
+                user_found = False
+                for user_id, user_data in self._users.items():
+                    if user_data.get('username') == username:
+                        target = user_id
+                        user_found = True
+                        break
+                if not user_found:
+                    message = await update.message.reply_text("❌ Utilisateur non trouvé.")
+                    # Supprimer le message après 3 secondes
+                    async def delete_message():
+                        await asyncio.sleep(3)
+                        try:
+                            await message.delete()
+                        except Exception as e:
+                            print(f"Error deleting message: {e}")
+                    asyncio.create_task(delete_message())
+                    return
+
+            # Bannir l'utilisateur
+            if await self.ban_user(target):
+                message = await update.message.reply_text(f"✅ Utilisateur {target} banni avec succès.")
+            else:
+                message = await update.message.reply_text("❌ Erreur lors du bannissement.")
+
+            # Supprimer le message de confirmation après 3 secondes
+            async def delete_message():
+                await asyncio.sleep(3)
+                try:
+                    await message.delete()
+                except Exception as e:
+                    print(f"Error deleting message: {e}")
+        
+            asyncio.create_task(delete_message())
+
+        except Exception as e:
+            print(f"Erreur dans handle_ban_command : {e}")
+            message = await update.message.reply_text("❌ Une erreur est survenue.")
+        
+            # Supprimer le message d'erreur après 3 secondes
+            async def delete_message():
+                await asyncio.sleep(3)
+                try:
+                    await message.delete()
+                except Exception as e:
+                    print(f"Error deleting message: {e}")
+        
+            asyncio.create_task(delete_message())
+
+    async def handle_unban_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère le débannissement depuis le callback"""
+        try:
+            query = update.callback_query
+            user_id = int(query.data.replace("unban_", ""))
+        
+            if await self.unban_user(user_id):
+                # Message temporaire
+                confirmation = await query.edit_message_text(
+                    f"✅ Utilisateur {user_id} débanni avec succès.",
+                    parse_mode='Markdown'
+                )
+            
+                # Attendre 2 secondes
+                await asyncio.sleep(2)
+            
+                # Retourner à la liste des bannis
+                await self.show_banned_users(update, context)
+            else:
+                await query.answer("❌ Erreur lors du débannissement.")
+            
+        except Exception as e:
+            print(f"Erreur dans handle_unban_callback : {e}")
+            await query.answer("❌ Une erreur est survenue.")
+
+    async def register_user(self, user):
+        """Enregistre ou met à jour un utilisateur"""
+        user_id = str(user.id)
+        paris_tz = pytz.timezone('Europe/Paris')
+        paris_time = datetime.utcnow().replace(tzinfo=pytz.UTC).astimezone(paris_tz)
+        last_seen = paris_time.strftime("%Y-%m-%d %H:%M:%S")
+
+        existing = self._users.get(user_id)
+        if existing is None:
+            existing = self._users[user_id] = {}
+            changed = True
+        else:
+            changed = (existing.get('username') != user.username or
+                       existing.get('first_name') != user.first_name or
+                       existing.get('last_name') != user.last_name)
+            if not changed:
+                # last_seen n'est réécrit que s'il a avancé de plus de last_seen_granularity secondes
+                try:
+                    previous = datetime.strptime(existing.get('last_seen', ''), "%Y-%m-%d %H:%M:%S")
+                    changed = (paris_time.replace(tzinfo=None) - previous).total_seconds() >= self.last_seen_granularity
+                except ValueError:
+                    changed = True
+
+        if not changed:
+            return
+
+        existing.update({
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'last_seen': last_seen
+        })
+        self.segments.touch(user_id, last_seen)
+        self._dirty_users.add(user_id)
+        self.users_writer.mark_dirty()
+
+    async def handle_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Démarre le processus de diffusion"""
+        try:
+            context.user_data.clear()
+            context.user_data['broadcast_chat_id'] = update.effective_chat.id
+
+            # Choix des destinataires avant la rédaction du message
+            keyboard = [
+                [InlineKeyboardButton("👥 Tous les utilisateurs autorisés", callback_data="bcseg_all")],
+                [InlineKeyboardButton("🟢 Actifs (7 jours)", callback_data="bcseg_active_7"),
+                 InlineKeyboardButton("🟢 Actifs (30 jours)", callback_data="bcseg_active_30")],
+                [InlineKeyboardButton("💤 Inactifs depuis 30 jours", callback_data="bcseg_inactive_30")],
+                [InlineKeyboardButton("🆕 Jamais atteints", callback_data="bcseg_never")],
+                [InlineKeyboardButton("📂 Par catégorie consultée", callback_data="bcseg_categories")]
+            ]
+            for group in self._access_codes.get("groups", {}):
+                keyboard.append([InlineKeyboardButton(f"👥 Groupe {group}", callback_data=f"bcseg_group_{group}")])
+            keyboard.append([InlineKeyboardButton("❌ Annuler", callback_data="admin")])
+
+            await update.callback_query.edit_message_text(
+                "📢 *Nouveau message de diffusion*\n\n"
+                "Choisissez les destinataires de l'annonce :",
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return "CHOOSING"
+        except Exception as e:
+            print(f"Erreur dans handle_broadcast : {e}")
+            return "CHOOSING"
+
+    async def choose_broadcast_segment(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Enregistre le segment choisi puis demande le message à diffuser"""
+        query = update.callback_query
+        try:
+            choice = query.data.replace("bcseg_", "", 1)
+            if choice == "categories":
+                categories = self.category_names()
+                keyboard = [
+                    [InlineKeyboardButton(f"{name} ({self.segments.viewer_count(category_id)})",
+                                          callback_data=f"bcseg_category_{category_id}")]
+                    for category_id, name in categories.items()
+                    if self.segments.viewer_count(category_id)
+                ]
+                keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="start_broadcast")])
+                await query.edit_message_text(
+                    "📂 *Annonce aux utilisateurs ayant consulté la catégorie :*"
+                    if len(keyboard) > 1 else "ℹ️ Aucune consultation de catégorie enregistrée.",
+                    parse_mode='Markdown',
+                    reply_markup=InlineKeyboardMarkup(keyboard)
+                )
+                return "CHOOSING"
+
+            kind, _, value = choice.partition("_")
+            context.user_data['broadcast_segment'] = f"{kind}:{value}" if value else kind
+            context.user_data.pop('broadcast_schedule', None)
+
+            text, keyboard = self._broadcast_prompt(context, update.effective_user.id)
+            message = await query.edit_message_text(text, parse_mode='HTML', reply_markup=keyboard)
+            context.user_data['instruction_message_id'] = message.message_id
+            return "WAITING_BROADCAST_MESSAGE"
+        except Exception as e:
+            print(f"Erreur dans choose_broadcast_segment : {e}")
+            return "CHOOSING"
+
+    def _broadcast_prompt(self, context, admin_id: int):
+        """Texte et boutons de la demande du message à diffuser (destinataires, programmation)"""
+        segment = context.user_data.get('broadcast_segment', 'all')
+        recipients = self._broadcast_recipients(segment, admin_id)
+        schedule = context.user_data.get('broadcast_schedule')
+        text = "📢 <b>Nouveau message de diffusion</b>\n\n"
+        text += f"Destinataires : {html.escape(self._segment_label(segment))} ({len(recipients)})\n"
+        if schedule:
+            text += f"Envoi : {self._schedule_label(schedule['run_at'], schedule['repeat'])}\n"
+        text += ("\nEnvoyez le message que vous souhaitez diffuser.\n"
+                 "Vous pouvez envoyer du texte, des photos ou des vidéos.")
+        keyboard = [
+            [InlineKeyboardButton("⏰ Programmer l'envoi", callback_data="bcsched_setup")],
+            [InlineKeyboardButton("🔙 Changer de destinataires", callback_data="start_broadcast")],
+            [InlineKeyboardButton("❌ Annuler", callback_data="admin")]
+        ]
+        return text, InlineKeyboardMarkup(keyboard)
+
+    @staticmethod
+    def _schedule_label(run_at: float, repeat: float = None) -> str:
+        paris_tz = pytz.timezone('Europe/Paris')
+        label = datetime.fromtimestamp(run_at, paris_tz).strftime("le %d/%m/%Y à %H:%M")
+        if repeat == SCHEDULE_REPEATS['quotidien']:
+            label += ", chaque jour"
+        elif repeat == SCHEDULE_REPEATS['hebdo']:
+            label += ", chaque semaine"
+        return label
+
+    @staticmethod
+    def _parse_schedule(text: str):
+        """'JJ/MM/AAAA HH:MM' ou 'HH:MM' (heure de Paris), suivi éventuellement d'une répétition.
+
+        Retourne (timestamp, répétition en secondes ou None), ou None si la date est invalide ou passée.
+        """
+        parts = text.strip().lower().split()
+        repeat = SCHEDULE_REPEATS.get(parts.pop()) if parts and parts[-1] in SCHEDULE_REPEATS else None
+        value = " ".join(parts)
+        paris_tz = pytz.timezone('Europe/Paris')
+        now = datetime.now(paris_tz)
+        try:
+            run_at = paris_tz.localize(datetime.strptime(value, "%d/%m/%Y %H:%M"))
+        except ValueError:
+            try:
+                hour = datetime.strptime(value, "%H:%M").time()
+            except ValueError:
+                return None
+            # Heure seule : aujourd'hui, ou demain si elle est passée
+            run_at = paris_tz.localize(datetime.combine(now.date(), hour))
+            if run_at <= now:
+                run_at = paris_tz.localize(datetime.combine(now.date() + timedelta(days=1), hour))
+        if run_at <= now:
+            return None
+        return run_at.timestamp(), repeat
+
+    async def ask_broadcast_schedule(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Demande la date d'envoi d'une annonce programmée"""
+        query = update.callback_query
+        message = await query.edit_message_text(
+            "⏰ <b>Programmer l'annonce</b>\n\n"
+            "Envoyez la date et l'heure d'envoi (heure de Paris) :\n"
+            "• <code>JJ/MM/AAAA HH:MM</code>, ou <code>HH:MM</code> pour la prochaine occurrence\n"
+            "• ajoutez <code>quotidien</code> ou <code>hebdo</code> pour répéter l'annonce\n\n"
+            "Exemple : <code>03:30 quotidien</code>",
+            parse_mode='HTML',
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ Annuler", callback_data="admin")]])
+        )
+        context.user_data['instruction_message_id'] = message.message_id
+        return "WAITING_BROADCAST_SCHEDULE"
+
+    async def handle_broadcast_schedule(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Enregistre la date d'envoi saisie puis redemande le message"""
+        schedule = self._parse_schedule(update.message.text)
+        try:
+            await update.message.delete()
+        except Exception as e:
+            print(f"Erreur lors de la suppression du message: {e}")
+        if schedule is None:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text="❌ Date invalide ou déjà passée. Exemple : 25/12/2024 09:00 ou 03:30 quotidien"
+            )
+            return "WAITING_BROADCAST_SCHEDULE"
+
+        run_at, repeat = schedule
+        context.user_data['broadcast_schedule'] = {'run_at': run_at, 'repeat': repeat}
+        text, keyboard = self._broadcast_prompt(context, update.effective_user.id)
+        try:
+            await context.bot.edit_message_text(
+                chat_id=update.effective_chat.id,
+                message_id=context.user_data['instruction_message_id'],
+                text=text,
+                parse_mode='HTML',
+                reply_markup=keyboard
+            )
+        except Exception:
+            message = await context.bot.send_message(
+                chat_id=update.effective_chat.id, text=text, parse_mode='HTML', reply_markup=keyboard)
+            context.user_data['instruction_message_id'] = message.message_id
+        return "WAITING_BROADCAST_MESSAGE"
+
+    async def list_scheduled_broadcasts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Affiche les annonces programmées, avec un bouton d'annulation pour chacune"""
+        query = update.callback_query
+        entries = self.broadcast_schedule.upcoming()
+        keyboard = []
+        if entries:
+            text = "🕒 <b>Annonces programmées</b>\n\n"
+            for entry in entries:
+                segment = entry['broadcast'].get('segment', 'all')
+                text += (f"<b>n°{entry['id']}</b> — {self._schedule_label(entry['run_at'], entry['repeat'])}\n"
+                         f"  └ {html.escape(entry['broadcast']['content'][:40])}\n"
+                         f"  └ Destinataires : {html.escape(self._segment_label(segment))}\n")
+                keyboard.append([InlineKeyboardButton(f"❌ Annuler n°{entry['id']}",
+                                                      callback_data=f"bcsched_cancel_{entry['id']}")])
+        else:
+            text = "ℹ️ Aucune annonce programmée."
+        keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")])
+        await query.edit_message_text(text, parse_mode='HTML', reply_markup=InlineKeyboardMarkup(keyboard))
+        return "CHOOSING"
+
+    async def cancel_scheduled_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        entry_id = query.data.replace("bcsched_cancel_", "")
+        if self.broadcast_schedule.cancel(entry_id):
+            await query.answer(f"Annonce programmée n°{entry_id} annulée")
+        else:
+            await query.answer("Cette annonce n'est plus programmée")
+        return await self.list_scheduled_broadcasts(update, context)
+
+    async def manage_broadcasts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère les annonces existantes"""
+        keyboard = []
+        if self.broadcasts:
+            for broadcast_id, broadcast in self.broadcasts.items():
+                keyboard.append([InlineKeyboardButton(
+                    f"📢 {broadcast['content'][:30]}...",
+                    callback_data=f"edit_broadcast_{broadcast_id}"
+                )])
+        
+        keyboard.append([InlineKeyboardButton("➕ Nouvelle annonce", callback_data="start_broadcast")])
+        if self.broadcast_schedule.entries:
+            keyboard.append([InlineKeyboardButton(
+                f"🕒 Annonces programmées ({len(self.broadcast_schedule.entries)})", callback_data="bcsched_list")])
+        keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="admin")])
+        
+        await update.callback_query.edit_message_text(
+            "📢 *Gestion des annonces*\n\n"
+            "Sélectionnez une annonce à modifier ou créez-en une nouvelle.",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        
+        return "CHOOSING"
+
+    async def edit_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Permet de modifier une annonce existante"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("edit_broadcast_", "")
+    
+        if broadcast_id in self.broadcasts:
+            broadcast = self.broadcasts[broadcast_id]
+            keyboard = [
+                [InlineKeyboardButton("✏️ Modifier l'annonce", callback_data=f"edit_broadcast_content_{broadcast_id}")],
+                [InlineKeyboardButton("📤 Envoyer aux nouveaux destinataires", callback_data=f"resend_broadcast_{broadcast_id}")],
+                [InlineKeyboardButton("🧹 Retirer des conversations", callback_data=f"retract_broadcast_{broadcast_id}")],
+                [InlineKeyboardButton("❌ Supprimer", callback_data=f"delete_broadcast_{broadcast_id}")],
+                [InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")]
+            ]
+        
+            await query.edit_message_text(
+                f"📢 *Gestion de l'annonce*\n\n"
+                f"Message actuel :\n{broadcast['content'][:200]}...",
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+        else:
+            await query.edit_message_text(
+                "❌ Cette annonce n'existe plus.",
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")
+                ]])
+            )
+    
+        return "CHOOSING"
+
+    async def edit_broadcast_content(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Démarre l'édition d'une annonce"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("edit_broadcast_content_", "")
+
+        context.user_data['editing_broadcast_id'] = broadcast_id
+
+        # Envoyer le message d'instruction et stocker son ID
+        message = await query.edit_message_text(
+            "✏️ *Modification de l'annonce*\n\n"
+            "Envoyez un nouveau message (texte et/ou média) pour remplacer cette annonce.",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("🔙 Annuler", callback_data=f"edit_broadcast_{broadcast_id}")
+            ]])
+        )
+    
+        # Stocker l'ID du message d'instruction
+        context.user_data['instruction_message_id'] = message.message_id
+
+        return "WAITING_BROADCAST_EDIT"
+
+    async def handle_broadcast_edit(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Traite la modification d'une annonce"""
+        try:
+            broadcast_id = context.user_data.get('editing_broadcast_id')
+            if not broadcast_id or broadcast_id not in self.broadcasts:
+                return "CHOOSING"
+
+            # Supprimer les messages intermédiaires
+            try:
+                await update.message.delete()
+                if 'instruction_message_id' in context.user_data:
+                    await context.bot.delete_message(
+                        chat_id=update.effective_chat.id,
+                        message_id=context.user_data['instruction_message_id']
+                    )
+            except Exception as e:
+                print(f"Error deleting messages: {e}")
+
+            admin_id = update.effective_user.id
+            new_content = update.message.text if update.message.text else update.message.caption if update.message.caption else "Media sans texte"
+        
+            # Convertir les nouvelles entités
+            new_entities = None
+            if update.message.entities:
+                new_entities = [{'type': entity.type, 
+                               'offset': entity.offset,
+                               'length': entity.length} 
+                              for entity in update.message.entities]
+            elif update.message.caption_entities:
+                new_entities = [{'type': entity.type, 
+                               'offset': entity.offset,
+                               'length': entity.length} 
+                              for entity in update.message.caption_entities]
+
+            broadcast = self.broadcasts[broadcast_id]
+            broadcast['content'] = new_content
+            broadcast['entities'] = new_entities
+            broadcast['delivered_at'] = datetime.now().timestamp()
+            self._save_broadcasts([broadcast_id])
+
+            # Les messages existants sont modifiés, les autres utilisateurs autorisés
+            # reçoivent un nouveau message (une seule vérification du fichier pour tout l'envoi)
+            delivered = self.deliveries.get(broadcast_id)
+            recipients = self.delivery_health.reachable(
+                [user_id for user_id in delivered.user_ids() if user_id != admin_id])  # Skip l'admin et les injoignables
+            recipients += [user_id for user_id in self._broadcast_recipients(broadcast.get('segment'), admin_id)
+                           if user_id not in delivered]
+            # Une annonce photo garde sa photo : seule la légende est modifiée
+            payload = {
+                'text': new_content,
+                'photo': broadcast['file_id'] if broadcast.get('type') == 'photo' else None,
+                'caption': new_content,
+                'entities': [entity.to_dict() for entity in
+                             update.message.entities or update.message.caption_entities or []]
+            }
+
+            # Créer la bannière de gestion des annonces
+            keyboard = []
+            if self.broadcasts:
+                for b_id, broadcast in self.broadcasts.items():
+                    keyboard.append([InlineKeyboardButton(
+                        f"📢 {broadcast['content'][:30]}...",
+                        callback_data=f"edit_broadcast_{b_id}"
+                    )])
+        
+            keyboard.append([InlineKeyboardButton("➕ Nouvelle annonce", callback_data="start_broadcast")])
+            keyboard.append([InlineKeyboardButton("🔙 Retour", callback_data="admin")])
+        
+            # Envoyer la nouvelle bannière avec le contenu de l'annonce
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text="📢 *Gestion des annonces*\n\n"
+                     "Sélectionnez une annonce à modifier ou créez-en une nouvelle.",
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+
+            # Message de suivi, remplacé par le rapport en fin de diffusion
+            job_id = self.broadcast_jobs.reserve_id()
+            confirmation_message = await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=f"⏳ Modification en cours (diffusion n°{job_id})\n\n"
+                     f"📝 *Contenu de l'annonce :*\n{new_content}",
+                parse_mode='Markdown',
+                reply_markup=self._broadcast_controls(job_id)
+            )
+            self.broadcast_jobs.submit(
+                'edit', broadcast_id, recipients, payload,
+                notify=[confirmation_message.chat_id, confirmation_message.message_id],
+                job_id=job_id
+            )
+
+            return "CHOOSING"
+
+        except Exception as e:
+            print(f"Error in handle_broadcast_edit: {e}")
+            return "CHOOSING"
+
+    async def resend_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Renvoie une annonce aux utilisateurs autorisés qui ne l'ont pas reçue
+        (nouveaux utilisateurs, échecs précédents)"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("resend_broadcast_", "")
+
+        if broadcast_id not in self.broadcasts:
+            await query.edit_message_text(
+                "❌ Cette annonce n'existe plus.",
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")
+                ]])
+            )
+            return "CHOOSING"
+
+        broadcast = self.broadcasts[broadcast_id]
+        is_photo = broadcast['type'] == 'photo' and broadcast['file_id']
+        message_text = broadcast.get('content', '')
+        payload = {
+            'text': message_text,
+            'photo': broadcast['file_id'] if is_photo else None,
+            'caption': broadcast['caption'] if broadcast['caption'] else '',
+            'parse_mode': 'Markdown'
+        }
+
+        if not is_photo and not message_text:
+            print(f"No content found for broadcast {broadcast_id}")
+            recipients = []
+        else:
+            authorized = self._broadcast_recipients(broadcast.get('segment'))
+            # Seuls les destinataires sans message enregistré : O(manquants) appels à l'API
+            recipients = self.deliveries.get(broadcast_id).missing(authorized)
+
+        if not recipients:
+            self.deliveries.release(broadcast_id)
+            await query.edit_message_text(
+                "✅ Tous les utilisateurs autorisés ont déjà reçu cette annonce."
+                if is_photo or message_text else "❌ Cette annonce n'a pas de contenu à renvoyer.",
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton("🔙 Retour", callback_data=f"edit_broadcast_{broadcast_id}")
+                ]])
+            )
+            return "CHOOSING"
+
+        broadcast['delivered_at'] = datetime.now().timestamp()
+        self._save_broadcasts([broadcast_id])
+
+        # Le message de suivi est remplacé par le rapport en fin de diffusion
+        job_id = self.broadcast_jobs.reserve_id()
+        progress_message = await query.edit_message_text(
+            f"📤 *Renvoi de l'annonce à {len(recipients)} utilisateurs...* (diffusion n°{job_id})",
+            parse_mode='Markdown',
+            reply_markup=self._broadcast_controls(job_id)
+        )
+        self.broadcast_jobs.submit(
+            'resend', broadcast_id, recipients, payload,
+            notify=[progress_message.chat_id, progress_message.message_id],
+            job_id=job_id
+        )
+
+        return "CHOOSING"
+
+    async def confirm_retract_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Demande confirmation avant de retirer une annonce de toutes les conversations"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("retract_broadcast_", "")
+        if broadcast_id not in self.broadcasts:
+            await query.edit_message_text(
+                "❌ Cette annonce n'existe plus.",
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton("🔙 Retour", callback_data="manage_broadcasts")
+                ]])
+            )
+            return "CHOOSING"
+
+        recipients = len(self.deliveries.get(broadcast_id))
+        self.deliveries.release(broadcast_id)
+        if not recipients:
+            text = "ℹ️ Aucun message enregistré pour cette annonce : rien à retirer."
+            keyboard = [[InlineKeyboardButton("🔙 Retour", callback_data=f"edit_broadcast_{broadcast_id}")]]
+        else:
+            text = (f"⚠️ *Retirer l'annonce des conversations ?*\n\n"
+                    f"Les messages reçus par {recipients} utilisateurs seront supprimés.")
+            keyboard = [
+                [InlineKeyboardButton("✅ Oui, retirer", callback_data=f"confirm_retract_{broadcast_id}")],
+                [InlineKeyboardButton("❌ Non, annuler", callback_data=f"edit_broadcast_{broadcast_id}")]
+            ]
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+        return "CHOOSING"
+
+    async def retract_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Supprime l'annonce de toutes les conversations (diffusion 'retract')"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("confirm_retract_", "")
+        if broadcast_id not in self.broadcasts:
+            return await self.manage_broadcasts(update, context)
+
+        recipients = self.delivery_health.reachable(self.deliveries.get(broadcast_id).user_ids())
+        job_id = self.broadcast_jobs.reserve_id()
+        progress_message = await query.edit_message_text(
+            f"🧹 *Retrait de l'annonce en cours...* (diffusion n°{job_id})",
+            parse_mode='Markdown',
+            reply_markup=self._broadcast_controls(job_id)
+        )
+        self.broadcast_jobs.submit(
+            'retract', broadcast_id, recipients,
+            notify=[progress_message.chat_id, progress_message.message_id],
+            job_id=job_id
+        )
+        return "CHOOSING"
+
+    async def delete_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Supprime une annonce"""
+        query = update.callback_query
+        broadcast_id = query.data.replace("delete_broadcast_", "")
+        
+        if broadcast_id in self.broadcasts:
+            del self.broadcasts[broadcast_id]
+            self._save_broadcasts([broadcast_id])  # Sauvegarder après suppression
+            self.deliveries.delete(broadcast_id)
+        await query.edit_message_text(
+            "✅ *L'annonce a été supprimée avec succès !*",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("🔙 Retour aux annonces", callback_data="manage_broadcasts")
+            ]])
+        )
+        
+        return "CHOOSING"
+
+    async def handle_broadcast_control(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Boutons pause, reprise et annulation d'une diffusion (bcjob_<action>_<id>)"""
+        query = update.callback_query
+        if str(query.from_user.id) not in self.admin_ids:
+            await query.answer()
+            return "CHOOSING"
+
+        _, action, job_id = query.data.split("_", 2)
+        actions = {
+            'pause': (self.broadcast_jobs.pause, "⏸ Diffusion mise en pause"),
+            'resume': (self.broadcast_jobs.resume, "▶️ Diffusion reprise"),
+            'cancel': (self.broadcast_jobs.cancel, "⏹ Diffusion annulée")
+        }
+        if action not in actions:
+            await query.answer()
+            return "CHOOSING"
+
+        control, confirmation = actions[action]
+        if await control(job_id):
+            await query.answer(confirmation)
+        else:
+            await query.answer("Cette diffusion est déjà terminée.")
+        return "CHOOSING"
+
+    async def send_broadcast_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Envoie le message aux utilisateurs autorisés"""
+        chat_id = update.effective_chat.id
+
+        try:
+            # Supprimer les messages précédents
+            try:
+                await update.message.delete()
+                if 'instruction_message_id' in context.user_data:
+                    await context.bot.delete_message(
+                        chat_id=chat_id,
+                        message_id=context.user_data['instruction_message_id']
+                    )
+            except Exception as e:
+                print(f"Erreur lors de la suppression du message: {e}")
+
+            # Enregistrer le broadcast
+            message_content = update.message.text if update.message.text else update.message.caption if update.message.caption else "Media sans texte"
+        
+            # Convertir les entités en format sérialisable
+            entities = None
+            if update.message.entities:
+                entities = [{'type': entity.type, 
+                            'offset': entity.offset,
+                            'length': entity.length} 
+                           for entity in update.message.entities]
+            elif update.message.caption_entities:
+                entities = [{'type': entity.type, 
+                            'offset': entity.offset,
+                            'length': entity.length} 
+                           for entity in update.message.caption_entities]
+    
+            broadcast = {
+                'content': message_content,
+                'type': 'photo' if update.message.photo else 'text',
+                'file_id': update.message.photo[-1].file_id if update.message.photo else None,
+                'caption': update.message.caption if update.message.photo else None,
+                'entities': entities,  # Stocker les entités converties
+                'parse_mode': None,  # On n'utilise plus parse_mode car on utilise les entités
+                # Destinataires, repris par la modification et le renvoi
+                'segment': context.user_data.get('broadcast_segment', 'all')
+            }
+
+            # Contenu à envoyer, avec les entités complètes (liens, mentions...)
+            message = update.message
+            payload = {
+                'text': message_content,
+                'photo': message.photo[-1].file_id if message.photo else None,
+                'caption': message.caption if message.caption else '',
+                'entities': [entity.to_dict() for entity in
+                             (message.caption_entities if message.photo else message.entities) or []]
+            }
+
+            schedule = context.user_data.pop('broadcast_schedule', None)
+            if schedule:
+                entry_id = self.broadcast_schedule.add(
+                    schedule['run_at'], schedule['repeat'],
+                    broadcast=broadcast, payload=payload, chat_id=chat_id, admin_id=update.effective_user.id
+                )
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"🕒 Annonce n°{entry_id} programmée {self._schedule_label(schedule['run_at'], schedule['repeat'])}.",
+                    reply_markup=InlineKeyboardMarkup([
+                        [InlineKeyboardButton("🕒 Annonces programmées", callback_data="bcsched_list")],
+                        [InlineKeyboardButton("🔙 Retour", callback_data="admin")]
+                    ])
+                )
+                return "CHOOSING"
+
+            await self._start_broadcast(context.bot, chat_id, broadcast, payload, update.effective_user.id)
+            return "CHOOSING"
+
+        except Exception as e:
+            print(f"Erreur lors de l'envoi du broadcast : {e}")
+            return "CHOOSING"
+
+    async def handle_user_management(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Gère l'affichage des statistiques utilisateurs"""
+        try:
+            # Récupérer la page actuelle depuis le callback_data ou initialiser à 0
+            query = update.callback_query
+            current_page = 0
+            if query and query.data.startswith("user_page_"):
+                current_page = int(query.data.replace("user_page_", ""))
+
+            # Nombre d'utilisateurs par page
+            users_per_page = 10
+        
+            # Récupérer les listes d'utilisateurs autorisés et bannis
+            self.access.refresh()
+            authorized_users = self.access.authorized
+            banned_users = self.access.banned
+        
+            # Créer des listes séparées pour chaque catégorie
+            authorized_list = []
+            banned_list = []
+            pending_list = []
+
+            for user_id, user_data in self._users.items():
+                user_id_int = int(user_id)
+                if user_id_int in authorized_users:
+                    authorized_list.append((user_id, user_data))
+                elif user_id_int in banned_users:
+                    banned_list.append((user_id, user_data))
+                else:
+                    pending_list.append((user_id, user_data))
+
+            # Combiner les listes dans l'ordre : autorisés, en attente, bannis
+            relevant_users = authorized_list + pending_list + banned_list
+
+            total_pages = (len(relevant_users) + users_per_page - 1) // users_per_page
+
+            # Calculer les indices de début et de fin pour la page actuelle
+            start_idx = current_page * users_per_page
+            end_idx = min(start_idx + users_per_page, len(relevant_users))
+
+            # Construire le texte
+            text = "👥 *Gestion des utilisateurs*\n\n"
+            text += f"✅ Utilisateurs autorisés : {len(authorized_users)}\n"
+            text += f"⏳ Utilisateurs en attente : {len(pending_list)}\n"
+            text += f"🚫 Utilisateurs bannis : {len(banned_users)}\n"
+            text += self.delivery_health.summary() + "\n"
+            if total_pages > 1:
+                text += f"Page {current_page + 1}/{total_pages}\n"
+            text += "\n"
+
+            if relevant_users:
+                for user_id, user_data in relevant_users[start_idx:end_idx]:
+                    user_id_int = int(user_id)
+                    # Format de la date
+                    last_seen = user_data.get('last_seen', 'Jamais')
+                    try:
+                        dt = datetime.strptime(last_seen, "%Y-%m-%d %H:%M:%S")
+                        last_seen = dt.strftime("%d/%m/%Y %H:%M")
+                    except:
+                        pass
+
+                    # Construire le nom d'affichage
+                    username = user_data.get('username')
+                    first_name = user_data.get('first_name')
+                    last_name = user_data.get('last_name')
+                
+                    if username:
+                        display_name = f"@{username}"
+                    elif first_name and last_name:
+                        display_name = f"{first_name} {last_name}"
+                    elif first_name:
+                        display_name = first_name
+                    elif last_name:
+                        display_name = last_name
+                    else:
+                        display_name = "Sans nom"
+
+                    # Échapper les caractères spéciaux Markdown
+                    display_name = display_name.replace('_', '\\_').replace('*', '\\*')
+                
+                    # Déterminer le statut
+                    if user_id_int in banned_users:
+                        status = "🚫"
+                    elif user_id_int in authorized_users:
+                        status = "✅"
+                    else:
+                        status = "⏳"
+                
+                    text += f"{status} {display_name} (`{user_id}`)\n"
+                    text += f"  └ Dernière activité : {last_seen}\n"
+            else:
+                text += "Aucun utilisateur enregistré."
+
+            # Construire le clavier avec la pagination
+            keyboard = []
+        
+            # Boutons de pagination
+            if total_pages > 1:
+                nav_buttons = []
+            
+                # Bouton page précédente
+                if current_page > 0:
+                    nav_buttons.append(InlineKeyboardButton(
+                        "◀️", callback_data=f"user_page_{current_page - 1}"))
+            
+                # Bouton page actuelle
+                nav_buttons.append(InlineKeyboardButton(
+                    f"{current_page + 1}/{total_pages}", callback_data="current_page"))
+            
+                # Bouton page suivante
+                if current_page < total_pages - 1:
+                    nav_buttons.append(InlineKeyboardButton(
+                        "▶️", callback_data=f"user_page_{current_page + 1}"))
+            
+                keyboard.append(nav_buttons)
+
+            # Autres boutons
+            keyboard.extend([
+                [InlineKeyboardButton("🚫 Utilisateurs bannis", callback_data="show_banned")],
+                [InlineKeyboardButton("🔙 Retour", callback_data="admin")]
+            ])
+
+            await update.callback_query.edit_message_text(
+                text=text,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='Markdown'
+            )
+
+            return "CHOOSING"
+
+        except Exception as e:
+            print(f"Erreur dans handle_user_management : {e}")
+            await update.callback_query.edit_message_text(
+                "Erreur lors de l'affichage des utilisateurs.",
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton("🔙 Retour", callback_data="admin")
+                ]])
+            )
+            return "CHOOSING"
+
+    async def add_user_buttons(self, keyboard: list) -> list:
+        """Ajoute les boutons de gestion utilisateurs au clavier admin existant"""
+        try:
+            keyboard.insert(-1, [InlineKeyboardButton("👥 Gérer utilisateurs", callback_data="manage_users")])
+        except Exception as e:
+            print(f"Erreur lors de l'ajout des boutons admin : {e}")
         return keyboard
\ No newline at end of file
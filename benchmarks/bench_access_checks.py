@@ -0,0 +1,78 @@
+"""Benchmark : parcours des destinataires d'une annonce (vérification d'accès par utilisateur)
+
+Avant : relecture + parsing de access_codes.json et recherche dans une liste à chaque vérification.
+Après : AccessState, sets en mémoire et une seule vérification de mtime pour tout le parcours.
+
+L'ancienne méthode est mesurée sur un échantillon puis extrapolée (elle prendrait
+plusieurs minutes sur 100k utilisateurs).
+
+Usage : python benchmarks/bench_access_checks.py [nb_utilisateurs] [taille_echantillon]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.access_state import AccessState
+from modules.storage import JsonStorage
+
+
+def build_access_codes(nb_users):
+    # Un utilisateur sur dix n'est pas autorisé, un sur cent est banni
+    return {
+        'authorized_users': [uid for uid in range(nb_users) if uid % 10],
+        'banned_users': [uid for uid in range(nb_users) if uid % 100 == 0],
+        'codes': [],
+        'groups': {}
+    }
+
+
+def scan_before(path, user_ids):
+    recipients = 0
+    for user_id in user_ids:
+        with open(path, 'r', encoding='utf-8') as f:
+            access_codes = json.load(f)
+        if int(user_id) in access_codes.get('authorized_users', []):
+            recipients += 1
+    return recipients
+
+
+def scan_after(state, user_ids):
+    state.refresh()
+    recipients = 0
+    for user_id in user_ids:
+        if state.is_authorized(user_id):
+            recipients += 1
+    return recipients
+
+
+def main():
+    nb_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JsonStorage(access_codes_file=os.path.join(tmp, 'access_codes.json'))
+        storage.save_access_codes(build_access_codes(nb_users))
+        user_ids = [str(uid) for uid in range(nb_users)]
+
+        start = time.perf_counter()
+        scan_before(storage.access_codes_file, user_ids[-sample:])
+        per_check = (time.perf_counter() - start) / sample
+        print(f"Avant : {per_check * 1e3:8.3f} ms/vérification, "
+              f"~{per_check * nb_users:8.1f} s pour {nb_users} destinataires (extrapolé)")
+
+        state = AccessState(storage)
+        start = time.perf_counter()
+        recipients = scan_after(state, user_ids)
+        elapsed = time.perf_counter() - start
+        print(f"Après : {elapsed / nb_users * 1e6:8.3f} µs/vérification, "
+              f"{elapsed:8.3f} s pour {nb_users} destinataires ({recipients} autorisés, {state.reloads} lecture)")
+
+        assert recipients == len(build_access_codes(nb_users)['authorized_users'])
+
+
+if __name__ == '__main__':
+    main()
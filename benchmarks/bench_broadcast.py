@@ -0,0 +1,102 @@
+"""Benchmark : envoi d'une annonce à N utilisateurs sur une Bot API simulée
+
+La Bot API locale (FakeBot) répond après une latence fixe, refuse au-delà de 30 messages/s
+(RetryAfter), renvoie TimedOut pour une petite partie des requêtes et Forbidden pour les
+utilisateurs qui ont bloqué le bot.
+
+Avant : boucle séquentielle (un await par utilisateur, erreurs seulement affichées).
+Après : BroadcastEngine (envois parallèles, seau à jetons, reprise sur erreur).
+Le dernier passage règle volontairement le seau au-dessus de la limite pour vérifier
+que les RetryAfter sont respectés.
+
+Usage : python benchmarks/bench_broadcast.py [nb_utilisateurs] [latence_s]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import Forbidden, RetryAfter, TimedOut
+
+from modules.broadcast import BroadcastEngine
+
+
+class FakeBot:
+    def __init__(self, latency: float, limit: int = 30, timeout_rate: float = 0.01,
+                 blocked_rate: float = 0.02, seed: int = 1):
+        self.latency = latency
+        self.limit = limit
+        self.timeout_rate = timeout_rate
+        self.random = random.Random(seed)
+        self.blocked = {uid for uid in range(100_000) if self.random.random() < blocked_rate}
+        self.delivered = {}
+        self.flood_errors = 0
+        self._window = deque()
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.limit:
+            self.flood_errors += 1
+            raise RetryAfter(1)
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.random.random() < self.timeout_rate:
+            raise TimedOut()
+        self._window.append(now)
+        self.delivered[chat_id] = self.delivered.get(chat_id, 0) + 1
+        return SimpleNamespace(message_id=len(self._window))
+
+
+async def send_sequential(bot, user_ids):
+    success = failed = 0
+    for user_id in user_ids:
+        try:
+            await bot.send_message(chat_id=user_id, text="Annonce")
+            success += 1
+        except Exception as e:
+            print(f"Error sending to user {user_id}: {e}")
+            failed += 1
+    return success, failed
+
+
+def report(label, bot, user_ids, elapsed, success, failed):
+    reachable = [uid for uid in user_ids if uid not in bot.blocked]
+    missing = sum(1 for uid in reachable if uid not in bot.delivered)
+    duplicates = sum(1 for count in bot.delivered.values() if count > 1)
+    print(f"{label:<34} {elapsed:7.2f} s  {success / elapsed:6.1f} msg/s  "
+          f"réussis {success:5d}  échecs {failed:4d}  non reçus {missing:4d}  "
+          f"doublons {duplicates}  RetryAfter {bot.flood_errors}")
+
+
+async def main():
+    nb_users = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    user_ids = list(range(nb_users))
+
+    bot = FakeBot(latency)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        success, failed = await send_sequential(bot, user_ids)
+    report("Avant (boucle séquentielle)", bot, user_ids, time.perf_counter() - start, success, failed)
+
+    for label, rate in (("Après (BroadcastEngine, 25/s)", 25.0), ("Après (seau à 40/s, RetryAfter)", 40.0)):
+        bot = FakeBot(latency)
+        engine = BroadcastEngine(rate=rate, concurrency=20, base_delay=0.2)
+        send = lambda user_id, bot=bot: bot.send_message(chat_id=user_id, text="Annonce")
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await engine.run(user_ids, send)
+        report(label, bot, user_ids, result.elapsed, result.success, result.failed)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Benchmark : coût d'aiguillage d'un callback
+
+Avant : chaîne if/elif de handle_normal_buttons, comparaisons dans l'ordre du code.
+Après : CallbackRouter (dict des valeurs exactes, puis trie des préfixes).
+
+Usage : python benchmarks/bench_callback_dispatch.py [nb_appels]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.callback_router import CallbackRouter
+
+# Branches de l'ancienne chaîne, dans leur ordre d'origine
+CHAIN = [
+    ('exact', ('admin',)),
+    ('exact', ('show_info_potato',)),
+    ('prefix', ('custom_text_',)),
+    ('exact', ('show_custom_buttons',)),
+    ('exact', ('add_custom_button',)),
+    ('exact', ('list_buttons_delete',)),
+    ('prefix', ('delete_button_',)),
+    ('exact', ('list_buttons_edit',)),
+    ('prefix', ('edit_button_',)),
+    ('prefix', ('edit_button_name_',)),
+    ('prefix', ('edit_button_value_',)),
+    ('exact', ('edit_banner_image',)),
+    ('exact', ('manage_users',)),
+    ('exact', ('start_broadcast',)),
+    ('exact', ('add_category',)),
+    ('exact', ('add_product',)),
+    ('prefix', ('select_category_',)),
+    ('prefix', ('delete_product_category_',)),
+    ('exact', ('delete_category',)),
+    ('prefix', ('confirm_delete_category_',)),
+    ('exact', ('delete_product',)),
+    ('prefix', ('confirm_delete_product_',)),
+    ('prefix', ('really_delete_product_',)),
+    ('exact', ('edit_category',)),
+    ('prefix', ('edit_cat_',)),
+    ('prefix', ('edit_cat_name_',)),
+    ('prefix', ('add_soldout_',)),
+    ('prefix', ('confirm_soldout_',)),
+    ('exact', ('toggle_access_code',)),
+    ('exact', ('edit_order_button',)),
+    ('exact', ('show_order_text',)),
+    ('exact', ('edit_welcome',)),
+    ('exact', ('show_stats',)),
+    ('exact', ('edit_contact',)),
+    ('exact', ('cancel_add_category', 'cancel_add_product', 'cancel_delete_category', 'cancel_delete_product', 'cancel_edit_contact', 'cancel_edit_order', 'cancel_edit_welcome')),
+    ('exact', ('back_to_categories',)),
+    ('exact', ('skip_media',)),
+    ('prefix', ('product_',)),
+    ('prefix', ('view_',)),
+    ('prefix', ('next_', 'prev_')),
+    ('exact', ('edit_product',)),
+    ('prefix', ('editp_',)),
+    ('prefix', ('editcat_',)),
+    ('exact', ('edit_name', 'edit_price', 'edit_desc', 'edit_media')),
+    ('exact', ('cancel_edit',)),
+    ('exact', ('confirm_reset_stats',)),
+    ('exact', ('show_categories',)),
+    ('exact', ('back_to_home',)),
+]
+
+# Callbacks mesurés : parcours client les plus fréquents et quelques actions admin
+SAMPLES = [
+    "show_categories", "back_to_home", "view_Catégorie 3", "product_4821",
+    "next_4821", "admin", "edit_cat_name_Catégorie 3", "confirm_reset_stats"
+]
+
+
+def build_chain():
+    branches = []
+    for index, (kind, keys) in enumerate(CHAIN):
+        if kind == 'exact':
+            branches.append((lambda data, keys=keys: data in keys, index))
+        else:
+            branches.append((lambda data, keys=keys: data.startswith(keys), index))
+    return branches
+
+
+def dispatch_chain(branches, data):
+    for test, index in branches:
+        if test(data):
+            return index
+    return None
+
+
+def build_router():
+    router = CallbackRouter()
+
+    def make_handler(index):
+        async def handler():
+            return index
+        return handler
+
+    for index, (kind, keys) in enumerate(CHAIN):
+        handler = make_handler(index)
+        for key in keys:
+            if kind == 'exact':
+                router.exact(key, handler)
+            else:
+                router.prefix(key, handler)
+    return router
+
+
+def bench(label, fn, nb_calls):
+    start = time.perf_counter()
+    for i in range(nb_calls):
+        fn(SAMPLES[i % len(SAMPLES)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / nb_calls * 1e6:8.3f} µs/callback")
+
+
+async def bench_dispatch(router, nb_calls):
+    start = time.perf_counter()
+    for i in range(nb_calls):
+        await router.dispatch(SAMPLES[i % len(SAMPLES)])
+    elapsed = time.perf_counter() - start
+    print(f"{'Après (dispatch + mesures)':<28} {elapsed / nb_calls * 1e6:8.3f} µs/callback")
+
+
+def main():
+    nb_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    branches = build_chain()
+    router = build_router()
+
+    for data in SAMPLES:
+        matched = dispatch_chain(branches, data)
+        print(f"{data:<28} branche {matched:>2} de l'ancienne chaîne -> route {router.resolve(data)[0]}")
+
+    bench("Avant (chaîne if/elif)", lambda data: dispatch_chain(branches, data), nb_calls)
+    bench("Après (résolution)", router.resolve, nb_calls)
+    asyncio.run(bench_dispatch(router, nb_calls))
+
+
+if __name__ == '__main__':
+    main()
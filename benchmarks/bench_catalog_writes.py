@@ -0,0 +1,82 @@
+"""Benchmark : clics par seconde avec écriture synchrone vs écriture différée du catalogue
+
+Usage : python benchmarks/bench_catalog_writes.py [nb_categories] [nb_clics]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.persistence import WriteBehindStore, atomic_write_json
+
+
+def build_catalog(nb_categories, products_per_category=10):
+    catalog = {'stats': {'total_views': 0, 'category_views': {}, 'product_views': {}}}
+    for c in range(nb_categories):
+        catalog[f"Catégorie {c}"] = [
+            {
+                'name': f"Produit {c}-{p}",
+                'price': f"{p * 10}€",
+                'description': "Description du produit " * 5,
+                'media': [{'media_id': 'A' * 80, 'media_type': 'photo', 'order_index': 1}]
+            }
+            for p in range(products_per_category)
+        ]
+    return catalog
+
+
+def click(catalog, i, nb_categories):
+    category = f"Catégorie {i % nb_categories}"
+    stats = catalog['stats']
+    stats['category_views'][category] = stats['category_views'].get(category, 0) + 1
+    stats['total_views'] += 1
+
+
+def bench_sync(path, catalog, nb_categories, nb_clicks):
+    start = time.perf_counter()
+    for i in range(nb_clicks):
+        click(catalog, i, nb_categories)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, indent=4, ensure_ascii=False)
+    return time.perf_counter() - start, nb_clicks
+
+
+async def bench_write_behind(path, catalog, nb_categories, nb_clicks, interval):
+    writer = WriteBehindStore('bench', lambda: atomic_write_json(path, catalog), interval)
+    writer.start()
+    start = time.perf_counter()
+    for i in range(nb_clicks):
+        click(catalog, i, nb_categories)
+        writer.mark_dirty()
+        # Rendre la main à la boucle comme le ferait un handler PTB
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    await writer.stop()
+    return elapsed, writer.writes
+
+
+def main():
+    nb_categories = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    nb_clicks = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.json')
+
+        catalog = build_catalog(nb_categories)
+        elapsed, writes = bench_sync(path, catalog, nb_categories, nb_clicks)
+        print(f"Avant (écriture synchrone)  : {nb_clicks / elapsed:10.0f} clics/s, {writes} écritures")
+
+        catalog = build_catalog(nb_categories)
+        elapsed, writes = asyncio.run(bench_write_behind(path, catalog, nb_categories, nb_clicks, 0.5))
+        print(f"Après (écriture différée)   : {nb_clicks / elapsed:10.0f} clics/s, {writes} écritures")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            assert json.load(f)['stats']['total_views'] == nb_clicks
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark : enregistrements d'envoi des annonces, dict message_ids dans broadcasts.json
+vs journaux binaires séparés (DeliveryStore)
+
+Mesure la taille sur disque, le coût d'une action sur une annonce (sauvegarde après
+un envoi) et le chargement au démarrage.
+
+Usage : python benchmarks/bench_delivery_records.py [nb_annonces] [nb_utilisateurs]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.deliveries import DeliveryStore
+from modules.persistence import atomic_write_json
+from modules.sessions import deep_sizeof
+from modules.storage import JsonStorage
+
+
+def build_broadcasts(nb_broadcasts, nb_users):
+    base_user = 6_000_000_000
+    return {
+        str(1_700_000_000.0 + b): {
+            'content': f"Annonce {b} " * 10,
+            'type': 'text',
+            'file_id': None,
+            'caption': None,
+            'entities': None,
+            'message_ids': {str(base_user + u): 100_000 + b * nb_users + u for u in range(nb_users)},
+            'parse_mode': None
+        }
+        for b in range(nb_broadcasts)
+    }
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    nb_broadcasts = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    nb_users = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    broadcasts = build_broadcasts(nb_broadcasts, nb_users)
+    last_id = list(broadcasts)[-1]
+    new_records = list(broadcasts[last_id]['message_ids'].items())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Avant : tout broadcasts.json réécrit à chaque action
+        before = os.path.join(tmp, 'before')
+        os.makedirs(before)
+        path = os.path.join(before, 'broadcasts.json')
+        atomic_write_json(path, broadcasts)
+        start = time.perf_counter()
+        atomic_write_json(path, broadcasts)
+        save_before = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        load_before = time.perf_counter() - start
+        memory_before = deep_sizeof(loaded)
+        size_before = directory_size(before)
+
+        # Après : annonces sans message_ids + un journal binaire par annonce
+        after = os.path.join(tmp, 'after')
+        atomic_write_json(os.path.join(after, 'broadcasts.json'), broadcasts)
+        storage = JsonStorage(broadcasts_file=os.path.join(after, 'broadcasts.json'), data_dir=after)
+        storage.load_broadcasts()  # conversion de l'ancien format
+        os.remove(storage._deliveries_file(last_id))
+        deliveries = DeliveryStore(storage)
+        start = time.perf_counter()
+        for user_id, message_id in new_records:
+            deliveries.record(last_id, user_id, message_id)
+        deliveries.flush()
+        save_after = time.perf_counter() - start
+        deliveries.release(last_id)
+        start = time.perf_counter()
+        loaded = storage.load_broadcasts()
+        load_after = time.perf_counter() - start
+        memory_after = deep_sizeof(loaded)
+        size_after = directory_size(after)
+
+        start = time.perf_counter()
+        log = deliveries.get(last_id)
+        found = sum(1 for user_id, _ in new_records if log.get(user_id) is not None)
+        lookup = time.perf_counter() - start
+        log_memory = sys.getsizeof(log.users) + sys.getsizeof(log.messages)
+        dict_memory = deep_sizeof(broadcasts[last_id]['message_ids'])
+
+    rows = [
+        ("Taille sur disque", f"{size_before / 1e6:.1f} Mo", f"{size_after / 1e6:.1f} Mo"),
+        ("Sauvegarde après un envoi", f"{save_before * 1000:.0f} ms", f"{save_after * 1000:.0f} ms"),
+        ("Chargement des annonces", f"{load_before * 1000:.0f} ms", f"{load_after * 1000:.0f} ms"),
+        ("Mémoire des annonces chargées", f"{memory_before / 1e6:.1f} Mo", f"{memory_after / 1e6:.3f} Mo"),
+        ("Mémoire d'une annonce (envois)", f"{dict_memory / 1e6:.2f} Mo", f"{log_memory / 1e6:.2f} Mo"),
+    ]
+    print(f"{nb_broadcasts} annonces x {nb_users} utilisateurs")
+    print(f"{'':<32} {'avant':>10} {'après':>10}")
+    for label, value_before, value_after in rows:
+        print(f"{label:<32} {value_before:>10} {value_after:>10}")
+    print(f"Recherche de {found} message_ids dans le journal chargé : {lookup * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
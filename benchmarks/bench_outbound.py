@@ -0,0 +1,72 @@
+"""Benchmark : latence des réponses aux clients pendant une diffusion
+
+Avant : un seul seau à jetons servi dans l'ordre d'arrivée (les réponses attendent
+derrière les envois de masse déjà en file).
+Après : PriorityTokenBucket, voie interactive prioritaire sur la voie de masse.
+
+Usage : python benchmarks/bench_outbound.py [débit] [durée_s] [clics_par_s]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.broadcast import TokenBucket
+from modules.outbound import PriorityTokenBucket
+
+
+async def simulate(acquire, rate, duration, clicks_per_second, concurrency=20):
+    random.seed(1)
+    latencies = []
+    bulk_sent = 0
+    deadline = time.monotonic() + duration
+
+    async def bulk_worker():
+        nonlocal bulk_sent
+        while time.monotonic() < deadline:
+            await acquire('bulk')
+            bulk_sent += 1
+
+    async def clicks():
+        tasks = []
+        while time.monotonic() < deadline:
+            await asyncio.sleep(random.expovariate(clicks_per_second))
+            tasks.append(asyncio.create_task(click()))
+        await asyncio.gather(*tasks)
+
+    async def click():
+        start = time.monotonic()
+        await acquire('interactive')
+        latencies.append(time.monotonic() - start)
+
+    await asyncio.gather(clicks(), *(bulk_worker() for _ in range(concurrency)))
+    return latencies, bulk_sent
+
+
+def describe(latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    return f"moy. {statistics.mean(latencies) * 1000:6.0f} ms, p95 {p95 * 1000:6.0f} ms, max {latencies[-1] * 1000:6.0f} ms"
+
+
+async def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 25.0
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    clicks_per_second = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+
+    fifo = TokenBucket(rate)
+    latencies, bulk = await simulate(lambda lane: fifo.acquire(), rate, duration, clicks_per_second)
+    print(f"Avant : {len(latencies)} réponses, {describe(latencies)} ({bulk} envois de masse)")
+
+    shared = PriorityTokenBucket(rate)
+    latencies, bulk = await simulate(shared.acquire, rate, duration, clicks_per_second)
+    print(f"Après : {len(latencies)} réponses, {describe(latencies)} ({bulk} envois de masse)")
+    print(shared.report())
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Benchmark : calcul des destinataires d'une annonce ciblée
+
+Avant : parcours de toutes les fiches utilisateurs, avec parsing de last_seen
+(ou recherche dans les listes de groupes) pour chacune.
+Après : SegmentIndex (liste triée des activités, sets par groupe, bitmaps par catégorie).
+
+Usage : python benchmarks/bench_segments.py [nb_utilisateurs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.segments import SegmentIndex
+from modules.storage import JsonStorage
+
+FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def build(nb_users):
+    random.seed(1)
+    now = datetime(2024, 6, 1)
+    users = {
+        str(1_000_000 + u): {
+            'username': f"user{u}",
+            'last_seen': (now - timedelta(seconds=random.randrange(90 * 86400))).strftime(FORMAT)
+        }
+        for u in range(nb_users)
+    }
+    user_ids = [int(user_id) for user_id in users]
+    groups = {'vip': random.sample(user_ids, nb_users // 20), 'pro': random.sample(user_ids, nb_users // 50)}
+    viewers = random.sample(user_ids, nb_users // 10)
+    return now, users, groups, viewers
+
+
+def active_before(users, cutoff):
+    return [int(user_id) for user_id, data in users.items()
+            if datetime.strptime(data['last_seen'], FORMAT) >= cutoff]
+
+
+def group_before(users, groups, group):
+    return [int(user_id) for user_id in users if int(user_id) in groups[group]]
+
+
+def timed(function, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    nb_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    now, users, groups, viewers = build(nb_users)
+    cutoff = now - timedelta(days=7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SegmentIndex(JsonStorage(data_dir=tmp), lambda: groups, lambda: 1)
+        start = time.perf_counter()
+        index.load_last_seen(users)
+        build_time = time.perf_counter() - start
+        for user_id in viewers:
+            index.record_view('c1', user_id)
+
+        rows = []
+        before, expected = timed(lambda: active_before(users, cutoff), repeat=1)
+        after, result = timed(lambda: index.seen_since(cutoff.strftime(FORMAT)))
+        assert sorted(result) == sorted(expected)
+        rows.append(("Actifs 7 jours", before, after, len(result)))
+
+        before, expected = timed(lambda: group_before(users, groups, 'vip'), repeat=1)
+        after, result = timed(lambda: index.group('vip'))
+        assert set(result) == set(expected)
+        rows.append(("Groupe", before, after, len(result)))
+
+        after, result = timed(lambda: index.viewers('c1'))
+        assert sorted(result) == sorted(viewers)
+        rows.append(("Catégorie consultée", None, after, len(result)))
+
+    print(f"{nb_users} utilisateurs (construction de l'index d'activité : {build_time * 1000:.0f} ms)")
+    print(f"{'':<22} {'avant':>10} {'après':>10} {'destinataires':>14}")
+    for label, before, after, count in rows:
+        before = f"{before * 1000:.1f} ms" if before is not None else "-"
+        print(f"{label:<22} {before:>10} {f'{after * 1000:.1f} ms':>10} {count:>14}")
+
+
+if __name__ == '__main__':
+    main()
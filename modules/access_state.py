@@ -0,0 +1,83 @@
+class AccessState:
+    """État d'accès de référence en mémoire.
+
+    Les utilisateurs autorisés et bannis sont gardés dans des sets (test en O(1)) ;
+    la source (fichier ou base) n'est relue que si sa signature a changé,
+    c'est-à-dire si elle a été modifiée par un autre processus.
+    """
+
+    name = 'access_codes'
+
+    def __init__(self, storage):
+        self.storage = storage
+        # Incrémentée à chaque changement, pour invalider les caches dépendants
+        self.version = 0
+        self.data = {}
+        self.authorized = set()
+        self.banned = set()
+        self.reloads = 0
+        self._signature = None
+        self.reload()
+
+    def reload(self):
+        """Relit les codes d'accès depuis le stockage"""
+        self._signature = self.storage.access_codes_signature()
+        try:
+            data = self.storage.load_access_codes()
+        except Exception as e:
+            print(f"Unexpected error loading access codes: {e}")
+            data = {"authorized_users": []}
+        self.data = data
+        self.authorized = set(data.get("authorized_users", []))
+        self.banned = set(data.get("banned_users", []))
+        self.reloads += 1
+        self.version += 1
+        return self.data
+
+    def refresh(self) -> bool:
+        """Recharge seulement si la source a été modifiée de l'extérieur"""
+        if self.storage.access_codes_signature() != self._signature:
+            self.reload()
+            return True
+        return False
+
+    def mark_written(self):
+        """À appeler après une écriture de notre part : la nouvelle signature est la nôtre"""
+        self._signature = self.storage.access_codes_signature()
+        self.version += 1
+
+    def is_authorized(self, user_id) -> bool:
+        return int(user_id) in self.authorized
+
+    def is_banned(self, user_id) -> bool:
+        return int(user_id) in self.banned
+
+    def authorize(self, user_id: int) -> bool:
+        """Ajoute l'utilisateur aux autorisés. Retourne False s'il l'était déjà."""
+        if user_id in self.authorized:
+            return False
+        self.authorized.add(user_id)
+        self.data.setdefault("authorized_users", []).append(user_id)
+        return True
+
+    def deauthorize(self, user_id: int) -> bool:
+        if user_id not in self.authorized:
+            return False
+        self.authorized.discard(user_id)
+        self.data["authorized_users"].remove(user_id)
+        return True
+
+    def ban(self, user_id: int) -> bool:
+        """Ajoute l'utilisateur aux bannis. Retourne False s'il l'était déjà."""
+        if user_id in self.banned:
+            return False
+        self.banned.add(user_id)
+        self.data.setdefault("banned_users", []).append(user_id)
+        return True
+
+    def unban(self, user_id: int) -> bool:
+        if user_id not in self.banned:
+            return False
+        self.banned.discard(user_id)
+        self.data["banned_users"].remove(user_id)
+        return True
@@ -0,0 +1,263 @@
+import asyncio
+import random
+import time
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from modules.outbound import CircuitOpen, bulk_lane, retry_seconds
+
+
+def permanent_failure(error: Exception):
+    """Raison d'un échec définitif ('blocked', 'deactivated', 'not_found'), None sinon"""
+    message = str(error).lower()
+    if isinstance(error, Forbidden):
+        return 'deactivated' if 'deactivated' in message else 'blocked'
+    if isinstance(error, BadRequest) and ('chat not found' in message or 'user not found' in message):
+        return 'not_found'
+    return None
+
+
+class TokenBucket:
+    """Seau à jetons : au plus rate envois par seconde, rafales de capacity envois.
+
+    La capacité par défaut est d'un jeton : les envois sont régulièrement espacés, sans
+    rafale au démarrage qui dépasserait la limite de Telegram sur la première seconde.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Suspend tous les envois (RetryAfter de Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        # Le verrou sert les attentes dans l'ordre d'arrivée
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BroadcastResult:
+    """Compte rendu d'un envoi groupé"""
+
+    def __init__(self, total: int, on_result=None, should_stop=None):
+        self.total = total
+        # on_result(chat_id, état, erreur) est appelé à chaque destinataire traité
+        self.on_result = on_result
+        # should_stop() renvoie True pour interrompre l'envoi (pause, annulation)
+        self.should_stop = should_stop
+        self.success = 0
+        self.failed = 0
+        self.retried = 0
+        # Type d'erreur -> nombre d'échecs
+        self.errors = {}
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        # Secondes à attendre avant de reprendre si l'envoi a été interrompu (API dégradée)
+        self.resume_after = None
+
+    def fail(self, chat_id, error: Exception):
+        self.failed += 1
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+        print(f"Error sending to user {chat_id}: {error}")
+        if self.on_result is not None:
+            self.on_result(chat_id, 'blocked' if permanent_failure(error) else 'failed', error)
+
+    def succeed(self, chat_id):
+        self.success += 1
+        if self.on_result is not None:
+            self.on_result(chat_id, 'sent')
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+
+    def interrupt(self, seconds: float):
+        """API dégradée : les chats restants ne sont pas servis, à reprendre dans seconds"""
+        self.resume_after = max(self.resume_after or 0.0, seconds)
+
+    @property
+    def interrupted(self) -> bool:
+        return self.resume_after is not None
+
+    @property
+    def stopped(self) -> bool:
+        return self.interrupted or (self.should_stop is not None and self.should_stop())
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.success - self.failed
+
+    @property
+    def rate(self) -> float:
+        """Envois réussis par seconde (depuis le début si l'envoi est en cours)"""
+        elapsed = self.elapsed or time.monotonic() - self.started
+        return self.success / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self):
+        """Secondes restantes estimées au débit actuel, None tant qu'il est inconnu"""
+        return self.remaining / self.rate if self.rate else None
+
+    def summary(self) -> str:
+        lines = [
+            f"• Envois réussis : {self.success}",
+            f"• Échecs : {self.failed}",
+            f"• Total : {self.success + self.failed}",
+            f"• Durée : {self.elapsed:.1f} s ({self.rate:.1f} msg/s)",
+        ]
+        if self.retried:
+            lines.append(f"• Nouvelles tentatives : {self.retried}")
+        if self.errors:
+            lines.append("• Erreurs : " + ", ".join(f"{name} ({count})" for name, count in self.errors.items()))
+        return "\n".join(lines)
+
+
+class BroadcastEngine:
+    """Envoi d'un message à de nombreux utilisateurs.
+
+    Les envois partent en parallèle (concurrency tâches au plus), limités par un seau à
+    jetons global (~30 messages/s chez Telegram) et un intervalle minimal par chat.
+    Un RetryAfter suspend tous les envois pendant la durée demandée ; les erreurs réseau
+    transitoires sont retentées avec un délai exponentiel (avec gigue) ; les autres erreurs
+    (utilisateur qui a bloqué le bot, chat introuvable...) sont comptées comme échecs.
+
+    Les appels faits pendant un envoi passent par la voie de masse de l'OutboundRateLimiter.
+    Si son disjoncteur refuse un appel (CircuitOpen), l'envoi s'interrompt : les chats
+    restants ne sont pas servis et result.resume_after indique quand reprendre.
+    Avec rate=None, l'engine n'a pas de seau propre : c'est le limiteur de l'application,
+    partagé avec les réponses aux clients, qui rythme les envois.
+    """
+
+    def __init__(self, rate: float = 25.0, concurrency: int = 20, per_chat_interval: float = 1.0,
+                 max_retries: int = 5, base_delay: float = 1.0):
+        self.bucket = TokenBucket(rate) if rate else None
+        self.concurrency = concurrency
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        # chat_id -> prochain envoi autorisé
+        self._chat_next = {}
+
+    async def throttle(self):
+        """Attend un jeton avant un appel supplémentaire (sans effet si le limiteur de l'application rythme les appels)"""
+        if self.bucket is not None:
+            await self.bucket.acquire()
+
+    def _pause(self, seconds: float):
+        if self.bucket is not None:
+            self.bucket.pause(seconds)
+
+    async def _wait_chat(self, chat_id):
+        now = time.monotonic()
+        ready = self._chat_next.get(chat_id, now)
+        self._chat_next[chat_id] = max(ready, now) + self.per_chat_interval
+        if ready > now:
+            await asyncio.sleep(ready - now)
+
+    async def _deliver(self, chat_id, send, result: BroadcastResult):
+        attempt = 0
+        while True:
+            await self._wait_chat(chat_id)
+            await self.throttle()
+            if result.stopped:
+                # Interrompu pendant l'attente : le chat reste à servir
+                return
+            try:
+                await send(chat_id)
+            except CircuitOpen as e:
+                # Refusé sans appel à l'API : le chat reste à servir
+                result.interrupt(e.retry_after)
+                return
+            except RetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    result.fail(chat_id, e)
+                    return
+                result.retried += 1
+                self._pause(retry_seconds(e.retry_after))
+            except (BadRequest, Forbidden) as e:
+                # BadRequest hérite de NetworkError mais ne sert à rien de retenter
+                result.fail(chat_id, e)
+                return
+            except NetworkError as e:
+                # TimedOut compris
+                attempt += 1
+                if attempt > self.max_retries:
+                    result.fail(chat_id, e)
+                    return
+                result.retried += 1
+                # Gigue : les tâches d'envoi ne reviennent pas toutes au même instant
+                await asyncio.sleep(random.uniform(0.5, 1.0) * self.base_delay * 2 ** (attempt - 1))
+            except Exception as e:
+                result.fail(chat_id, e)
+                return
+            else:
+                result.succeed(chat_id)
+                return
+
+    def _prune_chats(self):
+        now = time.monotonic()
+        for chat_id in [c for c, ready in self._chat_next.items() if ready <= now]:
+            del self._chat_next[chat_id]
+
+    async def _report_progress(self, result: BroadcastResult, on_progress, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await on_progress(result)
+            except Exception as e:
+                print(f"Erreur lors du suivi de l'envoi : {e}")
+
+    async def run(self, chat_ids, send, on_result=None, should_stop=None,
+                  on_progress=None, progress_interval: float = 5.0) -> BroadcastResult:
+        """Appelle send(chat_id) pour chaque chat et retourne le compte rendu.
+
+        on_result(chat_id, état, erreur) reçoit 'sent', 'failed' ou 'blocked' (échec définitif)
+        pour chaque chat, avec l'erreur éventuelle.
+        Si should_stop() renvoie True, les envois en cours se terminent et les chats
+        restants ne sont pas servis. on_progress(result) (coroutine) est appelée toutes
+        les progress_interval secondes pendant l'envoi.
+        """
+        chat_ids = list(chat_ids)
+        result = BroadcastResult(len(chat_ids), on_result, should_stop)
+        pending = iter(chat_ids)
+
+        async def worker():
+            # Toutes les tâches consomment le même itérateur
+            for chat_id in pending:
+                if result.stopped:
+                    return
+                await self._deliver(chat_id, send, result)
+
+        reporter = None
+        workers = min(self.concurrency, len(chat_ids))
+        try:
+            # Les tâches d'envoi et le suivi de l'avancement héritent de la voie de masse
+            with bulk_lane():
+                if on_progress is not None:
+                    reporter = asyncio.get_running_loop().create_task(
+                        self._report_progress(result, on_progress, progress_interval))
+                await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+        result.finish()
+        self._prune_chats()
+        return result
@@ -0,0 +1,383 @@
+import asyncio
+import time
+from array import array
+
+from modules.outbound import bulk_lane
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+# États d'un destinataire
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+# Codes enregistrés dans le journal des états (indice dans ce tuple)
+STATES = (PENDING, SENT, FAILED, BLOCKED)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+# Statuts d'une diffusion : queued -> running -> done, avec pause et annulation possibles
+FINISHED = ('done', 'cancelled')
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes} min {seconds:02d} s" if minutes else f"{seconds} s"
+
+
+class BroadcastJobQueue:
+    """File persistante des envois groupés.
+
+    Chaque diffusion est une tâche enregistrée dans le stockage (clé meta
+    'broadcast_jobs', sans les destinataires) ; l'état de chacun de ses destinataires
+    est tenu dans un journal à part, en ajout seul (storage.save_job_states). Une tâche
+    de fond exécute les diffusions l'une après l'autre via le BroadcastEngine ; seuls
+    les changements d'état sont écrits au fil de l'envoi (au plus une écriture par
+    checkpoint_interval), si bien qu'après un arrêt ou un plantage seuls les
+    destinataires encore en attente sont servis au redémarrage. Une diffusion terminée
+    ne garde que ses compteurs (job['counts']) et son journal est supprimé.
+
+    deliver(bot, job, chat_id) envoie le message d'un destinataire ; on_finish(bot, job,
+    result) est appelée en fin de diffusion (ou à l'annulation) ; on_progress(bot, job,
+    result) au plus toutes les progress_interval secondes pendant l'envoi et à chaque
+    changement de statut ; on_checkpoint() avant chaque sauvegarde des états (pour
+    écrire les messages envoyés). result vaut None si la diffusion ne tourne pas.
+    on_delivery(kind, chat_id, état, erreur) est appelée pour chaque destinataire traité,
+    avec le type de la diffusion ('send', 'resend', 'edit', 'retract').
+
+    Une pause ou une annulation laisse les envois en cours se terminer : les
+    destinataires non servis restent en attente. Une diffusion interrompue parce que
+    l'API est dégradée repasse en file et reprend à la fin du délai indiqué.
+    """
+
+    def __init__(self, engine, deliver, storage=None, checkpoint_interval: float = 2.0,
+                 on_checkpoint=None, on_finish=None, on_progress=None,
+                 progress_interval: float = 5.0, keep_finished: int = 20, on_delivery=None):
+        self.engine = engine
+        self.deliver = deliver
+        self.storage = storage or JsonStorage()
+        self.on_checkpoint = on_checkpoint
+        self.on_finish = on_finish
+        self.on_progress = on_progress
+        self.on_delivery = on_delivery
+        self.progress_interval = progress_interval
+        self.keep_finished = keep_finished
+        # job_id -> statut demandé ('paused' ou 'cancelled') pour la diffusion en cours
+        self._stop_requests = {}
+        data = self.storage.load_meta('broadcast_jobs')
+        if not isinstance(data, dict):
+            data = {}
+        self._next = data.get('next', 1)
+        self.jobs = dict(data.get('jobs', {}))
+        # job_id -> changements d'état pas encore écrits (paires chat_id, code)
+        self._changes = {}
+        # Diffusions terminées dont le journal est à supprimer après la prochaine sauvegarde
+        self._obsolete = set()
+        dirty = False
+        for job_id, job in self.jobs.items():
+            # Une diffusion interrompue reprend là où elle s'était arrêtée
+            if job['status'] == 'running':
+                job['status'] = 'queued'
+            if 'recipients' in job:
+                # Ancien format : les états étaient dans le document meta
+                dirty = True
+                if job['status'] not in FINISHED:
+                    self.storage.save_job_states(job_id, self._encode(job['recipients']), append=False)
+            elif 'counts' not in job:
+                job['recipients'] = self._decode(self.storage.load_job_states(job_id))
+            if job['status'] in FINISHED and 'counts' not in job:
+                # Terminée juste avant un arrêt : compteurs à enregistrer
+                self._archive(job)
+                dirty = True
+        self.writer = WriteBehindStore('broadcast_jobs', self._save, checkpoint_interval)
+        if dirty:
+            self.writer.mark_dirty()
+        self._bot = None
+        self._task = None
+        self._wakeup = None
+
+    @staticmethod
+    def _encode(recipients: dict) -> array:
+        pairs = array('q')
+        for chat_id, state in recipients.items():
+            pairs.extend((int(chat_id), STATE_CODES[state]))
+        return pairs
+
+    @staticmethod
+    def _decode(pairs: array) -> dict:
+        recipients = {}
+        for i in range(0, len(pairs), 2):
+            recipients[str(pairs[i])] = STATES[pairs[i + 1]]
+        return recipients
+
+    def _save(self):
+        # Les messages envoyés d'abord : un destinataire noté 'sent' a toujours son message enregistré
+        if self.on_checkpoint is not None:
+            self.on_checkpoint()
+        for job_id, pairs in list(self._changes.items()):
+            self.storage.save_job_states(job_id, pairs)
+            del self._changes[job_id]
+        jobs = {job_id: {key: value for key, value in job.items() if key != 'recipients'}
+                for job_id, job in self.jobs.items()}
+        self.storage.save_meta('broadcast_jobs', {'next': self._next, 'jobs': jobs})
+        # Les compteurs sont écrits : les journaux des diffusions terminées ne servent plus
+        for job_id in list(self._obsolete):
+            self.storage.delete_job_states(job_id)
+            self._obsolete.discard(job_id)
+
+    def _archive(self, job):
+        """Diffusion terminée : ne garde que ses compteurs"""
+        if 'recipients' not in job:
+            return
+        job['counts'] = self.counts(job)
+        del job['recipients']
+        self._changes.pop(job['id'], None)
+        self._obsolete.add(job['id'])
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
+
+    def reserve_id(self) -> str:
+        """Identifiant de la prochaine diffusion (pour l'annoncer avant de la soumettre)"""
+        job_id = str(self._next)
+        self._next += 1
+        return job_id
+
+    def submit(self, kind: str, broadcast_id: str, recipients, payload=None, notify=None, job_id=None) -> str:
+        """Enregistre une diffusion et la confie à la tâche de fond. Retourne son identifiant."""
+        job_id = job_id or self.reserve_id()
+        job = self.jobs[job_id] = {
+            'id': job_id,
+            'kind': kind,
+            'broadcast_id': broadcast_id,
+            'payload': payload or {},
+            'status': 'queued',
+            'created': time.time(),
+            'finished': None,
+            # Chat à prévenir en fin de diffusion : [chat_id, message_id]
+            'notify': notify,
+            'recipients': {str(chat_id): PENDING for chat_id in recipients},
+            'errors': {}
+        }
+        self.storage.save_job_states(job_id, self._encode(job['recipients']), append=False)
+        self._prune()
+        # La tâche est écrite tout de suite : elle survit à un arrêt avant le premier envoi
+        self.writer.mark_dirty()
+        self.writer.flush()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def active(self) -> list:
+        """Diffusions en attente ou en cours, de la plus ancienne à la plus récente"""
+        return sorted((job for job in self.jobs.values() if job['status'] in ('queued', 'running')),
+                      key=lambda job: job['created'])
+
+    @staticmethod
+    def pending(job) -> list:
+        """Destinataires en attente (aucun pour une diffusion terminée)"""
+        return [chat_id for chat_id, state in job.get('recipients', {}).items() if state == PENDING]
+
+    @staticmethod
+    def counts(job) -> dict:
+        if 'recipients' not in job:
+            return dict(job['counts'])
+        counts = {PENDING: 0, SENT: 0, FAILED: 0, BLOCKED: 0}
+        for state in job['recipients'].values():
+            counts[state] += 1
+        return counts
+
+    def summary(self, job, result=None) -> str:
+        """Rapport d'envoi d'une diffusion (result : compte rendu de la dernière exécution)"""
+        counts = self.counts(job)
+        labels = {'edit': "Mises à jour réussies", 'retract': "Retraits réussis"}
+        lines = [
+            f"• {labels.get(job['kind'], 'Envois réussis')} : {counts[SENT]}",
+            f"• Échecs : {counts[FAILED]}",
+        ]
+        if counts[BLOCKED]:
+            lines.append(f"• Injoignables : {counts[BLOCKED]}")
+        if counts[PENDING]:
+            label = "Non envoyés" if job['status'] == 'cancelled' else "En attente"
+            lines.append(f"• {label} : {counts[PENDING]}")
+        lines.append(f"• Total : {sum(counts.values())}")
+        if result is not None:
+            lines.append(f"• Durée : {result.elapsed:.1f} s ({result.rate:.1f} msg/s)")
+            if result.retried:
+                lines.append(f"• Nouvelles tentatives : {result.retried}")
+        if job['errors']:
+            lines.append("• Erreurs : " + ", ".join(f"{name} ({count})" for name, count in job['errors'].items()))
+        return "\n".join(lines)
+
+    def progress(self, job, result=None) -> str:
+        """Avancement d'une diffusion : envoyés, échecs, restants, débit et fin estimée"""
+        counts = self.counts(job)
+        lines = [
+            f"• Envoyés : {counts[SENT]} / {sum(counts.values())}",
+            f"• Échecs : {counts[FAILED] + counts[BLOCKED]}",
+            f"• Restants : {counts[PENDING]}",
+        ]
+        if result is not None and result.rate and job['status'] == 'running':
+            lines.append(f"• Débit : {result.rate:.1f} msg/s")
+            lines.append(f"• Fin estimée dans : {_duration(counts[PENDING] / result.rate)}")
+        return "\n".join(lines)
+
+    async def _notify(self, callback, job, result=None):
+        if callback is None:
+            return
+        try:
+            await callback(self._bot, job, result)
+        except Exception as e:
+            print(f"Erreur lors du suivi de la diffusion {job['id']} : {e}")
+
+    async def pause(self, job_id: str) -> bool:
+        """Met une diffusion en pause. Retourne False si elle n'est ni en file ni en cours."""
+        job = self.jobs.get(job_id)
+        if job is None or job['status'] not in ('queued', 'running'):
+            return False
+        if job['status'] == 'running':
+            # La tâche de fond s'arrête après les envois en cours et publie le nouvel état
+            self._stop_requests[job_id] = 'paused'
+            return True
+        job['status'] = 'paused'
+        self.writer.mark_dirty()
+        await self._notify(self.on_progress, job)
+        return True
+
+    async def resume(self, job_id: str) -> bool:
+        """Reprend une diffusion en pause"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        if job['status'] == 'running' and self._stop_requests.get(job_id) == 'paused':
+            del self._stop_requests[job_id]
+            return True
+        if job['status'] != 'paused':
+            return False
+        job['status'] = 'queued'
+        self.writer.mark_dirty()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        await self._notify(self.on_progress, job)
+        return True
+
+    async def cancel(self, job_id: str) -> bool:
+        """Annule une diffusion : les destinataires non servis ne recevront rien"""
+        job = self.jobs.get(job_id)
+        if job is None or job['status'] in FINISHED:
+            return False
+        if job['status'] == 'running':
+            self._stop_requests[job_id] = 'cancelled'
+            return True
+        job['status'] = 'cancelled'
+        job['finished'] = time.time()
+        self.writer.mark_dirty()
+        await self._notify(self.on_finish, job)
+        self._archive(job)
+        self.writer.mark_dirty()
+        return True
+
+    async def _run_job(self, job):
+        job['status'] = 'running'
+        self.writer.mark_dirty()
+
+        def on_result(chat_id, state, error=None):
+            job['recipients'][str(chat_id)] = state
+            self._changes.setdefault(job['id'], array('q')).extend((int(chat_id), STATE_CODES[state]))
+            self.writer.mark_dirty()
+            if self.on_delivery is not None:
+                self.on_delivery(job['kind'], chat_id, state, error)
+
+        async def on_progress(result):
+            await self.on_progress(self._bot, job, result)
+
+        result = await self.engine.run(
+            self.pending(job),
+            lambda chat_id: self.deliver(self._bot, job, chat_id),
+            on_result,
+            should_stop=lambda: job['id'] in self._stop_requests,
+            on_progress=on_progress if self.on_progress is not None else None,
+            progress_interval=self.progress_interval
+        )
+        for name, count in result.errors.items():
+            job['errors'][name] = job['errors'].get(name, 0) + count
+        requested = self._stop_requests.pop(job['id'], None)
+        if requested and self.pending(job):
+            job['status'] = requested
+        elif result.interrupted and self.pending(job):
+            # API dégradée : les destinataires restants sont servis à la fin du délai
+            job['status'] = 'queued'
+            asyncio.get_running_loop().call_later(result.resume_after, self._wakeup.set)
+        else:
+            job['status'] = 'done'
+        if job['status'] in FINISHED:
+            job['finished'] = time.time()
+        self.writer.mark_dirty()
+        self.writer.flush()
+        print(f"Diffusion {job['id']} ({job['status']}) : {result.success} envois, {result.failed} échecs "
+              f"en {result.elapsed:.1f} s")
+
+        if job['status'] == 'queued':
+            return
+        if job['status'] == 'paused':
+            await self._notify(self.on_progress, job, result)
+        else:
+            await self._notify(self.on_finish, job, result)
+            self._archive(job)
+            self.writer.mark_dirty()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            for job in self.active():
+                if job['status'] != 'queued':
+                    # Mise en pause ou annulée pendant la diffusion précédente
+                    continue
+                try:
+                    await self._run_job(job)
+                    if job['status'] == 'queued':
+                        # Interrompue (API dégradée) : les suivantes attendent la reprise
+                        break
+                except Exception as e:
+                    # La diffusion repasse en file (reprise au prochain réveil), sauf pause ou
+                    # annulation demandée pendant l'envoi
+                    print(f"Erreur lors de la diffusion {job['id']} : {e}")
+                    requested = self._stop_requests.pop(job['id'], None)
+                    job['status'] = requested or 'queued'
+                    if requested == 'cancelled':
+                        job['finished'] = time.time()
+                    self.writer.mark_dirty()
+                    self.writer.flush()
+                    if requested == 'cancelled':
+                        await self._notify(self.on_finish, job)
+                        self._archive(job)
+                        self.writer.mark_dirty()
+                    elif requested == 'paused':
+                        await self._notify(self.on_progress, job)
+                    break
+            await self._wakeup.wait()
+
+    def start(self, bot):
+        """Démarre la tâche de fond et reprend les diffusions interrompues"""
+        if self._task is not None and not self._task.done():
+            return
+        self._bot = bot
+        self.writer.start()
+        self._wakeup = asyncio.Event()
+        if self.active():
+            self._wakeup.set()
+        # Suivi et rapports de fin passent, comme les envois, par la voie de masse
+        with bulk_lane():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Interrompt la diffusion en cours (reprise au redémarrage) et sauvegarde les états"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.writer.stop()
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+
+class BroadcastScheduler:
+    """Annonces programmées, persistées et déclenchées par une tâche de fond.
+
+    Les programmations sont enregistrées dans le stockage (clé meta 'broadcast_schedule')
+    et rangées dans un tas par heure d'envoi : la tâche de fond dort jusqu'à la plus
+    proche, sans parcourir les autres. Une annulation laisse son entrée dans le tas,
+    ignorée au réveil. Au redémarrage, les annonces dont l'heure est passée partent
+    tout de suite ; une annonce répétée saute les occurrences manquées. Une répétition
+    d'un nombre entier de jours garde la même heure locale (fuseau tz, Paris par
+    défaut) d'un changement d'heure à l'autre.
+
+    fire(bot, entry) lance l'envoi d'une annonce (entry['broadcast'], entry['payload'],
+    entry['segment']...).
+    """
+
+    def __init__(self, fire, storage=None, flush_interval: float = 1.0, tz=None):
+        self.fire = fire
+        self.tz = tz or pytz.timezone('Europe/Paris')
+        self.storage = storage or JsonStorage()
+        data = self.storage.load_meta('broadcast_schedule')
+        if not isinstance(data, dict):
+            data = {}
+        self._next = data.get('next', 1)
+        self.entries = dict(data.get('entries', {}))
+        self._heap = [(entry['run_at'], entry_id) for entry_id, entry in self.entries.items()]
+        heapq.heapify(self._heap)
+        self.writer = WriteBehindStore('broadcast_schedule', self._save, flush_interval)
+        self._bot = None
+        self._task = None
+        self._wakeup = None
+
+    def _save(self):
+        self.storage.save_meta('broadcast_schedule', {'next': self._next, 'entries': self.entries})
+
+    def _push(self, entry):
+        heapq.heappush(self._heap, (entry['run_at'], entry['id']))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _local(self, entry) -> datetime:
+        """Heure locale prévue de la prochaine occurrence (sans fuseau)"""
+        if entry.get('local'):
+            return datetime.strptime(entry['local'], "%Y-%m-%d %H:%M:%S")
+        return datetime.fromtimestamp(entry['run_at'], self.tz).replace(tzinfo=None)
+
+    def _advance(self, entry):
+        """Passe à l'occurrence suivante d'une annonce répétée"""
+        days, rest = divmod(entry['repeat'], 86400)
+        if rest:
+            entry['run_at'] += entry['repeat']
+            return
+        # Même heure locale n jours plus tard : l'écart varie d'une heure aux changements d'heure
+        local = self._local(entry) + timedelta(days=days)
+        entry['local'] = local.strftime("%Y-%m-%d %H:%M:%S")
+        entry['run_at'] = self.tz.localize(local).timestamp()
+
+    def add(self, run_at: float, repeat: float = None, **fields) -> str:
+        """Programme une annonce à run_at (timestamp), répétée toutes les repeat secondes si précisé
+        (par jours entiers : à la même heure locale)"""
+        entry_id = str(self._next)
+        self._next += 1
+        entry = dict(fields, id=entry_id, run_at=run_at, repeat=repeat, created=time.time())
+        if repeat:
+            entry['local'] = self._local(entry).strftime("%Y-%m-%d %H:%M:%S")
+        self.entries[entry_id] = entry
+        # Écrite tout de suite : la programmation survit à un arrêt immédiat
+        self.writer.mark_dirty()
+        self.writer.flush()
+        self._push(entry)
+        return entry_id
+
+    def cancel(self, entry_id: str) -> bool:
+        if self.entries.pop(entry_id, None) is None:
+            return False
+        self.writer.mark_dirty()
+        self.writer.flush()
+        return True
+
+    def upcoming(self) -> list:
+        """Annonces programmées, de la plus proche à la plus lointaine"""
+        return sorted(self.entries.values(), key=lambda entry: entry['run_at'])
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            run_at, entry_id = heapq.heappop(self._heap)
+            entry = self.entries.get(entry_id)
+            # Entrée annulée ou reprogrammée depuis
+            if entry is None or entry['run_at'] != run_at:
+                continue
+            due.append(entry)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            for entry in self._pop_due(now):
+                if entry['repeat']:
+                    while entry['run_at'] <= now:
+                        self._advance(entry)
+                    self._push(entry)
+                else:
+                    del self.entries[entry['id']]
+                # État sauvegardé avant l'envoi : une annonce n'est jamais déclenchée deux fois
+                self.writer.mark_dirty()
+                self.writer.flush()
+                try:
+                    await self.fire(self._bot, entry)
+                except Exception as e:
+                    print(f"Erreur lors de l'envoi de l'annonce programmée {entry['id']} : {e}")
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, bot):
+        """Démarre la tâche de fond (les annonces en retard partent tout de suite)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._bot = bot
+        self.writer.start()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.writer.stop()
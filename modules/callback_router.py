@@ -0,0 +1,113 @@
+import re
+import time
+
+
+class RouteStats:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+
+class CallbackRouter:
+    """Aiguillage des callback_data vers leurs fonctions.
+
+    Une valeur exacte est résolue par un dict ; sinon on cherche le plus long préfixe
+    enregistré dans un trie (un caractère par niveau), si bien que "edit_cat_name_"
+    l'emporte sur "edit_cat_" quel que soit l'ordre d'enregistrement.
+    Le nombre d'appels et la durée sont mesurés par route.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._trie = {}
+        self.stats = {}
+
+    def exact(self, data: str, handler):
+        self._exact[data] = (data, handler)
+        return handler
+
+    def prefix(self, prefix: str, handler):
+        node = self._trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # La clé None ne peut pas être un caractère : elle porte la route du nœud
+        node[None] = (f"{prefix}*", handler)
+        return handler
+
+    def resolve(self, data: str):
+        """(route, fonction) pour data, ou (None, None) si aucune route ne correspond"""
+        route = self._exact.get(data)
+        if route is not None:
+            return route
+
+        best = (None, None)
+        node = self._trie
+        for char in data:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                best = node[None]
+        return best
+
+    async def dispatch(self, data: str, *args):
+        route, handler = self.resolve(data or "")
+        if handler is None:
+            print(f"Callback non géré : {data}")
+            return None
+
+        start = time.perf_counter()
+        try:
+            return await handler(*args)
+        finally:
+            stats = self.stats.get(route)
+            if stats is None:
+                stats = self.stats[route] = RouteStats()
+            stats.add(time.perf_counter() - start)
+
+    def report(self, limit: int = 20) -> str:
+        """Routes les plus appelées avec leur durée moyenne et maximale"""
+        routes = sorted(self.stats.items(), key=lambda item: item[1].count, reverse=True)[:limit]
+        lines = []
+        for route, stats in routes:
+            lines.append(f"{route}: {stats.count} appels, "
+                         f"moy {stats.total / stats.count * 1000:.1f} ms, max {stats.max * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+class PatternDispatcher:
+    """Remplace une liste de CallbackQueryHandler(fonction, pattern=...) par un seul handler.
+
+    Les motifs sont compilés en une seule alternance, testée dans l'ordre de la liste :
+    comme avec les handlers séparés, le premier motif qui correspond l'emporte.
+    Sans correspondance, default est appelée (ou rien si default vaut None).
+    """
+
+    def __init__(self, routes, default=None):
+        self.routes = list(routes)
+        self.default = default
+        self._handlers = [handler for _, handler in self.routes]
+        self._regex = re.compile("|".join(
+            f"(?P<r{index}>{pattern})" for index, (pattern, _) in enumerate(self.routes)))
+
+    def resolve(self, data):
+        match = self._regex.match(data) if data is not None else None
+        if match is None:
+            return self.default
+        # Le groupe nommé englobe tout le motif : c'est lui qui se termine en dernier
+        return self._handlers[int(match.lastgroup[1:])]
+
+    async def dispatch(self, update, context):
+        handler = self.resolve(update.callback_query.data)
+        if handler is None:
+            return None
+        return await handler(update, context)
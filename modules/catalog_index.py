@@ -0,0 +1,61 @@
+def media_order(media: dict):
+    return media.get('order_index', 0)
+
+
+def sort_media(product: dict) -> dict:
+    """Trie les médias du produit sur place par order_index"""
+    if product.get('media'):
+        product['media'].sort(key=media_order)
+    return product
+
+
+def sort_catalog_media(catalog: dict) -> dict:
+    """Range les médias de tous les produits dans l'ordre d'affichage"""
+    for category, products in catalog.items():
+        if category == 'stats' or not isinstance(products, list):
+            continue
+        for product in products:
+            if isinstance(product, dict):
+                sort_media(product)
+    return catalog
+
+
+class CatalogIndex:
+    """Index nom -> produit par catégorie.
+
+    Toutes les modifications du catalogue passent par save_catalog (ou un rechargement),
+    qui change la version : l'index d'une catégorie est alors reconstruit au premier
+    accès, et chaque recherche de produit est un accès direct au dict.
+    """
+
+    def __init__(self, get_catalog, version_fn):
+        self.get_catalog = get_catalog
+        self.version_fn = version_fn
+        self.rebuilds = 0
+        self._version = None
+        self._by_name = {}
+
+    def _category_index(self, category: str) -> dict:
+        version = self.version_fn()
+        if version != self._version:
+            self._version = version
+            self._by_name = {}
+
+        index = self._by_name.get(category)
+        if index is None:
+            index = {}
+            for product in self.get_catalog().get(category, []):
+                if isinstance(product, dict):
+                    # Le premier produit d'un nom fait foi, comme avec next(...)
+                    index.setdefault(product.get('name'), product)
+            self._by_name[category] = index
+            self.rebuilds += 1
+        return index
+
+    def product(self, category: str, name: str):
+        """Produit nommé name dans la catégorie, None s'il n'existe pas"""
+        return self._category_index(category).get(name)
+
+    def __contains__(self, key) -> bool:
+        category, name = key
+        return name in self._category_index(category)
@@ -0,0 +1,229 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+def _broadcast_time(broadcast_id: str, broadcast: dict):
+    """Date du dernier envoi d'une annonce (l'identifiant est l'horodatage de création)"""
+    if 'delivered_at' in broadcast:
+        return broadcast['delivered_at']
+    try:
+        return float(broadcast_id)
+    except ValueError:
+        return None
+
+
+class DeliveryLog:
+    """Messages envoyés pour une annonce : user_id -> message_ids (un par envoi ou renvoi).
+
+    Les enregistrements sont rangés dans deux array('q') triés par (user_id, message_id)
+    (16 octets par message, recherche par dichotomie). Les nouveaux enregistrements
+    passent par un petit dict, fusionné dans les tableaux au-delà de merge_threshold
+    utilisateurs.
+    """
+
+    def __init__(self, pairs=None, merge_threshold: int = 4096):
+        self.users = array('q')
+        self.messages = array('q')
+        self.merge_threshold = merge_threshold
+        # Enregistrements pas encore fusionnés (user_id -> [message_id]), et paires pas encore écrites
+        self._recent = {}
+        self._unsaved = array('q')
+        # True si les paires chargées contenaient des doublons (fichier à compacter)
+        self.compactable = False
+        if pairs:
+            unique = sorted(set(zip(pairs[0::2], pairs[1::2])))
+            self.compactable = len(unique) * 2 != len(pairs)
+            for user_id, message_id in unique:
+                self.users.append(user_id)
+                self.messages.append(message_id)
+
+    def _range(self, user_id: int):
+        return bisect_left(self.users, user_id), bisect_right(self.users, user_id)
+
+    def messages_for(self, user_id) -> list:
+        """Tous les messages envoyés à user_id, du plus ancien au plus récent"""
+        user_id = int(user_id)
+        start, end = self._range(user_id)
+        messages = list(self.messages[start:end])
+        messages.extend(self._recent.get(user_id, ()))
+        return sorted(set(messages))
+
+    def get(self, user_id):
+        """Dernier message envoyé à user_id, None s'il n'a rien reçu"""
+        messages = self.messages_for(user_id)
+        return messages[-1] if messages else None
+
+    def __contains__(self, user_id) -> bool:
+        user_id = int(user_id)
+        if user_id in self._recent:
+            return True
+        start, end = self._range(user_id)
+        return end > start
+
+    def __len__(self) -> int:
+        """Nombre de destinataires"""
+        return len(self.user_ids())
+
+    def add(self, user_id, message_id: int):
+        user_id = int(user_id)
+        self._recent.setdefault(user_id, []).append(message_id)
+        self._unsaved.extend((user_id, message_id))
+        if len(self._recent) >= self.merge_threshold:
+            self._merge()
+
+    def _merge(self):
+        if not self._recent:
+            return
+        added = sorted({(user_id, message_id)
+                        for user_id, messages in self._recent.items() for message_id in messages})
+        self._recent = {}
+        users, messages = array('q'), array('q')
+        previous = None
+        for pair in heapq.merge(zip(self.users, self.messages), added):
+            if pair != previous:
+                users.append(pair[0])
+                messages.append(pair[1])
+                previous = pair
+        self.users, self.messages = users, messages
+
+    def items(self):
+        """(user_id, message_id) par user_id puis message_id croissants"""
+        self._merge()
+        return zip(self.users, self.messages)
+
+    def user_ids(self) -> list:
+        """Destinataires, sans doublon, par user_id croissant"""
+        self._merge()
+        user_ids = []
+        for user_id in self.users:
+            if not user_ids or user_ids[-1] != user_id:
+                user_ids.append(user_id)
+        return user_ids
+
+    def missing(self, user_ids) -> list:
+        """Parmi user_ids, ceux qui n'ont rien reçu.
+
+        Parcours simultané des identifiants triés et de la colonne users : O(n log n + m)
+        au lieu d'une recherche par utilisateur.
+        """
+        self._merge()
+        missing = []
+        users = self.users
+        index, size = 0, len(users)
+        for user_id in sorted({int(user_id) for user_id in user_ids}):
+            while index < size and users[index] < user_id:
+                index += 1
+            if index == size or users[index] != user_id:
+                missing.append(user_id)
+        return missing
+
+    def discard(self, user_ids):
+        """Oublie tous les messages des utilisateurs donnés (après un retrait)"""
+        user_ids = {int(user_id) for user_id in user_ids}
+        self._merge()
+        users, messages = array('q'), array('q')
+        for user_id, message_id in zip(self.users, self.messages):
+            if user_id not in user_ids:
+                users.append(user_id)
+                messages.append(message_id)
+        self.users, self.messages = users, messages
+
+    def pairs(self) -> array:
+        """Tous les enregistrements, en paires alternées (pour une réécriture complète)"""
+        pairs = array('q')
+        for user_id, message_id in self.items():
+            pairs.extend((user_id, message_id))
+        return pairs
+
+    def take_unsaved(self) -> array:
+        """Paires ajoutées depuis le dernier appel, à ajouter au stockage"""
+        unsaved, self._unsaved = self._unsaved, array('q')
+        return unsaved
+
+    def restore_unsaved(self, pairs: array):
+        """Remet des paires dont l'écriture a échoué"""
+        pairs.extend(self._unsaved)
+        self._unsaved = pairs
+
+
+class DeliveryStore:
+    """Enregistrements d'envoi des annonces, séparés des annonces elles-mêmes.
+
+    Le journal d'une annonce n'est chargé que lorsqu'on en a besoin (modification,
+    renvoi, retrait) et libéré ensuite ; les nouveaux envois sont ajoutés au stockage
+    sans réécrire l'existant. Les enregistrements des annonces dont le dernier envoi
+    date de plus de retention_days jours sont supprimés par prune().
+    """
+
+    def __init__(self, storage, retention_days: float = 30.0):
+        self.storage = storage
+        self.retention_days = retention_days
+        self._logs = {}
+        self._dirty = set()
+
+    def get(self, broadcast_id: str) -> DeliveryLog:
+        log = self._logs.get(broadcast_id)
+        if log is None:
+            log = DeliveryLog(self.storage.load_deliveries(broadcast_id))
+            if log.compactable:
+                self.storage.save_deliveries(broadcast_id, log.pairs(), append=False)
+                log.compactable = False
+            self._logs[broadcast_id] = log
+        return log
+
+    def record(self, broadcast_id: str, user_id, message_id: int):
+        self.get(broadcast_id).add(user_id, message_id)
+        self._dirty.add(broadcast_id)
+
+    def forget(self, broadcast_id: str, user_ids):
+        """Supprime les enregistrements de user_ids (messages retirés) et réécrit le journal"""
+        log = self.get(broadcast_id)
+        log.discard(user_ids)
+        log.take_unsaved()
+        self._dirty.discard(broadcast_id)
+        self.storage.save_deliveries(broadcast_id, log.pairs(), append=False)
+
+    def flush(self):
+        """Ajoute au stockage les enregistrements des annonces modifiées"""
+        broadcast_ids, self._dirty = self._dirty, set()
+        for broadcast_id in broadcast_ids:
+            log = self._logs.get(broadcast_id)
+            if log is None:
+                continue
+            pairs = log.take_unsaved()
+            if not pairs:
+                continue
+            try:
+                self.storage.save_deliveries(broadcast_id, pairs)
+            except Exception:
+                log.restore_unsaved(pairs)
+                # Les annonces déjà écrites n'ont plus rien en attente : les remettre est sans effet
+                self._dirty |= broadcast_ids
+                raise
+
+    def release(self, broadcast_id: str):
+        """Écrit puis libère la mémoire du journal d'une annonce"""
+        if broadcast_id in self._dirty:
+            self.flush()
+        self._logs.pop(broadcast_id, None)
+
+    def delete(self, broadcast_id: str):
+        self._logs.pop(broadcast_id, None)
+        self._dirty.discard(broadcast_id)
+        self.storage.delete_deliveries(broadcast_id)
+
+    def prune(self, broadcasts: dict, now: float = None) -> list:
+        """Supprime les enregistrements trop anciens. Retourne les annonces modifiées."""
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        pruned = []
+        for broadcast_id, broadcast in broadcasts.items():
+            delivered_at = _broadcast_time(broadcast_id, broadcast)
+            if delivered_at is None or delivered_at >= cutoff or broadcast_id in self._logs:
+                continue
+            self.delete(broadcast_id)
+            # Plus rien à retirer ni à modifier : l'annonce n'est plus concernée
+            broadcast['delivered_at'] = None
+            pruned.append(broadcast_id)
+        return pruned
@@ -0,0 +1,86 @@
+import time
+
+from modules.broadcast import permanent_failure
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+REASON_LABELS = {
+    'blocked': "bot bloqué",
+    'deactivated': "compte supprimé",
+    'not_found': "chat introuvable"
+}
+
+
+class DeliveryHealth:
+    """État de joignabilité des utilisateurs pour les envois groupés.
+
+    Un utilisateur dont un envoi échoue définitivement (bot bloqué, compte supprimé,
+    chat introuvable) est marqué injoignable : il est exclu des diffusions suivantes
+    (test en O(1)) jusqu'à ce qu'il interagisse de nouveau avec le bot. Les échecs
+    temporaires consécutifs sont seulement comptés. Seuls les utilisateurs en
+    difficulté sont enregistrés (clé meta 'delivery_health').
+    """
+
+    def __init__(self, storage=None, flush_interval: float = 5.0):
+        self.storage = storage or JsonStorage()
+        data = self.storage.load_meta('delivery_health')
+        if not isinstance(data, dict):
+            data = {}
+        # user_id -> {'reason': 'blocked' | 'deactivated' | 'not_found', 'error': str, 'since': float}
+        self._unreachable = {int(user_id): entry for user_id, entry in data.get('unreachable', {}).items()}
+        # user_id -> nombre d'échecs temporaires consécutifs
+        self._failures = {int(user_id): count for user_id, count in data.get('failures', {}).items()}
+        self.writer = WriteBehindStore('delivery_health', self._save, flush_interval)
+
+    def _save(self):
+        self.storage.save_meta('delivery_health', {
+            'unreachable': {str(user_id): entry for user_id, entry in self._unreachable.items()},
+            'failures': {str(user_id): count for user_id, count in self._failures.items()}
+        })
+
+    def is_reachable(self, user_id) -> bool:
+        return int(user_id) not in self._unreachable
+
+    def reachable(self, user_ids) -> list:
+        """user_ids sans les utilisateurs injoignables"""
+        unreachable = self._unreachable
+        return [user_id for user_id in user_ids if int(user_id) not in unreachable]
+
+    def record(self, user_id, state: str, error: Exception = None):
+        """Résultat d'un envoi (appelé par broadcast_jobs pour chaque destinataire)"""
+        user_id = int(user_id)
+        if state == 'sent':
+            if self._failures.pop(user_id, None) is not None or self._unreachable.pop(user_id, None) is not None:
+                self.writer.mark_dirty()
+            return
+        reason = permanent_failure(error) if error is not None else None
+        if reason is not None:
+            self._failures.pop(user_id, None)
+            self._unreachable[user_id] = {'reason': reason, 'error': str(error)[:200], 'since': time.time()}
+        else:
+            self._failures[user_id] = self._failures.get(user_id, 0) + 1
+        self.writer.mark_dirty()
+
+    def seen(self, user_id):
+        """L'utilisateur a interagi avec le bot : il sera de nouveau servi à la prochaine diffusion"""
+        if self._unreachable.pop(int(user_id), None) is not None:
+            self.writer.mark_dirty()
+
+    def counts(self) -> dict:
+        """Nombre d'injoignables par raison, et d'utilisateurs en échec temporaire"""
+        counts = {reason: 0 for reason in REASON_LABELS}
+        for entry in self._unreachable.values():
+            counts[entry['reason']] = counts.get(entry['reason'], 0) + 1
+        counts['failing'] = len(self._failures)
+        return counts
+
+    def summary(self) -> str:
+        counts = self.counts()
+        total = sum(counts[reason] for reason in REASON_LABELS)
+        details = ", ".join(f"{label} : {counts[reason]}" for reason, label in REASON_LABELS.items() if counts[reason])
+        text = f"📵 Utilisateurs injoignables : {total}"
+        if details:
+            text += f" ({details})"
+        if counts['failing']:
+            text += f"\n⚠️ Échecs temporaires en cours : {counts['failing']}"
+        return text
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+
+from modules.persistence import atomic_write_json
+
+
+def file_signature(path):
+    """(mtime, taille) du fichier, None s'il n'existe pas"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchedSource:
+    """Données servies depuis la mémoire, rechargées quand leur source change.
+
+    version est incrémentée à chaque changement (rechargement externe ou modification
+    locale) pour que les caches qui en dépendent puissent s'invalider.
+    """
+
+    def __init__(self, name: str, signature_fn, reload_fn):
+        self.name = name
+        self.signature_fn = signature_fn
+        self.reload_fn = reload_fn
+        self.version = 0
+        self._signature = signature_fn()
+
+    def changed(self) -> bool:
+        """True si la source a été modifiée de l'extérieur sans être rechargée"""
+        return self.signature_fn() != self._signature
+
+    def refresh(self) -> bool:
+        """Recharge si la source a été modifiée de l'extérieur.
+
+        reload_fn peut refuser le rechargement en retournant False : la signature n'est
+        pas enregistrée et le rechargement est retenté au passage suivant.
+        """
+        signature = self.signature_fn()
+        if signature == self._signature:
+            return False
+        try:
+            if self.reload_fn() is False:
+                return False
+        except Exception as e:
+            print(f"Erreur lors du rechargement de {self.name} : {e}")
+            # Source illisible : inutile de réessayer avant sa prochaine modification
+            self._signature = signature
+            return False
+        self._signature = signature
+        self.version += 1
+        return True
+
+    def bump(self):
+        """Signale une modification faite en mémoire"""
+        self.version += 1
+
+    def touch(self):
+        """À appeler après une écriture de notre part : pas de rechargement à faire"""
+        self._signature = self.signature_fn()
+        self.version += 1
+
+
+class WatchedJsonFile(WatchedSource):
+    """Fichier JSON parsé une seule fois ; le dict est mis à jour sur place lors d'un rechargement"""
+
+    def __init__(self, name: str, path: str, data: dict, on_reload=None):
+        self.path = path
+        self.data = data
+        self.on_reload = on_reload
+        super().__init__(name, lambda: file_signature(path), self._reload)
+
+    def _reload(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.data.clear()
+        self.data.update(data)
+        if self.on_reload:
+            self.on_reload(self.data)
+        print(f"🔄 {self.path} rechargé")
+
+    def save(self):
+        """Écrit le dict sur disque et met à jour la signature"""
+        atomic_write_json(self.path, self.data)
+        self.touch()
+
+
+class FileCache:
+    """Regroupe les sources surveillées et vérifie leurs modifications périodiquement"""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self.sources = {}
+        self._task = None
+
+    def watch(self, source):
+        self.sources[source.name] = source
+        return source
+
+    def __getitem__(self, name):
+        return self.sources[name]
+
+    def version(self, *names) -> tuple:
+        """Versions des sources demandées (toutes si aucune), utilisable comme clé de cache"""
+        return tuple(self.sources[name].version for name in (names or self.sources))
+
+    def refresh(self):
+        for source in self.sources.values():
+            source.refresh()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.refresh()
+
+    def start(self):
+        """Démarre la surveillance (doit être appelé depuis la boucle d'événements)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,118 @@
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def to_base36(number: int) -> str:
+    if number == 0:
+        return DIGITS[0]
+    digits = []
+    while number:
+        number, remainder = divmod(number, 36)
+        digits.append(DIGITS[remainder])
+    return "".join(reversed(digits))
+
+
+class IdRegistry:
+    """Identifiants courts et stables des catégories et produits, pour les callback_data.
+
+    Un identifiant (compteur en base 36, commun aux catégories et aux produits) est
+    attribué à la première demande puis conservé dans le stockage : les boutons restent
+    valides après un redémarrage et ne dépendent d'aucun état par utilisateur.
+    Un produit référence l'identifiant de sa catégorie, si bien que renommer une
+    catégorie ne change aucun identifiant.
+    """
+
+    def __init__(self, storage=None, flush_interval: float = 5.0):
+        self.storage = storage or JsonStorage()
+        data = self.storage.load_meta('ids')
+        if not isinstance(data, dict):
+            data = {}
+        self._next = data.get('next', 1)
+        # nom de catégorie -> id, et id -> nom
+        self._category_ids = dict(data.get('categories', {}))
+        self._category_names = {cid: name for name, cid in self._category_ids.items()}
+        # id produit -> (id catégorie, nom), et (id catégorie, nom) -> id produit
+        self._products = {pid: tuple(key) for pid, key in data.get('products', {}).items()}
+        self._product_ids = {key: pid for pid, key in self._products.items()}
+        self.writer = WriteBehindStore('ids', self._save, flush_interval)
+
+    def _save(self):
+        self.storage.save_meta('ids', {
+            'next': self._next,
+            'categories': self._category_ids,
+            'products': {pid: list(key) for pid, key in self._products.items()}
+        })
+
+    def _new_id(self) -> str:
+        new_id = to_base36(self._next)
+        self._next += 1
+        self.writer.mark_dirty()
+        return new_id
+
+    def category_id(self, category: str) -> str:
+        cid = self._category_ids.get(category)
+        if cid is None:
+            cid = self._category_ids[category] = self._new_id()
+            self._category_names[cid] = category
+        return cid
+
+    def product_id(self, category: str, product_name: str) -> str:
+        key = (self.category_id(category), product_name)
+        pid = self._product_ids.get(key)
+        if pid is None:
+            pid = self._product_ids[key] = self._new_id()
+            self._products[pid] = key
+        return pid
+
+    def category(self, cid: str):
+        """Nom de la catégorie, None si l'identifiant est inconnu"""
+        return self._category_names.get(cid)
+
+    def product(self, pid: str):
+        """(catégorie, nom du produit), None si l'identifiant est inconnu"""
+        key = self._products.get(pid)
+        if key is None:
+            return None
+        category = self._category_names.get(key[0])
+        if category is None:
+            return None
+        return category, key[1]
+
+    def rename_category(self, old_name: str, new_name: str):
+        """Garde l'identifiant de la catégorie (et donc ceux de ses produits)"""
+        cid = self._category_ids.pop(old_name, None)
+        if cid is None:
+            return
+        self._category_ids[new_name] = cid
+        self._category_names[cid] = new_name
+        self.writer.mark_dirty()
+
+    def rename_product(self, category: str, old_name: str, new_name: str):
+        cid = self._category_ids.get(category)
+        pid = self._product_ids.pop((cid, old_name), None)
+        if pid is None:
+            return
+        self._product_ids[(cid, new_name)] = pid
+        self._products[pid] = (cid, new_name)
+        self.writer.mark_dirty()
+
+    def prune(self, catalog: dict):
+        """Oublie les catégories et produits qui ne sont plus dans le catalogue"""
+        existing = {
+            (category, product['name'])
+            for category, products in catalog.items() if isinstance(products, list)
+            for product in products if isinstance(product, dict) and 'name' in product
+        }
+        removed = 0
+        for pid, (cid, name) in list(self._products.items()):
+            if (self._category_names.get(cid), name) not in existing:
+                del self._products[pid]
+                del self._product_ids[(cid, name)]
+                removed += 1
+        for category in [c for c in self._category_ids if c not in catalog]:
+            del self._category_names[self._category_ids.pop(category)]
+            removed += 1
+        if removed:
+            self.writer.mark_dirty()
@@ -0,0 +1,364 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from telegram.ext import BaseRateLimiter
+
+# Voies par ordre de priorité : une requête interactive passe toujours avant une requête de masse
+LANES = ('interactive', 'bulk')
+
+_lane = contextvars.ContextVar('outbound_lane', default='interactive')
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+@contextmanager
+def bulk_lane():
+    """Les appels à l'API faits dans ce bloc (et les tâches qu'il crée) passent par la voie de masse"""
+    token = _lane.set('bulk')
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def retry_seconds(value) -> float:
+    """retry_after peut être un nombre ou un timedelta selon la version de PTB"""
+    return value.total_seconds() if hasattr(value, 'total_seconds') else float(value)
+
+
+class LaneStats:
+    """Compteurs d'une voie : requêtes, attentes et profondeur maximale de la file"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queued = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def waited(self, seconds: float):
+        self.queued += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.queued if self.queued else 0.0
+
+
+class PriorityTokenBucket:
+    """Seau à jetons partagé entre plusieurs voies de priorité.
+
+    Un jeton libre est pris tout de suite si aucune requête de même priorité ou plus
+    prioritaire n'attend ; sinon la requête rejoint la file de sa voie. Une seule tâche
+    distribue les jetons au fil du remplissage, toujours à la première requête de la
+    voie la plus prioritaire : une diffusion en cours ne retarde une réponse à un client
+    que d'un jeton au plus.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, lanes=LANES):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queues = {lane: deque() for lane in lanes}
+        self.stats = {lane: LaneStats() for lane in lanes}
+        self._dispatcher = None
+
+    def pause(self, seconds: float):
+        """Suspend toutes les voies (RetryAfter de Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    def lane(self, name: str) -> 'LaneBucket':
+        return LaneBucket(self, name)
+
+    def depth(self, lane: str) -> int:
+        """Requêtes en attente dans une voie"""
+        return len(self._queues[lane])
+
+    def _take(self) -> bool:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _waiting(self, lane: str) -> bool:
+        """True si une requête de priorité égale ou supérieure attend déjà"""
+        for name, queue in self._queues.items():
+            if queue:
+                return True
+            if name == lane:
+                return False
+        return False
+
+    async def acquire(self, lane: str = 'interactive'):
+        stats = self.stats[lane]
+        stats.requests += 1
+        if not self._waiting(lane) and self._take():
+            return
+        queue = self._queues[lane]
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        stats.max_depth = max(stats.max_depth, len(queue))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in queue:
+                queue.remove(future)
+            raise
+        finally:
+            stats.waited(time.monotonic() - start)
+
+    def _next_waiter(self):
+        for queue in self._queues.values():
+            while queue and queue[0].done():
+                # Requête annulée pendant l'attente
+                queue.popleft()
+            if queue:
+                return queue.popleft()
+        return None
+
+    async def _dispatch(self):
+        while any(self._queues.values()):
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if not self._take():
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            waiter = self._next_waiter()
+            if waiter is None:
+                # Toutes les attentes ont été annulées : le jeton reste disponible
+                self._tokens += 1
+                break
+            waiter.set_result(None)
+            # Laisse la requête servie partir avant de distribuer le jeton suivant
+            await asyncio.sleep(0)
+
+    def report(self) -> str:
+        lines = []
+        for lane, stats in self.stats.items():
+            lines.append(f"{lane} : {stats.requests} requêtes, file {self.depth(lane)} (max {stats.max_depth}), "
+                         f"attente moy. {stats.average_wait * 1000:.0f} ms / max {stats.max_wait * 1000:.0f} ms "
+                         f"({stats.queued} en file)")
+        return "\n".join(lines)
+
+
+class ChatLimits:
+    """Limites par destinataire : un seau par chat, à débit réservé.
+
+    Chats privés : chat_rate messages/s, rafales de chat_burst. Groupes et canaux
+    (identifiant négatif ou @nom) : group_rate messages/s (20 par minute chez Telegram),
+    rafales de group_burst. Chaque appel réserve sa place : delay() retourne l'attente
+    avant de pouvoir partir.
+    """
+
+    def __init__(self, chat_rate: float = 1.0, chat_burst: float = 5.0,
+                 group_rate: float = 20 / 60, group_burst: float = 5.0, max_chats: int = 10000):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_chats = max_chats
+        # chat_id -> [jetons (négatif = places réservées), dernière mise à jour]
+        self._chats = {}
+
+    @staticmethod
+    def is_group(chat_id) -> bool:
+        if isinstance(chat_id, str):
+            return chat_id.startswith('@') or chat_id.startswith('-')
+        return chat_id < 0
+
+    def delay(self, chat_id) -> float:
+        rate, burst = ((self.group_rate, self.group_burst) if self.is_group(chat_id)
+                       else (self.chat_rate, self.chat_burst))
+        now = time.monotonic()
+        tokens, updated = self._chats.get(chat_id, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate) - 1
+        self._chats[chat_id] = (tokens, now)
+        if len(self._chats) > self.max_chats:
+            self._prune(now)
+        return -tokens / rate if tokens < 0 else 0.0
+
+    def _prune(self, now: float):
+        """Oublie les chats dont le seau est de nouveau plein"""
+        for chat_id, (tokens, updated) in list(self._chats.items()):
+            rate, burst = ((self.group_rate, self.group_burst) if self.is_group(chat_id)
+                           else (self.chat_rate, self.chat_burst))
+            if tokens + (now - updated) * rate >= burst:
+                del self._chats[chat_id]
+
+
+class CircuitOpen(NetworkError):
+    """Appel non critique refusé : le disjoncteur est ouvert pour encore retry_after secondes"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"API Telegram dégradée, appels de masse suspendus {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Disjoncteur : après failure_threshold erreurs réseau consécutives, Telegram est
+    considéré comme dégradé pendant cooldown secondes.
+
+    Les appels non critiques (voie de masse) sont alors refusés tout de suite
+    (CircuitOpen) au lieu de charger l'API ou de s'accumuler jusqu'à la fin du délai ;
+    les réponses aux clients continuent. Passé le délai, le premier appel réussi
+    referme le disjoncteur, un nouvel échec le rouvre.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        return 'open' if time.monotonic() - self._opened_at < self.cooldown else 'half-open'
+
+    def record_success(self):
+        if self._opened_at is not None:
+            print("✅ API Telegram rétablie : reprise des envois de masse")
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        state = self.state
+        if state == 'half-open' or (state == 'closed' and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.trips += 1
+            print(f"⚠️ API Telegram dégradée ({self.failures} erreurs) : envois de masse suspendus "
+                  f"{self.cooldown:.0f} s")
+
+    @property
+    def remaining(self) -> float:
+        """Secondes avant que les appels non critiques puissent reprendre"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+
+class LaneBucket:
+    """Vue d'une voie du seau partagé, utilisable comme un TokenBucket"""
+
+    def __init__(self, bucket: PriorityTokenBucket, lane: str):
+        self.bucket = bucket
+        self.name = lane
+
+    async def acquire(self):
+        await self.bucket.acquire(self.name)
+
+    def pause(self, seconds: float):
+        self.bucket.pause(seconds)
+
+
+def _creates_message(endpoint: str) -> bool:
+    return endpoint.startswith(('send', 'copy', 'forward')) and endpoint != 'sendChatAction'
+
+
+class OutboundRateLimiter(BaseRateLimiter):
+    """Limiteur de débit de l'application (ApplicationBuilder.rate_limiter).
+
+    Chaque appel à l'API Telegram prend un jeton du seau partagé dans sa voie :
+    rate_limit_args si précisé, sinon la voie du contexte courant (voir bulk_lane).
+    Les envois de messages respectent en plus les limites par chat et par groupe
+    (ChatLimits), comme les modifications de la voie de masse ; les modifications
+    interactives (navigation d'un client dans le catalogue) n'attendent pas.
+
+    Un RetryAfter suspend toutes les voies exactement pendant la durée demandée. Les
+    appels interactifs sont ensuite retentés de façon transparente, comme après une
+    erreur réseau (délai exponentiel avec gigue, max_retries tentatives) ; un envoi
+    expiré (TimedOut) n'est pas retenté, il a pu être délivré. Les appels de masse
+    remontent l'erreur à l'appelant (BroadcastEngine a sa propre politique de reprise)
+    et échouent tout de suite (CircuitOpen) tant que le disjoncteur est ouvert.
+    """
+
+    def __init__(self, bucket: PriorityTokenBucket, chat_limits: ChatLimits = None,
+                 breaker: CircuitBreaker = None, max_retries: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 10.0, unlimited=('getUpdates',)):
+        self.bucket = bucket
+        self.chat_limits = chat_limits or ChatLimits()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.unlimited = set(unlimited)
+        self.retried = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _backoff(self, attempt: int) -> float:
+        """Délai exponentiel avec gigue complète"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in self.unlimited:
+            return await callback(*args, **kwargs)
+        lane = rate_limit_args if rate_limit_args in self.bucket.stats else current_lane()
+        critical = lane == 'interactive'
+        chat_id = (data or {}).get('chat_id')
+        limited = chat_id is not None and (_creates_message(endpoint)
+                                           or (not critical and endpoint.startswith('edit')))
+        attempt = 0
+        while True:
+            if not critical and self.breaker.state == 'open':
+                raise CircuitOpen(self.breaker.remaining)
+            if limited:
+                delay = self.chat_limits.delay(chat_id)
+                if delay:
+                    await asyncio.sleep(delay)
+            await self.bucket.acquire(lane)
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                # Toutes les voies attendent la durée exacte demandée par Telegram
+                self.bucket.pause(retry_seconds(e.retry_after))
+                if not critical or attempt >= self.max_retries:
+                    raise
+            except (BadRequest, Forbidden):
+                # Réponse normale de l'API : la requête est en cause, pas Telegram
+                self.breaker.record_success()
+                raise
+            except NetworkError as e:
+                self.breaker.record_failure()
+                if (not critical or attempt >= self.max_retries
+                        or (isinstance(e, TimedOut) and _creates_message(endpoint))):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+            else:
+                self.breaker.record_success()
+                return result
+            attempt += 1
+            self.retried += 1
+
+    def report(self) -> str:
+        return (f"{self.bucket.report()}\n"
+                f"Nouvelles tentatives : {self.retried}, disjoncteur : {self.breaker.state} "
+                f"({self.breaker.trips} déclenchements)")
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+
+
+def atomic_write_json(path, data, indent=4):
+    """Écrit un fichier JSON de manière atomique (fichier temporaire + fsync + rename)"""
+    _atomic_write(path, lambda f: json.dump(data, f, indent=indent, ensure_ascii=False), 'w')
+
+
+def atomic_write_bytes(path, data: bytes):
+    """Écrit un fichier binaire de manière atomique (même procédé que atomic_write_json)"""
+    _atomic_write(path, lambda f: f.write(data), 'wb')
+
+
+def _atomic_write(path, write, mode):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Rendre le rename durable (non supporté sous Windows)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+
+class WriteBehindStore:
+    """Écriture différée : les mutations marquent le store comme modifié,
+    une tâche de fond fait au plus une écriture par intervalle"""
+
+    def __init__(self, name: str, flush_fn, interval: float = 2.0):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.writes = 0
+        self._dirty = False
+        self._task = None
+        self._wakeup = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Signale une modification. Sans tâche de fond, l'écriture est immédiate."""
+        self._dirty = True
+        if self.running:
+            self._wakeup.set()
+        else:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Écrit immédiatement si des modifications sont en attente"""
+        if not self._dirty:
+            return False
+        self._dirty = False
+        try:
+            self.flush_fn()
+            self.writes += 1
+            return True
+        except Exception as e:
+            self._dirty = True
+            print(f"Erreur lors de la sauvegarde différée ({self.name}) : {e}")
+            return False
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Laisser les mutations s'accumuler pendant l'intervalle avant d'écrire
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """Démarre la tâche de fond (doit être appelé depuis la boucle d'événements)"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        if self._dirty:
+            self._wakeup.set()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche de fond et vide le tampon"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Cache LRU des écrans déjà construits (texte, clavier...).
+
+    Les entrées sont valables pour une version des données : quand la version change
+    (écriture du catalogue, modification des groupes), tout le cache est vidé.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, version, key, build):
+        """Retourne l'écran mis en cache pour key, ou le construit avec build()"""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self._entries[key] = build()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,181 @@
+import base64
+from array import array
+from bisect import bisect_left, insort
+
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+
+def _encode(bitmap: bytearray) -> str:
+    return base64.b64encode(bytes(bitmap)).decode('ascii')
+
+
+def _decode(value: str) -> bytearray:
+    return bytearray(base64.b64decode(value))
+
+
+class SegmentIndex:
+    """Index des segments de destinataires pour les annonces ciblées.
+
+    Chaque segment est tiré d'un index tenu à jour au fil de l'eau, sans parcourir
+    ni analyser les fiches utilisateurs :
+      - dernière activité : liste triée de (last_seen, user_id) ; les dates au format
+        "%Y-%m-%d %H:%M:%S" se comparent comme des chaînes, une fenêtre est une dichotomie,
+      - groupes : un set par groupe, reconstruit quand les codes d'accès changent,
+      - catégories consultées : un bitmap par identifiant de catégorie (un bit par
+        utilisateur, selon son rang d'enregistrement dans l'index),
+      - utilisateurs déjà atteints par une annonce : un bitmap.
+    Les bitmaps et les rangs sont persistés (clé meta 'segments') ; l'index d'activité
+    est construit au démarrage depuis les utilisateurs chargés.
+    """
+
+    def __init__(self, storage=None, get_groups=None, groups_version_fn=None, flush_interval: float = 5.0):
+        self.storage = storage or JsonStorage()
+        self.get_groups = get_groups or (lambda: {})
+        self.groups_version_fn = groups_version_fn or (lambda: None)
+        data = self.storage.load_meta('segments')
+        if not isinstance(data, dict):
+            data = {}
+        # rang -> user_id, et user_id -> rang (position du bit dans les bitmaps)
+        self._user_ids = array('q', data.get('users', []))
+        self._ranks = {user_id: rank for rank, user_id in enumerate(self._user_ids)}
+        # identifiant de catégorie -> bitmap des utilisateurs l'ayant consultée
+        self._viewers = {category_id: _decode(value) for category_id, value in data.get('viewers', {}).items()}
+        # None tant que l'historique des annonces n'a pas été importé (voir init_reached)
+        reached = data.get('reached')
+        self._reached = _decode(reached) if reached is not None else None
+        self._last_seen = {}
+        self._activity = []
+        self._groups_version = object()
+        self._groups = {}
+        self.writer = WriteBehindStore('segments', self._save, flush_interval)
+
+    def _save(self):
+        self.storage.save_meta('segments', {
+            'users': list(self._user_ids),
+            'viewers': {category_id: _encode(bitmap) for category_id, bitmap in self._viewers.items()},
+            'reached': _encode(self._reached) if self._reached is not None else None
+        })
+
+    # Bitmaps
+
+    def _rank(self, user_id: int) -> int:
+        rank = self._ranks.get(user_id)
+        if rank is None:
+            rank = self._ranks[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+        return rank
+
+    def _set(self, bitmap: bytearray, user_id) -> bool:
+        """Met le bit de user_id à 1. Retourne False s'il l'était déjà."""
+        rank = self._rank(int(user_id))
+        index, bit = divmod(rank, 8)
+        if index >= len(bitmap):
+            bitmap.extend(bytes(index + 1 - len(bitmap)))
+        if bitmap[index] >> bit & 1:
+            return False
+        bitmap[index] |= 1 << bit
+        return True
+
+    def _has(self, bitmap: bytearray, user_id) -> bool:
+        rank = self._ranks.get(int(user_id))
+        if rank is None or rank // 8 >= len(bitmap):
+            return False
+        return bool(bitmap[rank // 8] >> rank % 8 & 1)
+
+    def _members(self, bitmap: bytearray) -> list:
+        user_ids = self._user_ids
+        members = []
+        for index, byte in enumerate(bitmap):
+            while byte:
+                low = byte & -byte
+                members.append(user_ids[index * 8 + low.bit_length() - 1])
+                byte ^= low
+        return members
+
+    # Dernière activité
+
+    def load_last_seen(self, users: dict):
+        """Construit l'index d'activité depuis les utilisateurs chargés ({user_id: fiche})"""
+        self._last_seen = {int(user_id): data['last_seen'] for user_id, data in users.items()
+                           if data.get('last_seen')}
+        self._activity = sorted((last_seen, user_id) for user_id, last_seen in self._last_seen.items())
+
+    def touch(self, user_id, last_seen: str):
+        """Nouvelle date d'activité d'un utilisateur (register_user)"""
+        user_id = int(user_id)
+        previous = self._last_seen.get(user_id)
+        if previous == last_seen:
+            return
+        if previous is not None:
+            index = bisect_left(self._activity, (previous, user_id))
+            if index < len(self._activity) and self._activity[index] == (previous, user_id):
+                del self._activity[index]
+        self._last_seen[user_id] = last_seen
+        insort(self._activity, (last_seen, user_id))
+
+    def seen_since(self, cutoff: str) -> list:
+        """Utilisateurs actifs depuis cutoff (inclus)"""
+        return [user_id for _, user_id in self._activity[bisect_left(self._activity, (cutoff,)):]]
+
+    def seen_before(self, cutoff: str) -> list:
+        """Utilisateurs sans activité depuis cutoff"""
+        return [user_id for _, user_id in self._activity[:bisect_left(self._activity, (cutoff,))]]
+
+    # Groupes
+
+    def group(self, name: str) -> set:
+        """Membres d'un groupe (set vide si le groupe n'existe pas)"""
+        version = self.groups_version_fn()
+        if version != self._groups_version:
+            self._groups_version = version
+            self._groups = {group: {int(user_id) for user_id in members}
+                            for group, members in (self.get_groups() or {}).items()}
+        return self._groups.get(name, set())
+
+    # Catégories consultées
+
+    def record_view(self, category_id: str, user_id):
+        bitmap = self._viewers.setdefault(category_id, bytearray())
+        if self._set(bitmap, user_id):
+            self.writer.mark_dirty()
+
+    def viewers(self, category_id: str) -> list:
+        bitmap = self._viewers.get(category_id)
+        return self._members(bitmap) if bitmap else []
+
+    def viewer_count(self, category_id: str) -> int:
+        bitmap = self._viewers.get(category_id)
+        return int.from_bytes(bitmap, 'little').bit_count() if bitmap else 0
+
+    def prune(self, category_ids):
+        """Supprime les bitmaps des catégories qui n'existent plus"""
+        category_ids = set(category_ids)
+        for category_id in [c for c in self._viewers if c not in category_ids]:
+            del self._viewers[category_id]
+            self.writer.mark_dirty()
+
+    # Utilisateurs atteints
+
+    @property
+    def needs_reached(self) -> bool:
+        """True tant que l'historique des annonces n'a pas été importé"""
+        return self._reached is None
+
+    def init_reached(self, user_ids):
+        """Importe une fois les destinataires des annonces déjà envoyées"""
+        self._reached = bytearray()
+        for user_id in user_ids:
+            self._set(self._reached, user_id)
+        self.writer.mark_dirty()
+
+    def record_reached(self, user_id):
+        if self._reached is None:
+            self._reached = bytearray()
+        if self._set(self._reached, user_id):
+            self.writer.mark_dirty()
+
+    def never_reached(self, user_ids) -> list:
+        """Parmi user_ids, ceux qui n'ont jamais reçu d'annonce"""
+        reached = self._reached or bytearray()
+        return [user_id for user_id in user_ids if not self._has(reached, user_id)]
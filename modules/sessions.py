@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Taille approximative en octets d'un objet et de son contenu"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    # Les autres objets ne sont pas parcourus : ils peuvent référencer le bot ou l'application
+    return size
+
+
+class SessionManager:
+    """Borne la mémoire occupée par les context.user_data de PTB.
+
+    L'activité de chaque utilisateur est suivie dans un OrderedDict (ordre LRU) ; une
+    tâche périodique supprime les sessions inactives depuis idle_timeout secondes,
+    puis les plus anciennes au-delà de max_sessions. Les sessions protégées
+    (administrateurs en cours d'édition) ne sont jamais supprimées.
+    """
+
+    def __init__(self, idle_timeout: float = 3600.0, max_sessions: int = 5000,
+                 interval: float = 300.0, is_protected=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.interval = interval
+        self.is_protected = is_protected or (lambda user_id: False)
+        self.evicted = 0
+        self._last_seen = OrderedDict()
+        self._task = None
+
+    async def track(self, update, context):
+        """Handler (groupe -1) appelé pour chaque update : note l'activité de l'utilisateur"""
+        user = update.effective_user
+        if user is not None:
+            self._last_seen[user.id] = time.monotonic()
+            self._last_seen.move_to_end(user.id)
+
+    def evict(self, application) -> int:
+        """Supprime les sessions inactives ou en surnombre. Retourne le nombre supprimé."""
+        now = time.monotonic()
+        over = len(self._last_seen) - self.max_sessions
+        evicted = 0
+        # Du moins récemment actif au plus récent
+        for user_id, last_seen in list(self._last_seen.items()):
+            if now - last_seen < self.idle_timeout and over <= 0:
+                break
+            if self.is_protected(user_id):
+                continue
+            over -= 1
+            del self._last_seen[user_id]
+            if user_id in application.user_data:
+                application.drop_user_data(user_id)
+                evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def report(self, user_data, limit: int = 10) -> str:
+        """Résumé mémoire des sessions : total, moyenne et plus grosses sessions"""
+        sizes = sorted(((deep_sizeof(data), user_id) for user_id, data in user_data.items()), reverse=True)
+        total = sum(size for size, _ in sizes)
+        lines = [
+            f"Sessions : {len(sizes)} ({len(self._last_seen)} suivies, {self.evicted} supprimées)",
+            f"Mémoire : {total / 1024:.1f} Ko, {total / len(sizes) if sizes else 0:.0f} octets/session en moyenne",
+        ]
+        for size, user_id in sizes[:limit]:
+            lines.append(f"  {user_id} : {size} octets")
+        return "\n".join(lines)
+
+    async def _run(self, application):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                evicted = self.evict(application)
+                if evicted:
+                    print(f"🧹 {evicted} sessions inactives supprimées")
+            except Exception as e:
+                print(f"Erreur lors du nettoyage des sessions : {e}")
+
+    def start(self, application):
+        """Démarre le nettoyage périodique (doit être appelé depuis la boucle d'événements)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(application))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
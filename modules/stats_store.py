@@ -0,0 +1,111 @@
+from datetime import datetime
+
+from modules.persistence import WriteBehindStore
+from modules.storage import JsonStorage
+
+
+def _now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _empty_stats():
+    return {
+        'total_views': 0,
+        'category_views': {},
+        'product_views': {},
+        'last_updated': _now(),
+        'last_reset': datetime.utcnow().strftime("%Y-%m-%d")
+    }
+
+
+class StatsStore:
+    """Compteurs de vues en mémoire, persistés par lots séparément du catalogue"""
+
+    def __init__(self, storage=None, flush_interval: float = 10.0):
+        self.storage = storage or JsonStorage()
+        self._existed = False
+        self._stats = self._load()
+        self.writer = WriteBehindStore('stats', self._save, flush_interval)
+
+    def _load(self) -> dict:
+        """Charge les statistiques depuis le stockage"""
+        stats = self.storage.load_meta('stats')
+        if not isinstance(stats, dict):
+            return _empty_stats()
+        self._existed = True
+
+        for key, value in _empty_stats().items():
+            stats.setdefault(key, value)
+        return stats
+
+    def _save(self):
+        self.storage.save_meta('stats', self._stats)
+
+    def migrate_from_catalog(self, catalog: dict) -> bool:
+        """Déplace les anciennes stats du catalogue vers ce store. Retourne True si le catalogue a changé."""
+        if 'stats' not in catalog:
+            return False
+        legacy = catalog.pop('stats')
+        if not self._existed and isinstance(legacy, dict):
+            for key, value in _empty_stats().items():
+                legacy.setdefault(key, value)
+            self._stats = legacy
+            self.writer.mark_dirty()
+        return True
+
+    def snapshot(self) -> dict:
+        """Retourne les statistiques courantes (ne pas modifier)"""
+        return self._stats
+
+    def record_category_view(self, category: str):
+        """Compte une vue de catégorie"""
+        views = self._stats['category_views']
+        views[category] = views.get(category, 0) + 1
+        self._stats['total_views'] += 1
+        self._stats['last_updated'] = _now()
+        self.writer.mark_dirty()
+
+    def record_product_view(self, category: str, product_name: str):
+        """Compte une vue de produit (compte aussi dans le total)"""
+        views = self._stats['product_views'].setdefault(category, {})
+        views[product_name] = views.get(product_name, 0) + 1
+        self._stats['total_views'] += 1
+        self._stats['last_updated'] = _now()
+        self.writer.mark_dirty()
+
+    def record_product_views(self, category: str, product_names):
+        """Compte une vue pour chaque produit affiché dans une liste"""
+        views = self._stats['product_views'].setdefault(category, {})
+        for product_name in product_names:
+            views[product_name] = views.get(product_name, 0) + 1
+        self.writer.mark_dirty()
+
+    def prune(self, catalog: dict):
+        """Supprime les statistiques des catégories et produits qui n'existent plus"""
+        category_views = self._stats['category_views']
+        for category in [c for c in category_views if c not in catalog or c == 'stats']:
+            del category_views[category]
+            print(f"🧹 Suppression des stats de la catégorie: {category}")
+
+        product_views = self._stats['product_views']
+        for category in list(product_views):
+            if category not in catalog or category == 'stats':
+                del product_views[category]
+                continue
+
+            existing_products = {p['name'] for p in catalog[category]}
+            for product_name in [p for p in product_views[category] if p not in existing_products]:
+                del product_views[category][product_name]
+                print(f"🧹 Suppression des stats du produit: {product_name} dans {category}")
+
+            if not product_views[category]:
+                del product_views[category]
+
+        self._stats['last_updated'] = _now()
+        self.writer.mark_dirty()
+
+    def reset(self) -> dict:
+        """Remet toutes les statistiques à zéro"""
+        self._stats = _empty_stats()
+        self.writer.mark_dirty()
+        return self._stats
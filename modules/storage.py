@@ -0,0 +1,693 @@
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from array import array
+from datetime import datetime
+
+from modules.file_cache import file_signature
+from modules.persistence import atomic_write_bytes, atomic_write_json
+
+
+class Storage:
+    """Interface commune des moteurs de stockage.
+
+    Les méthodes save_* reçoivent toujours l'objet complet tel qu'il est en mémoire,
+    accompagné éventuellement des clés modifiées : un moteur indexé n'écrit que ces
+    lignes, un moteur fichier réécrit tout.
+    """
+
+    def load_catalog(self) -> dict:
+        raise NotImplementedError
+
+    def save_catalog(self, catalog: dict):
+        raise NotImplementedError
+
+    def catalog_signature(self):
+        """Valeur qui change quand le catalogue est modifié par un autre processus"""
+        raise NotImplementedError
+
+    def load_users(self) -> dict:
+        raise NotImplementedError
+
+    def save_users(self, users: dict, user_ids=None):
+        raise NotImplementedError
+
+    def load_access_codes(self) -> dict:
+        raise NotImplementedError
+
+    def access_codes_signature(self):
+        """Valeur qui change quand les codes d'accès sont modifiés par un autre processus"""
+        raise NotImplementedError
+
+    def save_access_codes(self, access_codes: dict, user_ids=None, codes=None, groups=None):
+        raise NotImplementedError
+
+    def load_broadcasts(self) -> dict:
+        raise NotImplementedError
+
+    def save_broadcasts(self, broadcasts: dict, broadcast_ids=None):
+        raise NotImplementedError
+
+    def load_deliveries(self, broadcast_id: str) -> array:
+        """Messages envoyés pour une annonce : paires user_id, message_id alternées"""
+        raise NotImplementedError
+
+    def save_deliveries(self, broadcast_id: str, pairs: array, append: bool = True):
+        """Ajoute des paires (ou remplace toutes celles de l'annonce si append vaut False)"""
+        raise NotImplementedError
+
+    def delete_deliveries(self, broadcast_id: str):
+        raise NotImplementedError
+
+    def load_job_states(self, job_id: str) -> array:
+        """États des destinataires d'une diffusion : paires chat_id, état alternées
+        (une paire plus récente remplace la précédente du même chat)"""
+        raise NotImplementedError
+
+    def save_job_states(self, job_id: str, pairs: array, append: bool = True):
+        """Ajoute des paires (ou remplace toutes celles de la diffusion si append vaut False)"""
+        raise NotImplementedError
+
+    def delete_job_states(self, job_id: str):
+        raise NotImplementedError
+
+    def load_meta(self, key: str, default=None):
+        raise NotImplementedError
+
+    def save_meta(self, key: str, value):
+        raise NotImplementedError
+
+    def backup(self, backup_dir: str, timestamp: str):
+        raise NotImplementedError
+
+
+def _split_deliveries(broadcasts: dict) -> dict:
+    """Retire des annonces les anciens dicts message_ids et les retourne en paires
+    (broadcast_id -> array('q') user_id, message_id alternés)"""
+    deliveries = {}
+    for broadcast_id, broadcast in broadcasts.items():
+        message_ids = broadcast.pop('message_ids', None)
+        if message_ids:
+            pairs = array('q')
+            for user_id, message_id in message_ids.items():
+                pairs.extend((int(user_id), int(message_id)))
+            deliveries[broadcast_id] = pairs
+    return deliveries
+
+
+class JsonStorage(Storage):
+    """Stockage historique : un fichier JSON par type de données, réécrit en entier"""
+
+    def __init__(self, catalog_file: str = 'config/catalog.json', users_file: str = 'data/users.json',
+                 access_codes_file: str = 'data/access_codes.json', broadcasts_file: str = 'data/broadcasts.json',
+                 data_dir: str = 'data'):
+        self.catalog_file = catalog_file
+        self.users_file = users_file
+        self.access_codes_file = access_codes_file
+        self.broadcasts_file = broadcasts_file
+        self.data_dir = data_dir
+        # Un fichier binaire par annonce : paires int64 user_id, message_id, en ajout seul
+        self.deliveries_dir = os.path.join(data_dir, 'deliveries')
+        # Idem par diffusion en cours : paires int64 chat_id, état
+        self.job_states_dir = os.path.join(data_dir, 'broadcast_jobs')
+
+    def load_catalog(self) -> dict:
+        """Charge le catalogue depuis le fichier JSON"""
+        try:
+            with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            print(f"Fichier catalogue non trouvé dans {self.catalog_file}, création d'un nouveau catalogue")
+            return {}
+        except Exception as e:
+            print(f"Erreur lors du chargement du catalogue: {e}")
+            return {}
+
+    def save_catalog(self, catalog: dict):
+        atomic_write_json(self.catalog_file, catalog)
+
+    def catalog_signature(self):
+        return file_signature(self.catalog_file)
+
+    def load_users(self) -> dict:
+        """Charge les utilisateurs depuis le fichier"""
+        try:
+            with open(self.users_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_users(self, users: dict, user_ids=None):
+        atomic_write_json(self.users_file, users)
+
+    def load_access_codes(self) -> dict:
+        """Charge les codes d'accès depuis le fichier"""
+        try:
+            with open(self.access_codes_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            print(f"Access codes file not found: {self.access_codes_file}")
+            return {"authorized_users": []}
+        except json.JSONDecodeError as e:
+            print(f"Error decoding access codes file: {e}")
+            return {"authorized_users": []}
+        except Exception as e:
+            print(f"Unexpected error loading access codes: {e}")
+            return {"authorized_users": []}
+
+    def save_access_codes(self, access_codes: dict, user_ids=None, codes=None, groups=None):
+        atomic_write_json(self.access_codes_file, access_codes)
+
+    def access_codes_signature(self):
+        return file_signature(self.access_codes_file)
+
+    def load_broadcasts(self) -> dict:
+        """Charge les broadcasts depuis le fichier"""
+        try:
+            with open(self.broadcasts_file, 'r', encoding='utf-8') as f:
+                broadcasts = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print("Erreur de décodage JSON, création d'un nouveau fichier broadcasts")
+            return {}
+
+        # Ancien format : les message_ids sont déplacés dans les fichiers d'envois
+        deliveries = _split_deliveries(broadcasts)
+        if deliveries:
+            for broadcast_id, pairs in deliveries.items():
+                if not self.load_deliveries(broadcast_id):
+                    self.save_deliveries(broadcast_id, pairs, append=False)
+            atomic_write_json(self.broadcasts_file, broadcasts)
+        return broadcasts
+
+    def save_broadcasts(self, broadcasts: dict, broadcast_ids=None):
+        atomic_write_json(self.broadcasts_file, broadcasts)
+
+    @staticmethod
+    def _load_pairs(path: str) -> array:
+        pairs = array('q')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return pairs
+        # Une écriture interrompue peut laisser une paire incomplète en fin de fichier
+        pairs.frombytes(data[:len(data) - len(data) % (2 * pairs.itemsize)])
+        if sys.byteorder != 'little':
+            pairs.byteswap()
+        return pairs
+
+    @staticmethod
+    def _save_pairs(path: str, pairs: array, append: bool):
+        if sys.byteorder != 'little':
+            pairs = array('q', pairs)
+            pairs.byteswap()
+        if not append:
+            atomic_write_bytes(path, pairs.tobytes())
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            pairs.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _delete_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _deliveries_file(self, broadcast_id: str) -> str:
+        return os.path.join(self.deliveries_dir, f"{broadcast_id}.bin")
+
+    def load_deliveries(self, broadcast_id: str) -> array:
+        return self._load_pairs(self._deliveries_file(broadcast_id))
+
+    def save_deliveries(self, broadcast_id: str, pairs: array, append: bool = True):
+        self._save_pairs(self._deliveries_file(broadcast_id), pairs, append)
+
+    def delete_deliveries(self, broadcast_id: str):
+        self._delete_file(self._deliveries_file(broadcast_id))
+
+    def _job_states_file(self, job_id: str) -> str:
+        return os.path.join(self.job_states_dir, f"{job_id}.bin")
+
+    def load_job_states(self, job_id: str) -> array:
+        return self._load_pairs(self._job_states_file(job_id))
+
+    def save_job_states(self, job_id: str, pairs: array, append: bool = True):
+        self._save_pairs(self._job_states_file(job_id), pairs, append)
+
+    def delete_job_states(self, job_id: str):
+        self._delete_file(self._job_states_file(job_id))
+
+    def _meta_file(self, key: str) -> str:
+        return os.path.join(self.data_dir, f"{key}.json")
+
+    def load_meta(self, key: str, default=None):
+        try:
+            with open(self._meta_file(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except Exception as e:
+            print(f"Erreur lors du chargement de {key} : {e}")
+            return default
+
+    def save_meta(self, key: str, value):
+        atomic_write_json(self._meta_file(key), value)
+
+    def backup(self, backup_dir: str, timestamp: str):
+        """Copie le fichier catalogue dans le dossier de sauvegarde"""
+        if os.path.exists(self.catalog_file):
+            shutil.copy2(self.catalog_file, f"{backup_dir}/catalog_{timestamp}.json")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (category, position)
+);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (category, name);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT,
+    last_seen TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE INDEX IF NOT EXISTS idx_users_last_seen ON users (last_seen);
+
+CREATE TABLE IF NOT EXISTS access_users (
+    user_id BIGINT PRIMARY KEY,
+    authorized INTEGER NOT NULL DEFAULT 0,
+    banned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_access_users_authorized ON access_users (authorized);
+CREATE INDEX IF NOT EXISTS idx_access_users_banned ON access_users (banned);
+
+CREATE TABLE IF NOT EXISTS access_codes (
+    code TEXT PRIMARY KEY,
+    expiration TEXT,
+    used INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_access_codes_expiration ON access_codes (expiration);
+
+CREATE TABLE IF NOT EXISTS groups (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_name TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (group_name, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members (user_id);
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    broadcast_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+    broadcast_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (broadcast_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_broadcast_deliveries_user ON broadcast_deliveries (user_id);
+
+CREATE TABLE IF NOT EXISTS broadcast_job_states (
+    job_id TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    state INTEGER NOT NULL,
+    PRIMARY KEY (job_id, chat_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Clés de access_codes.json ayant leur propre table
+ACCESS_CODES_KEYS = ('authorized_users', 'banned_users', 'codes', 'groups')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class SqliteStorage(Storage):
+    """Stockage SQLite (mode WAL) : une modification = une ligne écrite"""
+
+    def __init__(self, db_path: str = 'data/bot.db'):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # Dernière version écrite de chaque produit, pour n'écrire que les différences
+        self._catalog_rows = None
+        self._categories = None
+
+    def close(self):
+        self._conn.close()
+
+    def is_empty(self) -> bool:
+        """Vrai si la base n'a jamais été initialisée (ni migrée)"""
+        for table in ('categories', 'users', 'access_users', 'access_codes', 'broadcasts', 'meta'):
+            if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    # Catalogue
+
+    def load_catalog(self) -> dict:
+        catalog = {}
+        for (name,) in self._conn.execute("SELECT name FROM categories ORDER BY position"):
+            catalog[name] = []
+        rows = {}
+        for category, position, name, data in self._conn.execute(
+                "SELECT category, position, name, data FROM products ORDER BY category, position"):
+            catalog.setdefault(category, []).append(json.loads(data))
+            rows[(category, position)] = (name, data)
+        self._catalog_rows = rows
+        self._categories = [(name, i) for i, name in enumerate(catalog)]
+        return catalog
+
+    def save_catalog(self, catalog: dict):
+        if self._catalog_rows is None:
+            self.load_catalog()
+
+        categories = []
+        rows = {}
+        for category, products in catalog.items():
+            if category == 'stats':
+                continue
+            categories.append((category, len(categories)))
+            for position, product in enumerate(products):
+                rows[(category, position)] = (product.get('name'), _dumps(product))
+
+        changed = [(c, p, n, d) for (c, p), (n, d) in rows.items() if self._catalog_rows.get((c, p)) != (n, d)]
+        removed = [key for key in self._catalog_rows if key not in rows]
+
+        with self._conn:
+            if categories != self._categories:
+                self._conn.execute("DELETE FROM categories")
+                self._conn.executemany("INSERT INTO categories (name, position) VALUES (?, ?)", categories)
+            if removed:
+                self._conn.executemany("DELETE FROM products WHERE category = ? AND position = ?", removed)
+            if changed:
+                self._conn.executemany(
+                    "INSERT INTO products (category, position, name, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (category, position) DO UPDATE SET name = excluded.name, data = excluded.data",
+                    changed
+                )
+
+        self._catalog_rows = rows
+        self._categories = categories
+
+    # Utilisateurs
+
+    def load_users(self) -> dict:
+        return {
+            user_id: json.loads(data)
+            for user_id, data in self._conn.execute("SELECT user_id, data FROM users ORDER BY rowid")
+        }
+
+    def save_users(self, users: dict, user_ids=None):
+        ids = users.keys() if user_ids is None else user_ids
+        upserts = []
+        deletes = []
+        for user_id in ids:
+            user = users.get(str(user_id))
+            if user is None:
+                deletes.append((str(user_id),))
+            else:
+                upserts.append((str(user_id), user.get('username'), user.get('last_seen'), _dumps(user)))
+
+        with self._conn:
+            if user_ids is None:
+                existing = {row[0] for row in self._conn.execute("SELECT user_id FROM users")}
+                deletes = [(user_id,) for user_id in existing - set(users)]
+            if deletes:
+                self._conn.executemany("DELETE FROM users WHERE user_id = ?", deletes)
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO users (user_id, username, last_seen, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (user_id) DO UPDATE SET username = excluded.username, "
+                    "last_seen = excluded.last_seen, data = excluded.data",
+                    upserts
+                )
+
+    # Codes d'accès, autorisations et groupes
+
+    def load_access_codes(self) -> dict:
+        access_codes = {
+            'authorized_users': [row[0] for row in self._conn.execute(
+                "SELECT user_id FROM access_users WHERE authorized = 1 ORDER BY rowid")],
+            'banned_users': [row[0] for row in self._conn.execute(
+                "SELECT user_id FROM access_users WHERE banned = 1 ORDER BY rowid")],
+            'codes': [json.loads(row[0]) for row in self._conn.execute(
+                "SELECT data FROM access_codes ORDER BY rowid")],
+            'groups': {row[0]: [] for row in self._conn.execute("SELECT name FROM groups ORDER BY rowid")}
+        }
+        for group_name, user_id in self._conn.execute(
+                "SELECT group_name, user_id FROM group_members ORDER BY rowid"):
+            access_codes['groups'].setdefault(group_name, []).append(user_id)
+
+        extra = self.load_meta('access_codes_extra', {})
+        access_codes.update(extra)
+        return access_codes
+
+    def access_codes_signature(self):
+        # Incrémenté uniquement par les commits des autres connexions
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    catalog_signature = access_codes_signature
+
+    def _write_access_users(self, access_codes: dict, user_ids):
+        authorized = set(access_codes.get('authorized_users', []))
+        banned = set(access_codes.get('banned_users', []))
+        upserts = []
+        deletes = []
+        for user_id in user_ids:
+            user_id = int(user_id)
+            if user_id in authorized or user_id in banned:
+                upserts.append((user_id, int(user_id in authorized), int(user_id in banned)))
+            else:
+                deletes.append((user_id,))
+        if deletes:
+            self._conn.executemany("DELETE FROM access_users WHERE user_id = ?", deletes)
+        if upserts:
+            self._conn.executemany(
+                "INSERT INTO access_users (user_id, authorized, banned) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET authorized = excluded.authorized, banned = excluded.banned",
+                upserts
+            )
+
+    def _write_codes(self, access_codes: dict, codes):
+        entries = {entry['code']: entry for entry in access_codes.get('codes', [])}
+        upserts = []
+        deletes = []
+        for code in codes:
+            entry = entries.get(code)
+            if entry is None:
+                deletes.append((code,))
+            else:
+                upserts.append((code, entry.get('expiration'), int(bool(entry.get('used'))), _dumps(entry)))
+        if deletes:
+            self._conn.executemany("DELETE FROM access_codes WHERE code = ?", deletes)
+        if upserts:
+            self._conn.executemany(
+                "INSERT INTO access_codes (code, expiration, used, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (code) DO UPDATE SET expiration = excluded.expiration, "
+                "used = excluded.used, data = excluded.data",
+                upserts
+            )
+
+    def _write_groups(self, access_codes: dict, groups):
+        all_groups = access_codes.get('groups', {})
+        for group_name in groups:
+            self._conn.execute("DELETE FROM group_members WHERE group_name = ?", (group_name,))
+            if group_name not in all_groups:
+                self._conn.execute("DELETE FROM groups WHERE name = ?", (group_name,))
+                continue
+            self._conn.execute("INSERT OR IGNORE INTO groups (name) VALUES (?)", (group_name,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO group_members (group_name, user_id) VALUES (?, ?)",
+                [(group_name, user_id) for user_id in all_groups[group_name]]
+            )
+
+    def save_access_codes(self, access_codes: dict, user_ids=None, codes=None, groups=None):
+        with self._conn:
+            if user_ids is None and codes is None and groups is None:
+                # Synchronisation complète
+                self._conn.execute("DELETE FROM access_users")
+                self._conn.execute("DELETE FROM access_codes")
+                self._conn.execute("DELETE FROM group_members")
+                self._conn.execute("DELETE FROM groups")
+                user_ids = list(dict.fromkeys(
+                    access_codes.get('authorized_users', []) + access_codes.get('banned_users', [])))
+                codes = [entry['code'] for entry in access_codes.get('codes', [])]
+                groups = list(access_codes.get('groups', {}))
+                extra = {k: v for k, v in access_codes.items() if k not in ACCESS_CODES_KEYS}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", ('access_codes_extra', _dumps(extra)))
+
+            if user_ids:
+                self._write_access_users(access_codes, user_ids)
+            if codes:
+                self._write_codes(access_codes, codes)
+            if groups:
+                self._write_groups(access_codes, groups)
+
+    # Annonces et messages envoyés
+
+    def load_broadcasts(self) -> dict:
+        """Annonces sans leurs envois, chargés à la demande par load_deliveries"""
+        broadcasts = {}
+        for broadcast_id, data in self._conn.execute("SELECT broadcast_id, data FROM broadcasts ORDER BY rowid"):
+            broadcasts[broadcast_id] = json.loads(data)
+        return broadcasts
+
+    def save_broadcasts(self, broadcasts: dict, broadcast_ids=None):
+        with self._conn:
+            ids = list(broadcasts) if broadcast_ids is None else broadcast_ids
+            if broadcast_ids is None:
+                existing = {row[0] for row in self._conn.execute("SELECT broadcast_id FROM broadcasts")}
+                ids += list(existing - set(broadcasts))
+
+            for broadcast_id in ids:
+                broadcast = broadcasts.get(broadcast_id)
+                if broadcast is None:
+                    self._conn.execute("DELETE FROM broadcast_deliveries WHERE broadcast_id = ?", (broadcast_id,))
+                    self._conn.execute("DELETE FROM broadcasts WHERE broadcast_id = ?", (broadcast_id,))
+                    continue
+                self._conn.execute(
+                    "INSERT INTO broadcasts (broadcast_id, data) VALUES (?, ?) "
+                    "ON CONFLICT (broadcast_id) DO UPDATE SET data = excluded.data",
+                    (broadcast_id, _dumps(broadcast))
+                )
+
+    def load_deliveries(self, broadcast_id: str) -> array:
+        pairs = array('q')
+        for user_id, message_id in self._conn.execute(
+                "SELECT user_id, message_id FROM broadcast_deliveries WHERE broadcast_id = ?", (broadcast_id,)):
+            pairs.extend((user_id, message_id))
+        return pairs
+
+    def save_deliveries(self, broadcast_id: str, pairs: array, append: bool = True):
+        with self._conn:
+            if not append:
+                self._conn.execute("DELETE FROM broadcast_deliveries WHERE broadcast_id = ?", (broadcast_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO broadcast_deliveries (broadcast_id, user_id, message_id) VALUES (?, ?, ?)",
+                [(broadcast_id, pairs[i], pairs[i + 1]) for i in range(0, len(pairs), 2)]
+            )
+
+    def delete_deliveries(self, broadcast_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM broadcast_deliveries WHERE broadcast_id = ?", (broadcast_id,))
+
+    def load_job_states(self, job_id: str) -> array:
+        pairs = array('q')
+        for chat_id, state in self._conn.execute(
+                "SELECT chat_id, state FROM broadcast_job_states WHERE job_id = ? ORDER BY rowid", (job_id,)):
+            pairs.extend((chat_id, state))
+        return pairs
+
+    def save_job_states(self, job_id: str, pairs: array, append: bool = True):
+        with self._conn:
+            if not append:
+                self._conn.execute("DELETE FROM broadcast_job_states WHERE job_id = ?", (job_id,))
+            self._conn.executemany(
+                "INSERT INTO broadcast_job_states (job_id, chat_id, state) VALUES (?, ?, ?) "
+                "ON CONFLICT (job_id, chat_id) DO UPDATE SET state = excluded.state",
+                [(job_id, pairs[i], pairs[i + 1]) for i in range(0, len(pairs), 2)]
+            )
+
+    def delete_job_states(self, job_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM broadcast_job_states WHERE job_id = ?", (job_id,))
+
+    # Données diverses (statistiques...)
+
+    def load_meta(self, key: str, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def save_meta(self, key: str, value):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, _dumps(value))
+            )
+
+    def backup(self, backup_dir: str, timestamp: str):
+        """Copie cohérente de la base via l'API de sauvegarde SQLite"""
+        target = sqlite3.connect(f"{backup_dir}/bot_{timestamp}.db")
+        try:
+            self._conn.backup(target)
+        finally:
+            target.close()
+
+    # Migration
+
+    def migrate_from(self, source: Storage, meta_keys=('stats',)):
+        """Importe en une fois toutes les données d'un autre moteur (fichiers JSON)"""
+        catalog = source.load_catalog()
+        legacy_stats = catalog.pop('stats', None)
+        self.save_catalog(catalog)
+        self.save_users(source.load_users())
+        self.save_access_codes(source.load_access_codes())
+        broadcasts = source.load_broadcasts()
+        self.save_broadcasts(broadcasts)
+        for broadcast_id in broadcasts:
+            self.save_deliveries(broadcast_id, source.load_deliveries(broadcast_id), append=False)
+        for key in meta_keys:
+            value = source.load_meta(key)
+            if value is not None:
+                self.save_meta(key, value)
+        # Anciennes installations : statistiques encore stockées dans le catalogue
+        if legacy_stats is not None and self.load_meta('stats') is None:
+            self.save_meta('stats', legacy_stats)
+        self.save_meta('migrated_from_json', datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def create_storage(config: dict, catalog_file: str = 'config/catalog.json') -> Storage:
+    """Crée le moteur de stockage configuré ('json' par défaut, ou 'sqlite')"""
+    json_storage = JsonStorage(catalog_file=catalog_file)
+    if config.get('storage', 'json') != 'sqlite':
+        return json_storage
+
+    storage = SqliteStorage(config.get('sqlite_path', 'data/bot.db'))
+    if storage.is_empty():
+        print(f"Migration des fichiers JSON vers {storage.db_path}...")
+        storage.migrate_from(json_storage)
+    return storage
+
+
+if __name__ == '__main__':
+    # Migration manuelle : python -m modules.storage [chemin_base]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'data/bot.db'
+    target = SqliteStorage(db_path)
+    if not target.is_empty():
+        print(f"La base {db_path} contient déjà des données, migration annulée.")
+        sys.exit(1)
+    target.migrate_from(JsonStorage())
+    print(f"✅ Migration terminée vers {db_path}")
@@ -0,0 +1,182 @@
+class VisibilityIndex:
+    """Index de visibilité des catégories et produits réservés à un groupe.
+
+    Une catégorie ou un produit appartient au groupe dont le nom préfixe son nom
+    ("groupe_Nom"), le premier groupe correspondant dans l'ordre de access_codes
+    faisant foi. L'index garde :
+      - groupe -> membres (set) et utilisateur -> groupes,
+      - nom -> groupes correspondants (mémoïsé, ne dépend que des noms de groupes),
+      - par classe de visibilité (ensemble des groupes d'un utilisateur) : les catégories
+        et produits visibles, et l'ordre de navigation produit par produit.
+    Un changement de groupes reconstruit les appartenances ; un changement de catalogue
+    n'invalide que les listes par classe.
+    """
+
+    def __init__(self, get_groups, get_catalog, groups_version_fn, catalog_version_fn):
+        self.get_groups = get_groups
+        self.get_catalog = get_catalog
+        self.groups_version_fn = groups_version_fn
+        self.catalog_version_fn = catalog_version_fn
+        self.rebuilds = 0
+        self._groups_version = None
+        self._catalog_version = None
+        # Incrémentée seulement quand la visibilité peut réellement changer
+        self._generation = 0
+        self._groups_snapshot = None
+        self._group_names = ()
+        self._members = {}
+        self._user_groups = {}
+        self._matches = {}
+        self._categories = {}
+        self._products = {}
+        self._siblings = {}
+
+    def _sync(self):
+        changed = False
+        groups_version = self.groups_version_fn()
+        if groups_version != self._groups_version:
+            # Les codes d'accès ont changé, mais pas forcément les groupes (ex. nouvel utilisateur autorisé)
+            self._groups_version = groups_version
+            changed = self._rebuild_groups()
+        catalog_version = self.catalog_version_fn()
+        if catalog_version != self._catalog_version:
+            self._catalog_version = catalog_version
+            changed = True
+        if changed:
+            # Les listes par classe dépendent des groupes et du catalogue : on les recalcule à la demande
+            self._generation += 1
+            self._categories = {}
+            self._products = {}
+            self._siblings = {}
+
+    def _rebuild_groups(self) -> bool:
+        groups = self.get_groups() or {}
+        snapshot = tuple((group, tuple(members)) for group, members in groups.items())
+        if snapshot == self._groups_snapshot:
+            return False
+        self._groups_snapshot = snapshot
+
+        group_names = tuple(groups)
+        if group_names != self._group_names:
+            # Les correspondances nom -> groupes ne changent que si les noms de groupes changent
+            self._group_names = group_names
+            self._matches = {}
+
+        self._members = {group: set(members) for group, members in groups.items()}
+        user_groups = {}
+        for group, members in groups.items():
+            for user_id in members:
+                user_groups.setdefault(user_id, []).append(group)
+        self._user_groups = user_groups
+        self.rebuilds += 1
+        return True
+
+    @property
+    def version(self) -> int:
+        """Change à chaque modification des groupes ou du catalogue (clé des caches dépendants)"""
+        self._sync()
+        return self._generation
+
+    # Appartenance
+
+    def matching_groups(self, name: str) -> tuple:
+        """Groupes dont le préfixe correspond au nom, dans l'ordre de access_codes"""
+        self._sync()
+        matches = self._matches.get(name)
+        if matches is None:
+            matches = self._matches[name] = tuple(
+                group for group in self._group_names if name.startswith(f"{group}_"))
+        return matches
+
+    def owner(self, name: str):
+        """Groupe propriétaire d'une catégorie ou d'un produit, None s'il est public"""
+        matches = self.matching_groups(name)
+        return matches[0] if matches else None
+
+    def is_group_name(self, name: str) -> bool:
+        return bool(self.matching_groups(name))
+
+    def user_groups(self, user_id) -> list:
+        """Groupes de l'utilisateur, dans l'ordre de access_codes"""
+        self._sync()
+        return list(self._user_groups.get(user_id, ()))
+
+    def is_member(self, user_id, group: str) -> bool:
+        self._sync()
+        return user_id in self._members.get(group, ())
+
+    def user_group_of(self, name: str, user_id):
+        """Premier groupe de l'utilisateur dont le préfixe correspond au nom"""
+        for group in self.matching_groups(name):
+            if user_id in self._members.get(group, ()):
+                return group
+        return None
+
+    def can_see(self, name: str, user_id) -> bool:
+        """Public, ou réservé à un groupe dont l'utilisateur est membre"""
+        group = self.owner(name)
+        return group is None or user_id in self._members.get(group, ())
+
+    def display_name(self, name: str) -> str:
+        """Nom sans le préfixe de son groupe"""
+        group = self.owner(name)
+        return name[len(group) + 1:] if group else name
+
+    # Menus client, partagés par tous les utilisateurs d'une même classe
+
+    def visibility_class(self, user_id) -> frozenset:
+        self._sync()
+        return frozenset(self._user_groups.get(user_id, ()))
+
+    def visible_categories(self, user_id) -> list:
+        """[(catégorie, nom affiché)] visibles par l'utilisateur, dans l'ordre du catalogue"""
+        key = self.visibility_class(user_id)
+        categories = self._categories.get(key)
+        if categories is None:
+            categories = self._categories[key] = [
+                (category, self.display_name(category))
+                for category in self.get_catalog()
+                if category != 'stats' and (self.owner(category) is None or self.owner(category) in key)
+            ]
+        return categories
+
+    def visible_products(self, category: str, user_id) -> list:
+        """Produits visibles d'une catégorie : tous dans une catégorie de groupe,
+        sinon les produits publics et ceux des groupes de l'utilisateur"""
+        key = self.visibility_class(user_id)
+        cache_key = (key, category)
+        products = self._products.get(cache_key)
+        if products is None:
+            catalog_products = self.get_catalog().get(category, [])
+            if self.owner(category) is not None:
+                products = list(catalog_products)
+            else:
+                products = [
+                    product for product in catalog_products
+                    if self.owner(product['name']) is None or self.owner(product['name']) in key
+                ]
+            self._products[cache_key] = products
+        return products
+
+    def siblings(self, category: str, product_name: str, user_id) -> tuple:
+        """(produit précédent, produit suivant) parmi les produits que l'utilisateur peut voir"""
+        key = self.visibility_class(user_id)
+        cache_key = (key, category)
+        entry = self._siblings.get(cache_key)
+        if entry is None:
+            products = [
+                product for product in self.get_catalog().get(category, [])
+                if self.owner(product['name']) is None or self.owner(product['name']) in key
+            ]
+            positions = {}
+            for index, product in enumerate(products):
+                positions.setdefault(product['name'], index)
+            entry = self._siblings[cache_key] = (products, positions)
+
+        products, positions = entry
+        index = positions.get(product_name)
+        if index is None:
+            return None, None
+        prev_product = products[index - 1] if index > 0 else None
+        next_product = products[index + 1] if index < len(products) - 1 else None
+        return prev_product, next_product
@@ -0,0 +1,73 @@
+import pytest
+
+from modules.access_state import AccessState
+from modules.storage import JsonStorage, SqliteStorage
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storages(request, tmp_path):
+    """Deux moteurs sur les mêmes données : le second joue l'autre processus"""
+    if request.param == 'json':
+        def make():
+            return JsonStorage(access_codes_file=str(tmp_path / 'access_codes.json'), data_dir=str(tmp_path))
+        yield make(), make()
+    else:
+        ours, theirs = SqliteStorage(str(tmp_path / 'bot.db')), SqliteStorage(str(tmp_path / 'bot.db'))
+        yield ours, theirs
+        ours.close()
+        theirs.close()
+
+
+def test_membership_is_read_from_memory(storages):
+    ours, _ = storages
+    ours.save_access_codes({'authorized_users': [1, 2], 'banned_users': [3], 'codes': [], 'groups': {}})
+
+    state = AccessState(ours)
+    assert state.is_authorized(1) and state.is_authorized('2')
+    assert not state.is_authorized(3)
+    assert state.is_banned(3)
+    assert state.reloads == 1
+    # Source inchangée : pas de nouvelle lecture
+    assert not state.refresh()
+    assert state.reloads == 1
+
+
+def test_external_change_is_reloaded(storages):
+    ours, theirs = storages
+    ours.save_access_codes({'authorized_users': [1], 'banned_users': [], 'codes': [], 'groups': {}})
+    state = AccessState(ours)
+
+    theirs.save_access_codes({'authorized_users': [1, 42, 43], 'banned_users': [7], 'codes': [], 'groups': {}})
+    assert state.refresh()
+    assert state.is_authorized(42)
+    assert state.is_banned(7)
+    assert not state.refresh()
+
+
+def test_own_writes_do_not_trigger_reload(storages):
+    ours, _ = storages
+    ours.save_access_codes({'authorized_users': [1], 'banned_users': [], 'codes': [], 'groups': {}})
+    state = AccessState(ours)
+
+    assert state.authorize(5)
+    assert not state.authorize(5)
+    assert state.ban(6)
+    ours.save_access_codes(state.data)
+    state.mark_written()
+
+    assert not state.refresh()
+    assert state.reloads == 1
+    assert state.data['authorized_users'] == [1, 5]
+
+
+def test_unauthorize_and_unban(storages):
+    ours, _ = storages
+    ours.save_access_codes({'authorized_users': [1], 'banned_users': [2], 'codes': [], 'groups': {}})
+    state = AccessState(ours)
+
+    assert state.deauthorize(1)
+    assert not state.deauthorize(1)
+    assert state.unban(2)
+    assert not state.unban(2)
+    assert not state.is_authorized(1) and not state.is_banned(2)
+    assert state.data['authorized_users'] == [] and state.data['banned_users'] == []
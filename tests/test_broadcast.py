@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('telegram')
+
+from telegram.error import Forbidden, RetryAfter, TimedOut
+
+from modules.broadcast import BroadcastEngine
+
+
+class FakeBot:
+    """Bot API locale : limite de débit (RetryAfter), utilisateurs qui ont bloqué le bot
+    (Forbidden) et nombre de TimedOut à renvoyer par chat avant de réussir"""
+
+    def __init__(self, limit: int = None, retry_after: int = 1, blocked=(), timeouts=None):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.blocked = set(blocked)
+        self.timeouts = dict(timeouts or {})
+        self.calls = {}
+        self.delivered = {}
+        # (instant, chat_id) des RetryAfter renvoyés
+        self.flood_errors = []
+        self.call_times = []
+        self._window = deque()
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.001)
+        now = time.monotonic()
+        self.calls[chat_id] = self.calls.get(chat_id, 0) + 1
+        self.call_times.append(now)
+        while self._window and now - self._window[0] > 1.0:
+            self._window.popleft()
+        if self.limit is not None and len(self._window) >= self.limit:
+            self.flood_errors.append(now)
+            raise RetryAfter(self.retry_after)
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.timeouts.get(chat_id):
+            self.timeouts[chat_id] -= 1
+            raise TimedOut()
+        self._window.append(now)
+        self.delivered[chat_id] = self.delivered.get(chat_id, 0) + 1
+        return SimpleNamespace(message_id=len(self.delivered))
+
+
+def run_broadcast(bot, chat_ids, **engine_options):
+    options = dict(rate=500, concurrency=10, per_chat_interval=0, base_delay=0.01)
+    options.update(engine_options)
+    engine = BroadcastEngine(**options)
+    states = {}
+
+    def on_result(chat_id, state, error=None):
+        assert chat_id not in states, f"chat {chat_id} traité deux fois"
+        states[chat_id] = state
+
+    send = lambda chat_id: bot.send_message(chat_id=chat_id, text="Annonce")
+    result = asyncio.run(engine.run(chat_ids, send, on_result))
+    return result, states
+
+
+def test_every_reachable_user_is_served_exactly_once():
+    chat_ids = list(range(200))
+    blocked = {3, 50, 120}
+    bot = FakeBot(blocked=blocked, timeouts={7: 1, 80: 2, 199: 1})
+
+    result, states = run_broadcast(bot, chat_ids)
+
+    reachable = [chat_id for chat_id in chat_ids if chat_id not in blocked]
+    assert bot.delivered == {chat_id: 1 for chat_id in reachable}
+    assert result.success == len(reachable)
+    assert result.failed == len(blocked)
+    assert set(states) == set(chat_ids)
+
+
+def test_retry_after_is_honoured():
+    # Seau réglé au-dessus de la limite de la Bot API : elle finit par répondre RetryAfter
+    bot = FakeBot(limit=20, retry_after=1)
+
+    result, states = run_broadcast(bot, list(range(30)), rate=200, concurrency=5)
+
+    assert bot.flood_errors
+    assert bot.delivered == {chat_id: 1 for chat_id in range(30)}
+    assert result.failed == 0
+    assert result.retried == len(bot.flood_errors)
+    # Aucun envoi ne part avant la fin de l'attente demandée (hors envois déjà en vol)
+    first_flood = bot.flood_errors[0]
+    resumed = [at for at in bot.call_times if at > first_flood + 0.05]
+    assert resumed and min(resumed) >= first_flood + bot.retry_after
+    assert result.elapsed >= bot.retry_after
+
+
+def test_forbidden_is_a_failure_and_not_retried():
+    bot = FakeBot(blocked={2})
+
+    result, states = run_broadcast(bot, [1, 2, 3])
+
+    assert bot.calls[2] == 1
+    assert states == {1: 'sent', 2: 'blocked', 3: 'sent'}
+    assert result.failed == 1
+    assert result.retried == 0
+    assert result.errors == {'Forbidden': 1}
+
+
+def test_timed_out_is_retried():
+    bot = FakeBot(timeouts={1: 2})
+
+    result, states = run_broadcast(bot, [1, 2])
+
+    assert bot.calls[1] == 3
+    assert bot.delivered == {1: 1, 2: 1}
+    assert states == {1: 'sent', 2: 'sent'}
+    assert result.retried == 2
+    assert result.failed == 0
+
+
+def test_timed_out_gives_up_after_max_retries():
+    bot = FakeBot(timeouts={1: 10})
+
+    result, states = run_broadcast(bot, [1], max_retries=2)
+
+    assert bot.calls[1] == 3
+    assert states == {1: 'failed'}
+    assert result.errors == {'TimedOut': 1}
+
+
+def test_progress_reports_use_bulk_lane():
+    from modules.outbound import current_lane
+
+    lanes = []
+
+    async def on_progress(result):
+        lanes.append(current_lane())
+
+    async def send(chat_id):
+        await asyncio.sleep(0.05)
+
+    engine = BroadcastEngine(rate=None, concurrency=1, per_chat_interval=0)
+    asyncio.run(engine.run([1, 2, 3], send, on_progress=on_progress, progress_interval=0.02))
+
+    assert lanes and set(lanes) == {'bulk'}
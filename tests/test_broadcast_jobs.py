@@ -0,0 +1,211 @@
+import asyncio
+from array import array
+
+import pytest
+
+pytest.importorskip('telegram')
+
+from modules.broadcast import BroadcastEngine
+from modules.broadcast_jobs import BLOCKED, FAILED, PENDING, SENT, STATE_CODES, BroadcastJobQueue
+from modules.storage import JsonStorage
+
+
+def make_queue(tmp_path, deliver):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    engine = BroadcastEngine(rate=1000, concurrency=5, per_chat_interval=0)
+    return BroadcastJobQueue(engine, deliver, storage, checkpoint_interval=0.05)
+
+
+async def wait_for(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition jamais remplie"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize('action, status', [('cancel', 'cancelled'), ('pause', 'paused')])
+def test_job_stopped_while_queued_is_not_sent(tmp_path, action, status):
+    sent = []
+    release = None
+
+    async def deliver(bot, job, chat_id):
+        if job['id'] == '1':
+            await release.wait()
+        sent.append((job['id'], chat_id))
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        queue = make_queue(tmp_path, deliver)
+        # Les deux diffusions sont en file avant le démarrage de la tâche de fond
+        first = queue.submit('send', 'b1', [1])
+        second = queue.submit('send', 'b2', [2, 3, 4])
+        queue.start(bot=None)
+        await wait_for(lambda: queue.jobs[first]['status'] == 'running')
+
+        assert await getattr(queue, action)(second)
+        release.set()
+        await wait_for(lambda: queue.jobs[first]['status'] == 'done')
+        await asyncio.sleep(0.1)
+        await queue.stop()
+        return queue, second
+
+    queue, second = asyncio.run(scenario())
+    assert queue.jobs[second]['status'] == status
+    assert all(job_id == '1' for job_id, _ in sent)
+    assert queue.counts(queue.jobs[second])[PENDING] == 3
+
+
+def test_states_are_logged_per_job_and_resumed(tmp_path):
+    sent = []
+
+    async def deliver(bot, job, chat_id):
+        sent.append(chat_id)
+
+    queue = make_queue(tmp_path, deliver)
+    job_id = queue.submit('send', 'b1', [1, 2, 3])
+    job = queue.jobs[job_id]
+    # Arrêt pendant l'envoi : seul le destinataire 1 a été servi
+    job['status'] = 'running'
+    job['recipients']['1'] = SENT
+    queue._changes[job_id] = array('q', [1, STATE_CODES[SENT]])
+    queue.writer.mark_dirty()
+
+    meta = queue.storage.load_meta('broadcast_jobs')
+    assert 'recipients' not in meta['jobs'][job_id]
+
+    async def scenario():
+        queue = make_queue(tmp_path, deliver)
+        assert queue.pending(queue.jobs[job_id]) == ['2', '3']
+        queue.start(bot=None)
+        await wait_for(lambda: queue.jobs[job_id]['status'] == 'done')
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert sorted(sent) == ['2', '3']
+    # Une diffusion terminée ne garde que ses compteurs
+    assert 'recipients' not in queue.jobs[job_id]
+    assert queue.counts(queue.jobs[job_id]) == {PENDING: 0, SENT: 3, FAILED: 0, BLOCKED: 0}
+    assert len(queue.storage.load_job_states(job_id)) == 0
+    assert make_queue(tmp_path, deliver).jobs[job_id]['counts'][SENT] == 3
+
+
+def test_legacy_recipient_maps_are_migrated(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_meta('broadcast_jobs', {'next': 3, 'jobs': {
+        '1': {'id': '1', 'status': 'done', 'created': 1, 'recipients': {'5': SENT, '6': FAILED}},
+        '2': {'id': '2', 'status': 'queued', 'created': 2, 'recipients': {'7': SENT, '8': PENDING}},
+    }})
+
+    queue = make_queue(tmp_path, None)
+    assert queue.counts(queue.jobs['1']) == {PENDING: 0, SENT: 1, FAILED: 1, BLOCKED: 0}
+    assert queue.pending(queue.jobs['2']) == ['8']
+    meta = storage.load_meta('broadcast_jobs')
+    assert all('recipients' not in job for job in meta['jobs'].values())
+    reloaded = make_queue(tmp_path, None)
+    assert reloaded.pending(reloaded.jobs['2']) == ['8']
+
+
+@pytest.mark.parametrize('action, status', [('cancel', 'cancelled'), ('pause', 'paused')])
+def test_failed_run_returns_job_to_queue(tmp_path, action, status):
+    sent = []
+    failures = [RuntimeError("suivi indisponible")]
+
+    async def deliver(bot, job, chat_id):
+        sent.append(chat_id)
+
+    def on_delivery(kind, chat_id, state, error=None):
+        # Le premier compte rendu échoue : l'exécution de la diffusion est interrompue
+        if failures:
+            raise failures.pop()
+
+    async def scenario():
+        queue = make_queue(tmp_path, deliver)
+        queue.on_delivery = on_delivery
+        queue.engine.concurrency = 1
+        job_id = queue.submit('send', 'b1', [1, 2, 3])
+        queue.start(bot=None)
+        await wait_for(lambda: not failures and queue.jobs[job_id]['status'] != 'running')
+        assert queue.jobs[job_id]['status'] == 'queued'
+        assert queue.storage.load_meta('broadcast_jobs')['jobs'][job_id]['status'] == 'queued'
+
+        assert await getattr(queue, action)(job_id)
+        assert queue.jobs[job_id]['status'] == status
+        assert not queue._stop_requests
+        if action == 'pause':
+            assert await queue.resume(job_id)
+            await wait_for(lambda: queue.jobs[job_id]['status'] == 'done')
+        await queue.stop()
+        return queue, job_id
+
+    queue, job_id = asyncio.run(scenario())
+    if action == 'pause':
+        # Reprise : chaque destinataire n'est servi qu'une fois
+        assert sorted(sent) == ['1', '2', '3']
+        assert queue.counts(queue.jobs[job_id])[SENT] == 3
+    else:
+        assert sent == ['1']
+        assert queue.counts(queue.jobs[job_id])[PENDING] == 2
+
+
+def test_job_interrupted_by_open_breaker_resumes(tmp_path):
+    from modules.outbound import CircuitOpen
+
+    sent = []
+    refusals = [CircuitOpen(0.2)]
+
+    async def deliver(bot, job, chat_id):
+        if chat_id == '2' and refusals:
+            raise refusals.pop()
+        sent.append(chat_id)
+
+    async def scenario():
+        queue = make_queue(tmp_path, deliver)
+        queue.engine.concurrency = 1
+        job_id = queue.submit('send', 'b1', [1, 2, 3])
+        queue.start(bot=None)
+        await wait_for(lambda: not refusals and queue.jobs[job_id]['status'] == 'queued')
+        # Refus du disjoncteur : ni échec ni envoi, le reste attend la fin du délai
+        assert queue.pending(queue.jobs[job_id]) == ['2', '3']
+        await wait_for(lambda: queue.jobs[job_id]['status'] == 'done')
+        await queue.stop()
+        return queue, job_id
+
+    queue, job_id = asyncio.run(scenario())
+    assert sent == ['1', '2', '3']
+    assert queue.counts(queue.jobs[job_id]) == {PENDING: 0, SENT: 3, FAILED: 0, BLOCKED: 0}
+
+
+def test_only_sends_update_delivery_health(tmp_path):
+    from types import SimpleNamespace
+
+    from telegram.error import Forbidden
+
+    from admin_features import AdminFeatures
+
+    health, reached = [], []
+    features = SimpleNamespace(
+        delivery_health=SimpleNamespace(record=lambda chat_id, state, error=None: health.append((chat_id, state))),
+        segments=SimpleNamespace(record_reached=reached.append))
+
+    async def deliver(bot, job, chat_id):
+        if job['kind'] == 'retract':
+            raise Forbidden("Forbidden: bot was blocked by the user")
+
+    async def scenario():
+        queue = make_queue(tmp_path, deliver)
+        queue.on_delivery = lambda *args: AdminFeatures._record_delivery(features, *args)
+        send = queue.submit('send', 'b1', [1])
+        retract = queue.submit('retract', 'b1', [2])
+        queue.start(bot=None)
+        await wait_for(lambda: queue.jobs[send]['status'] == queue.jobs[retract]['status'] == 'done')
+        await queue.stop()
+        return queue, retract
+
+    queue, retract = asyncio.run(scenario())
+    # Le retrait refusé reste dans le compte rendu de la diffusion, pas dans l'état des chats
+    assert queue.counts(queue.jobs[retract])[BLOCKED] == 1
+    assert health == [('1', 'sent')]
+    assert reached == ['1']
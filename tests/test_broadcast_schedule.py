@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytz
+
+from modules.broadcast_schedule import BroadcastScheduler
+from modules.storage import JsonStorage
+
+PARIS = pytz.timezone('Europe/Paris')
+
+
+def paris(*args) -> float:
+    return PARIS.localize(datetime(*args)).timestamp()
+
+
+def local_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, PARIS).strftime("%Y-%m-%d %H:%M")
+
+
+def make_scheduler(tmp_path):
+    return BroadcastScheduler(None, JsonStorage(data_dir=str(tmp_path)))
+
+
+def test_daily_repeat_keeps_local_time_across_dst(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    entry = scheduler.entries[scheduler.add(paris(2026, 3, 28, 3, 30), 86400)]
+
+    scheduler._advance(entry)
+    # Passage à l'heure d'été dans la nuit : 23 h plus tard, toujours 03:30
+    assert local_time(entry['run_at']) == "2026-03-29 03:30"
+    assert entry['run_at'] - paris(2026, 3, 28, 3, 30) == 23 * 3600
+
+    entry['run_at'], entry['local'] = paris(2026, 10, 24, 3, 30), "2026-10-24 03:30:00"
+    scheduler._advance(entry)
+    assert local_time(entry['run_at']) == "2026-10-25 03:30"
+
+
+def test_repeat_in_dst_gap_does_not_drift(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    # 02:30 n'existe pas le 29/03/2026 : l'occurrence part à 03:30, les suivantes à 02:30
+    entry = scheduler.entries[scheduler.add(paris(2026, 3, 28, 2, 30), 86400)]
+    scheduler._advance(entry)
+    scheduler._advance(entry)
+    assert local_time(entry['run_at']) == "2026-03-30 02:30"
+
+
+def test_weekly_repeat_and_legacy_entry(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    # Entrée enregistrée avant l'heure locale : reprise depuis run_at
+    entry = {'id': '1', 'run_at': paris(2026, 10, 20, 9, 0), 'repeat': 7 * 86400}
+    scheduler._advance(entry)
+    assert local_time(entry['run_at']) == "2026-10-27 09:00"
+
+
+def test_sub_day_repeat_stays_fixed(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    entry = scheduler.entries[scheduler.add(paris(2026, 3, 29, 1, 0), 3600)]
+    scheduler._advance(entry)
+    assert entry['run_at'] - paris(2026, 3, 29, 1, 0) == 3600
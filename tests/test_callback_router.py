@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+from modules.callback_router import CallbackRouter, PatternDispatcher
+
+
+def make_handler(name, calls):
+    async def handler(*args):
+        calls.append((name, args))
+        return name
+    return handler
+
+
+def test_exact_match_wins_over_prefix():
+    calls = []
+    router = CallbackRouter()
+    router.prefix("edit_", make_handler('prefix', calls))
+    router.exact("edit_", make_handler('exact', calls))
+
+    assert router.resolve("edit_")[0] == "edit_"
+    assert router.resolve("edit_x")[0] == "edit_*"
+
+
+def test_longest_prefix_wins_regardless_of_order():
+    calls = []
+    router = CallbackRouter()
+    router.prefix("edit_cat_name_", make_handler('name', calls))
+    router.prefix("edit_cat_", make_handler('cat', calls))
+    router.prefix("edit_", make_handler('edit', calls))
+
+    assert router.resolve("edit_cat_name_12")[0] == "edit_cat_name_*"
+    assert router.resolve("edit_cat_12")[0] == "edit_cat_*"
+    assert router.resolve("edit_price")[0] == "edit_*"
+    assert router.resolve("edit")[0] is None
+    assert router.resolve("view_1") == (None, None)
+
+
+def test_dispatch_calls_handler_and_records_stats():
+    calls = []
+    router = CallbackRouter()
+    router.prefix("product_", make_handler('product', calls))
+    router.exact("admin", make_handler('admin', calls))
+
+    async def scenario():
+        assert await router.dispatch("product_1a", 'update', 'context') == 'product'
+        assert await router.dispatch("product_2", 'update', 'context') == 'product'
+        assert await router.dispatch("admin", 'update', 'context') == 'admin'
+        assert await router.dispatch("inconnu", 'update', 'context') is None
+        assert await router.dispatch(None, 'update', 'context') is None
+
+    asyncio.run(scenario())
+    assert calls == [('product', ('update', 'context'))] * 2 + [('admin', ('update', 'context'))]
+    assert router.stats["product_*"].count == 2
+    assert router.stats["admin"].count == 1
+    assert router.report().splitlines()[0].startswith("product_*: 2 appels")
+
+
+def test_pattern_dispatcher_first_matching_pattern_wins():
+    calls = []
+    dispatcher = PatternDispatcher([
+        (r"^product_", make_handler('product', calls)),
+        (r"^product_\d+$", make_handler('never', calls)),
+        (r"^(next|prev)_", make_handler('nav', calls)),
+        (r"^view_(\w+)$", make_handler('view', calls)),
+    ], default=make_handler('default', calls))
+
+    assert dispatcher.resolve("product_12") is dispatcher.routes[0][1]
+    # Les groupes internes aux motifs ne décalent pas la route trouvée
+    assert dispatcher.resolve("prev_3") is dispatcher.routes[2][1]
+    assert dispatcher.resolve("view_abc") is dispatcher.routes[3][1]
+    assert dispatcher.resolve("admin") is dispatcher.default
+    assert dispatcher.resolve(None) is dispatcher.default
+
+
+def test_pattern_dispatcher_dispatch():
+    calls = []
+    dispatcher = PatternDispatcher([(r"^next_", make_handler('nav', calls))])
+    update = SimpleNamespace(callback_query=SimpleNamespace(data="next_1"))
+    other = SimpleNamespace(callback_query=SimpleNamespace(data="admin"))
+
+    async def scenario():
+        assert await dispatcher.dispatch(update, 'context') == 'nav'
+        assert await dispatcher.dispatch(other, 'context') is None
+
+    asyncio.run(scenario())
+    assert calls == [('nav', (update, 'context'))]
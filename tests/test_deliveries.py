@@ -0,0 +1,127 @@
+import os
+from array import array
+
+import pytest
+
+from modules.deliveries import DeliveryLog, DeliveryStore
+from modules.storage import JsonStorage, SqliteStorage
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'json':
+        yield JsonStorage(broadcasts_file=str(tmp_path / 'broadcasts.json'), data_dir=str(tmp_path))
+    else:
+        storage = SqliteStorage(str(tmp_path / 'bot.db'))
+        yield storage
+        storage.close()
+
+
+def test_deliveries_append_and_replace(storage):
+    storage.save_deliveries('1', array('q', [1, 10, 2, 20]))
+    storage.save_deliveries('1', array('q', [3, 30]))
+    assert list(storage.load_deliveries('1')) == [1, 10, 2, 20, 3, 30]
+
+    storage.save_deliveries('1', array('q', [2, 20]), append=False)
+    assert list(storage.load_deliveries('1')) == [2, 20]
+
+    storage.delete_deliveries('1')
+    assert list(storage.load_deliveries('1')) == []
+
+
+def test_partial_pair_left_by_crash_is_ignored(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_deliveries('1', array('q', [1, 10, 2, 20]))
+    # Écriture interrompue au milieu de la paire suivante
+    with open(os.path.join(storage.deliveries_dir, '1.bin'), 'ab') as f:
+        f.write(array('q', [3]).tobytes()[:5])
+
+    assert list(storage.load_deliveries('1')) == [1, 10, 2, 20]
+    storage.save_deliveries('1', array('q', [3, 30]), append=False)
+    assert list(storage.load_deliveries('1')) == [3, 30]
+
+
+def test_replace_is_atomic(tmp_path, monkeypatch):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_deliveries('1', array('q', [1, 10]))
+    storage.save_deliveries('1', array('q', [2, 20]), append=False)
+    assert os.listdir(storage.deliveries_dir) == ['1.bin']
+
+    def fail(*args):
+        raise OSError("disque plein")
+
+    # Échec avant le rename : l'ancien fichier reste intact et le temporaire est supprimé
+    monkeypatch.setattr('modules.persistence.os.replace', fail)
+    with pytest.raises(OSError):
+        storage.save_deliveries('1', array('q', [3, 30]), append=False)
+    assert os.listdir(storage.deliveries_dir) == ['1.bin']
+    assert list(storage.load_deliveries('1')) == [2, 20]
+
+
+def test_delivery_log_lookup_and_merge():
+    log = DeliveryLog(array('q', [5, 50, 1, 10]), merge_threshold=2)
+    assert list(log.users) == [1, 5]
+    assert log.get('5') == 50 and log.get(2) is None
+
+    log.add(3, 30)
+    assert 3 in log and list(log.users) == [1, 5]
+    # Le seuil atteint, les enregistrements récents sont fusionnés dans les colonnes triées
+    log.add(2, 20)
+    assert list(log.users) == [1, 2, 3, 5]
+    assert len(log) == 4
+    assert list(log.take_unsaved()) == [3, 30, 2, 20]
+    assert list(log.take_unsaved()) == []
+
+
+def test_delivery_log_keeps_every_copy():
+    log = DeliveryLog(array('q', [1, 10, 2, 20]))
+    log.add(1, 15)
+
+    assert log.messages_for(1) == [10, 15]
+    assert log.get(1) == 15
+    assert len(log) == 2
+    log.discard([1])
+    assert log.user_ids() == [2]
+
+
+def test_missing_walks_sorted_users():
+    log = DeliveryLog(array('q', [2, 20, 4, 40, 4, 41]), merge_threshold=10)
+    log.add(7, 70)
+
+    assert log.missing(['9', 4, 1, 7, 3, 2, 1]) == [1, 3, 9]
+    assert log.missing([]) == []
+    assert DeliveryLog().missing([5, 1]) == [1, 5]
+
+
+def test_store_appends_only_new_records(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_deliveries('1', array('q', [1, 10]))
+    deliveries = DeliveryStore(storage)
+
+    deliveries.record('1', 2, 20)
+    deliveries.flush()
+    deliveries.release('1')
+    assert list(storage.load_deliveries('1')) == [1, 10, 2, 20]
+    assert deliveries.get('1').get(2) == 20
+
+
+def test_store_compacts_duplicates_on_load(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_deliveries('1', array('q', [1, 10, 2, 20, 1, 10]))
+
+    assert len(DeliveryStore(storage).get('1')) == 2
+    assert list(storage.load_deliveries('1')) == [1, 10, 2, 20]
+
+
+def test_prune_drops_old_records(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    storage.save_deliveries('old', array('q', [1, 10]))
+    storage.save_deliveries('recent', array('q', [1, 11]))
+    deliveries = DeliveryStore(storage, retention_days=30)
+    now = 100 * 86400
+    broadcasts = {'old': {'delivered_at': now - 31 * 86400}, 'recent': {'delivered_at': now - 86400}}
+
+    assert deliveries.prune(broadcasts, now=now) == ['old']
+    assert broadcasts['old']['delivered_at'] is None
+    assert list(storage.load_deliveries('old')) == []
+    assert list(storage.load_deliveries('recent')) == [1, 11]
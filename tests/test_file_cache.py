@@ -0,0 +1,101 @@
+import json
+
+from modules.access_state import AccessState
+from modules.file_cache import FileCache, WatchedJsonFile, WatchedSource
+from modules.storage import JsonStorage
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_watched_json_file_reloads_external_changes(tmp_path):
+    path = tmp_path / 'config.json'
+    write_json(path, {'token': 'a'})
+    data = {'token': 'a'}
+    reloaded = []
+    source = WatchedJsonFile('config', str(path), data, on_reload=reloaded.append)
+
+    assert not source.refresh()
+    write_json(path, {'token': 'b', 'admin_ids': ['1']})
+    assert source.refresh()
+    # Le dict est mis à jour sur place : les références existantes voient la nouvelle valeur
+    assert data == {'token': 'b', 'admin_ids': ['1']}
+    assert reloaded == [data]
+    assert source.version == 1
+    assert not source.refresh()
+
+
+def test_own_save_does_not_reload(tmp_path):
+    path = tmp_path / 'config.json'
+    write_json(path, {'token': 'a'})
+    data = {'token': 'a'}
+    reloaded = []
+    source = WatchedJsonFile('config', str(path), data, on_reload=reloaded.append)
+
+    data['token'] = 'changed locally'
+    source.save()
+    assert not source.refresh()
+    assert reloaded == []
+    assert source.version == 1
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'token': 'changed locally'}
+
+
+def test_file_cache_versions_track_sources(tmp_path):
+    config_path = tmp_path / 'config.json'
+    write_json(config_path, {'token': 'a'})
+    storage = JsonStorage(access_codes_file=str(tmp_path / 'access_codes.json'), data_dir=str(tmp_path))
+    storage.save_access_codes({'authorized_users': [1]})
+
+    files = FileCache()
+    files.watch(WatchedJsonFile('config', str(config_path), {'token': 'a'}))
+    access = files.watch(AccessState(storage))
+    versions = files.version()
+    access_version = files.version('access_codes')
+
+    # Un autre processus modifie les codes d'accès
+    JsonStorage(access_codes_file=str(tmp_path / 'access_codes.json'), data_dir=str(tmp_path)).save_access_codes(
+        {'authorized_users': [1, 2, 3]})
+    files.refresh()
+
+    assert access.is_authorized(3)
+    assert files.version('access_codes') != access_version
+    assert files.version('config') == versions[:1]
+    assert files['config'].data == {'token': 'a'}
+
+
+def test_refused_reload_is_retried():
+    state = {'signature': 1, 'pending_writes': True, 'reloads': 0}
+
+    def reload():
+        if state['pending_writes']:
+            return False
+        state['reloads'] += 1
+
+    source = WatchedSource('catalog', lambda: state['signature'], reload)
+    state['signature'] = 2
+
+    assert not source.refresh()
+    assert source.changed()
+
+    state['pending_writes'] = False
+    assert source.refresh()
+    assert state['reloads'] == 1
+    assert not source.changed()
+    assert not source.refresh()
+
+
+def test_unreadable_source_waits_for_next_change():
+    state = {'signature': 1, 'calls': 0}
+
+    def reload():
+        state['calls'] += 1
+        raise ValueError("JSON invalide")
+
+    source = WatchedSource('catalog', lambda: state['signature'], reload)
+    state['signature'] = 2
+    assert not source.refresh()
+    assert not source.refresh()
+    assert state['calls'] == 1
@@ -0,0 +1,75 @@
+from modules.id_registry import IdRegistry, to_base36
+from modules.storage import JsonStorage
+
+
+def make_registry(tmp_path):
+    return IdRegistry(JsonStorage(data_dir=str(tmp_path)))
+
+
+def test_to_base36():
+    assert [to_base36(n) for n in (0, 1, 35, 36, 1295, 1296)] == ['0', '1', 'z', '10', 'zz', '100']
+
+
+def test_ids_are_stable_and_persisted(tmp_path):
+    ids = make_registry(tmp_path)
+    fleurs = ids.category_id('Fleurs')
+    rose = ids.product_id('Fleurs', 'Rose')
+    assert ids.category_id('Fleurs') == fleurs
+    assert ids.product_id('Fleurs', 'Rose') == rose
+    assert ids.product_id('Fruits', 'Rose') != rose
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.category(fleurs) == 'Fleurs'
+    assert reloaded.product(rose) == ('Fleurs', 'Rose')
+    # Le compteur reprend après les identifiants déjà attribués
+    assert reloaded.category_id('Légumes') not in (fleurs, rose)
+    assert reloaded.category('inconnu') is None
+    assert reloaded.product('inconnu') is None
+
+
+def test_rename_keeps_ids(tmp_path):
+    ids = make_registry(tmp_path)
+    fleurs = ids.category_id('Fleurs')
+    rose = ids.product_id('Fleurs', 'Rose')
+
+    ids.rename_category('Fleurs', 'Bouquets')
+    assert ids.category(fleurs) == 'Bouquets'
+    assert ids.category_id('Bouquets') == fleurs
+    # Le produit suit sa catégorie
+    assert ids.product(rose) == ('Bouquets', 'Rose')
+
+    ids.rename_product('Bouquets', 'Rose', 'Rose rouge')
+    assert ids.product(rose) == ('Bouquets', 'Rose rouge')
+    assert ids.product_id('Bouquets', 'Rose rouge') == rose
+    assert ids.product_id('Bouquets', 'Rose') != rose
+
+    # Renommer un élément inconnu ne fait rien
+    ids.rename_category('Inconnue', 'Autre')
+    ids.rename_product('Bouquets', 'Inconnu', 'Autre')
+    assert ids.category('Autre') is None
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.product(rose) == ('Bouquets', 'Rose rouge')
+
+
+def test_prune_forgets_removed_entries(tmp_path):
+    ids = make_registry(tmp_path)
+    fleurs = ids.category_id('Fleurs')
+    rose = ids.product_id('Fleurs', 'Rose')
+    tulipe = ids.product_id('Fleurs', 'Tulipe')
+    mangue = ids.product_id('Fruits', 'Mangue')
+    fruits = ids.category_id('Fruits')
+
+    ids.prune({'Fleurs': [{'name': 'Rose'}], 'stats': {}})
+
+    assert ids.product(rose) == ('Fleurs', 'Rose')
+    assert ids.category(fleurs) == 'Fleurs'
+    assert ids.product(tulipe) is None
+    assert ids.product(mangue) is None
+    assert ids.category(fruits) is None
+    # Un produit recréé reçoit un nouvel identifiant
+    assert ids.product_id('Fleurs', 'Tulipe') != tulipe
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.product(mangue) is None
+    assert reloaded.product(rose) == ('Fleurs', 'Rose')
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('telegram')
+
+from telegram.error import TimedOut
+
+from modules.outbound import (ChatLimits, CircuitBreaker, CircuitOpen, OutboundRateLimiter,
+                              PriorityTokenBucket, bulk_lane)
+
+
+def make_limiter(**breaker_options):
+    return OutboundRateLimiter(PriorityTokenBucket(1000), ChatLimits(chat_rate=1.0, chat_burst=1),
+                               CircuitBreaker(**breaker_options), base_delay=0.01)
+
+
+def call(limiter, endpoint, chat_id=1, callback=None):
+    async def ok():
+        return 'ok'
+    return limiter.process_request(callback or ok, (), {}, endpoint, {'chat_id': chat_id}, None)
+
+
+def test_open_breaker_fails_bulk_calls_fast():
+    limiter = make_limiter(failure_threshold=1, cooldown=30.0)
+
+    async def timed_out():
+        raise TimedOut()
+
+    async def scenario():
+        with bulk_lane():
+            with pytest.raises(TimedOut):
+                await call(limiter, 'sendMessage', callback=timed_out)
+            assert limiter.breaker.state == 'open'
+            started = time.monotonic()
+            with pytest.raises(CircuitOpen) as error:
+                await call(limiter, 'sendMessage', chat_id=2)
+            assert time.monotonic() - started < 0.1
+            assert 29 < error.value.retry_after <= 30
+        # Les réponses aux clients passent toujours
+        assert await call(limiter, 'sendMessage', chat_id=3) == 'ok'
+
+    asyncio.run(scenario())
+
+
+def test_chat_limits_skip_interactive_edits():
+    limiter = make_limiter()
+
+    async def scenario():
+        started = time.monotonic()
+        for _ in range(3):
+            await call(limiter, 'editMessageText')
+        interactive = time.monotonic() - started
+        await call(limiter, 'sendMessage')
+        started = time.monotonic()
+        await call(limiter, 'sendMessage')
+        sends = time.monotonic() - started
+        with bulk_lane():
+            await call(limiter, 'editMessageText', chat_id=2)
+            started = time.monotonic()
+            await call(limiter, 'editMessageText', chat_id=2)
+            bulk = time.monotonic() - started
+        return interactive, sends, bulk
+
+    interactive, sends, bulk = asyncio.run(scenario())
+    assert interactive < 0.1
+    assert sends >= 0.9
+    assert bulk >= 0.9
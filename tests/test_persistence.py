@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+
+from modules.persistence import WriteBehindStore, atomic_write_json
+
+
+def test_atomic_write_json_replaces_file(tmp_path):
+    path = tmp_path / 'sub' / 'catalog.json'
+    atomic_write_json(str(path), {'a': 1})
+    atomic_write_json(str(path), {'é': [1, 2]})
+
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'é': [1, 2]}
+    # Aucun fichier temporaire laissé dans le dossier
+    assert os.listdir(path.parent) == ['catalog.json']
+
+
+def test_atomic_write_json_keeps_previous_file_on_error(tmp_path):
+    path = tmp_path / 'catalog.json'
+    atomic_write_json(str(path), {'a': 1})
+
+    try:
+        atomic_write_json(str(path), {'a': object()})
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("TypeError attendue")
+
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'a': 1}
+    assert os.listdir(tmp_path) == ['catalog.json']
+
+
+def test_write_behind_store_writes_immediately_without_task():
+    writes = []
+    store = WriteBehindStore('test', lambda: writes.append(1), interval=10)
+
+    store.mark_dirty()
+    assert writes == [1]
+    assert not store.flush()
+
+
+def test_write_behind_store_coalesces_writes():
+    writes = []
+
+    async def scenario():
+        store = WriteBehindStore('test', lambda: writes.append(1), interval=0.05)
+        store.start()
+        for _ in range(100):
+            store.mark_dirty()
+        assert writes == []
+        await asyncio.sleep(0.15)
+        assert writes == [1]
+        store.mark_dirty()
+        await store.stop()
+        return store
+
+    store = asyncio.run(scenario())
+    assert writes == [1, 1]
+    assert store.writes == 2
+
+
+def test_write_behind_store_retries_after_failed_write():
+    calls = []
+
+    def flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disque plein")
+
+    store = WriteBehindStore('test', flush, interval=10)
+    store.mark_dirty()
+    assert store.writes == 0
+    # La modification reste en attente : la prochaine écriture la reprend
+    assert store.flush()
+    assert calls == [1, 1]
+    assert store.writes == 1
@@ -0,0 +1,77 @@
+from modules.segments import SegmentIndex
+from modules.storage import JsonStorage
+
+
+def make_index(tmp_path, groups=None, version=None):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    return SegmentIndex(storage, get_groups=lambda: groups, groups_version_fn=lambda: version[0] if version else None)
+
+
+def test_viewer_bitmaps_are_persisted(tmp_path):
+    index = make_index(tmp_path)
+    for user_id in (5, 12, 3, 5, 40):
+        index.record_view('c1', user_id)
+    index.record_view('c2', '12')
+
+    assert sorted(index.viewers('c1')) == [3, 5, 12, 40]
+    assert index.viewer_count('c1') == 4
+    assert index.viewers('inconnue') == [] and index.viewer_count('inconnue') == 0
+
+    index.writer.flush()
+    reloaded = make_index(tmp_path)
+    assert sorted(reloaded.viewers('c1')) == [3, 5, 12, 40]
+    assert reloaded.viewers('c2') == [12]
+
+
+def test_prune_forgets_removed_categories(tmp_path):
+    index = make_index(tmp_path)
+    index.record_view('c1', 1)
+    index.record_view('c2', 2)
+
+    index.prune(['c2'])
+    assert index.viewers('c1') == []
+    assert index.viewers('c2') == [2]
+
+
+def test_activity_windows_use_bisect(tmp_path):
+    index = make_index(tmp_path)
+    index.load_last_seen({
+        '1': {'last_seen': '2026-01-01 10:00:00'},
+        '2': {'last_seen': '2026-03-01 10:00:00'},
+        '3': {'last_seen': None},
+        '4': {'last_seen': '2026-02-01 10:00:00'}
+    })
+
+    assert index.seen_since('2026-02-01 10:00:00') == [4, 2]
+    assert index.seen_before('2026-02-01 10:00:00') == [1]
+
+    # Une nouvelle activité déplace l'utilisateur dans l'index
+    index.touch(1, '2026-04-01 09:00:00')
+    index.touch('3', '2026-01-15 08:00:00')
+    assert index.seen_since('2026-02-01 00:00:00') == [4, 2, 1]
+    assert index.seen_before('2026-02-01 00:00:00') == [3]
+
+
+def test_groups_rebuilt_when_version_changes(tmp_path):
+    groups = {'VIP': ['1', '2']}
+    version = [1]
+    index = make_index(tmp_path, groups, version)
+    assert index.group('VIP') == {1, 2}
+
+    groups['VIP'].append('3')
+    assert index.group('VIP') == {1, 2}
+    version[0] = 2
+    assert index.group('VIP') == {1, 2, 3}
+    assert index.group('Inconnu') == set()
+
+
+def test_never_reached(tmp_path):
+    index = make_index(tmp_path)
+    assert index.needs_reached
+    index.init_reached([1, 2])
+    index.record_reached('7')
+
+    assert not index.needs_reached
+    assert index.never_reached([1, 3, 7, 9]) == [3, 9]
+    index.writer.flush()
+    assert make_index(tmp_path).never_reached([2, 7, 8]) == [8]
@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+
+from modules.sessions import SessionManager
+
+
+class FakeApplication:
+    def __init__(self, user_ids):
+        self.user_data = {user_id: {'panier': [user_id]} for user_id in user_ids}
+
+    def drop_user_data(self, user_id):
+        del self.user_data[user_id]
+
+
+def test_evict_drops_idle_sessions(monkeypatch):
+    sessions = SessionManager(idle_timeout=60, max_sessions=100)
+    application = FakeApplication([1, 2, 3])
+    now = 1000.0
+    monkeypatch.setattr('modules.sessions.time.monotonic', lambda: now)
+    sessions._last_seen.update({1: now - 120, 2: now - 90, 3: now - 10})
+
+    assert sessions.evict(application) == 2
+    assert list(application.user_data) == [3]
+    assert list(sessions._last_seen) == [3]
+    assert sessions.evicted == 2
+
+
+def test_evict_trims_least_recent_over_limit(monkeypatch):
+    sessions = SessionManager(idle_timeout=3600, max_sessions=2)
+    application = FakeApplication([1, 2, 3, 4])
+    monkeypatch.setattr('modules.sessions.time.monotonic', lambda: 1000.0)
+    # Ordre LRU : 1 est le moins récemment actif
+    for user_id in (1, 2, 3, 4):
+        sessions._last_seen[user_id] = 999.0
+
+    assert sessions.evict(application) == 2
+    assert list(application.user_data) == [3, 4]
+
+
+def test_evict_keeps_protected_sessions(monkeypatch):
+    sessions = SessionManager(idle_timeout=60, max_sessions=100, is_protected=lambda user_id: user_id == 1)
+    application = FakeApplication([1, 2])
+    monkeypatch.setattr('modules.sessions.time.monotonic', lambda: 1000.0)
+    sessions._last_seen.update({1: 0.0, 2: 0.0})
+
+    assert sessions.evict(application) == 1
+    assert list(application.user_data) == [1]
+    assert 1 in sessions._last_seen
+
+
+def test_track_moves_user_to_most_recent():
+    sessions = SessionManager()
+    for user_id in (1, 2, 1):
+        update = SimpleNamespace(effective_user=SimpleNamespace(id=user_id))
+        asyncio.run(sessions.track(update, None))
+
+    assert list(sessions._last_seen) == [2, 1]
@@ -0,0 +1,112 @@
+import pytest
+
+from modules.storage import JsonStorage, SqliteStorage
+
+CATALOG = {
+    'Fleurs': [
+        {'name': 'Rose', 'price': '10€', 'media': []},
+        {'name': 'Tulipe', 'price': '8€'}
+    ],
+    'Vide': [],
+    'VIP_Fruits': [{'name': 'VIP_Mangue', 'price': '12€'}]
+}
+
+USERS = {
+    '1': {'username': 'alice', 'last_seen': '2026-01-01 10:00:00'},
+    '2': {'username': None, 'last_seen': '2026-01-02 10:00:00'}
+}
+
+ACCESS_CODES = {
+    'authorized_users': [1, 2],
+    'banned_users': [3],
+    'codes': [{'code': 'ABC', 'expiration': '2026-02-01T00:00:00', 'used': False}],
+    'groups': {'VIP': [1]}
+}
+
+
+def make_json(tmp_path):
+    return JsonStorage(catalog_file=str(tmp_path / 'catalog.json'), users_file=str(tmp_path / 'users.json'),
+                       access_codes_file=str(tmp_path / 'access_codes.json'),
+                       broadcasts_file=str(tmp_path / 'broadcasts.json'), data_dir=str(tmp_path))
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'json':
+        yield make_json(tmp_path)
+    else:
+        storage = SqliteStorage(str(tmp_path / 'bot.db'))
+        yield storage
+        storage.close()
+
+
+def test_catalog_round_trip(storage):
+    storage.save_catalog(CATALOG)
+    assert storage.load_catalog() == CATALOG
+
+    catalog = {category: [dict(product) for product in products] for category, products in CATALOG.items()}
+    catalog['Fleurs'][1]['price'] = '9€'
+    del catalog['Fleurs'][0]
+    del catalog['Vide']
+    storage.save_catalog(catalog)
+    assert storage.load_catalog() == catalog
+    assert list(storage.load_catalog()) == ['Fleurs', 'VIP_Fruits']
+
+
+def test_users_round_trip_and_partial_save(storage):
+    users = {user_id: dict(user) for user_id, user in USERS.items()}
+    storage.save_users(users)
+    assert storage.load_users() == USERS
+
+    users['1']['last_seen'] = '2026-03-01 10:00:00'
+    del users['2']
+    users['4'] = {'username': 'bob', 'last_seen': '2026-03-01 11:00:00'}
+    storage.save_users(users, user_ids=['1', '2', '4'])
+    assert storage.load_users() == users
+
+
+def test_access_codes_round_trip_and_partial_save(storage):
+    access_codes = {key: (value.copy() if hasattr(value, 'copy') else value) for key, value in ACCESS_CODES.items()}
+    storage.save_access_codes(access_codes)
+    loaded = storage.load_access_codes()
+    for key, value in ACCESS_CODES.items():
+        assert loaded[key] == value
+
+    access_codes['authorized_users'] = [1, 2, 5]
+    access_codes['codes'] = [dict(access_codes['codes'][0], used=True)]
+    access_codes['groups'] = {'VIP': [1, 5]}
+    storage.save_access_codes(access_codes, user_ids=[5], codes=['ABC'], groups=['VIP'])
+    loaded = storage.load_access_codes()
+    assert loaded['authorized_users'] == [1, 2, 5]
+    assert loaded['codes'][0]['used'] is True
+    assert loaded['groups'] == {'VIP': [1, 5]}
+
+
+def test_meta_round_trip(storage):
+    assert storage.load_meta('stats') is None
+    assert storage.load_meta('stats', {}) == {}
+    storage.save_meta('stats', {'Fleurs': {'views': 3}})
+    storage.save_meta('stats', {'Fleurs': {'views': 4}})
+    assert storage.load_meta('stats') == {'Fleurs': {'views': 4}}
+
+
+def test_migration_from_json(tmp_path):
+    source = make_json(tmp_path)
+    source.save_catalog(dict(CATALOG, stats={'total_views': 7}))
+    source.save_users(USERS)
+    source.save_access_codes(ACCESS_CODES)
+
+    target = SqliteStorage(str(tmp_path / 'bot.db'))
+    assert target.is_empty()
+    target.migrate_from(source)
+
+    assert not target.is_empty()
+    assert target.load_catalog() == CATALOG
+    assert target.load_users() == USERS
+    loaded = target.load_access_codes()
+    for key, value in ACCESS_CODES.items():
+        assert loaded[key] == value
+    # Anciennes statistiques du catalogue déplacées dans leur propre clé
+    assert target.load_meta('stats') == {'total_views': 7}
+    assert target.load_meta('migrated_from_json')
+    target.close()